@@ -0,0 +1,801 @@
+"""
+异步OA流程接口
+
+AsyncOaWorkFlow与utils.OaWorkFlow方法一致, 所有OA调用均为协程, 适用于ASGI部署
+需要安装httpx
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from collections import deque
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from rest_framework.exceptions import APIException
+
+from . import json_codec
+from .caches import get_user_context_cache, get_userinfo_cache
+from .core import OaClientCore, OaUserContext
+from .create_list import CreateWorkflowIndex, create_list_conditions, get_index_cache, index_cache_key
+from .crypto import get_encrypted_userid
+from .exceptions import OaTokenInvalid
+from .http_pool import async_oa_session_pool, get_timeout, httpx
+from .instrumentation import start_call
+from .records import WorkflowRequestRecord
+from .response_cache import cached_response, invalidates_response
+from .retry import RetryPolicy, RetryState, deadline_scope, get_circuit_breaker
+from .settings import SETTING_PREFIX, api_settings
+from .tokens import lock_wait_deadline, oa_token_manager
+from .utils import OaApi, OaWorkFlow
+
+logger = logging.getLogger(__name__)
+
+_token_locks = weakref.WeakKeyDictionary()
+# 后台刷新Token的任务, 事件循环只保留弱引用, 需持有引用直到任务结束
+_background_tasks = set()
+
+
+def _get_token_lock() -> asyncio.Lock:
+    """
+    当前事件循环内获取Token的锁, 同一时刻只有一个协程向OA申请Token
+    """
+    loop = asyncio.get_running_loop()
+    lock = _token_locks.get(loop)
+    if lock is None:
+        lock = _token_locks[loop] = asyncio.Lock()
+    return lock
+
+
+class AsyncOaApi(OaApi):
+    def __init__(self, core: OaClientCore = None):
+        super().__init__(core)
+        if httpx is None:
+            raise ImportError("异步OA接口需要安装httpx: pip install httpx")
+
+    async def get_sso_token(self, staff_code):
+        """
+        获取SSO TOKEN
+        :param staff_code: 用户工号或者为oa的登入名, A0009527
+        """
+        if not api_settings.OA_SSO_TOKEN_APP_ID:
+            raise ValueError(f"使用此方法请先配置f'{SETTING_PREFIX}'.'OA_SSO_TOKEN_APP_ID'")
+        api_path = "/ssologin/getToken"
+        headers = {"Content-Type": self.REQUEST_CONTENTTYPE}
+        post_data = {"appid": api_settings.OA_SSO_TOKEN_APP_ID, "loginid": staff_code}
+        token = await self._post_oa(api_path, post_data=post_data, headers=headers, need_json=False)
+        if "失败" in token:
+            raise APIException(token)
+        return token
+
+    async def register_user(self, oa_user_id: str):
+        oa_user_id = str(oa_user_id)
+        if getattr(self, "user", {}) and str(self.user["userid"]) == oa_user_id:
+            return
+
+        await self._ensure_token()
+        context_cache = get_user_context_cache()
+        context = context_cache.get(oa_user_id) if context_cache is not None else None
+        if context is None:
+            self.oa_user_id = oa_user_id
+            self.encrypt_userid = get_encrypted_userid(self.app_spk, oa_user_id)
+            userinfo_cache = get_userinfo_cache()
+            user_info = None
+            if userinfo_cache is not None:
+                user_info = await sync_to_async(userinfo_cache.get)(oa_user_id)
+            if user_info is None:
+                user_info = await self.userinfo()
+                if userinfo_cache is not None:
+                    await sync_to_async(userinfo_cache.set)(oa_user_id, user_info)
+            context = OaUserContext(oa_user_id, self.encrypt_userid, user_info)
+            if context_cache is not None:
+                context_cache.set(oa_user_id, context)
+        self.bind_user(context)
+
+    async def register_user_with_job_code(self, job_code: str):
+        """
+        使用工号
+        :param job_code: 长工号， A0009527...
+        """
+        oa_user_id, oa_user_dept_id = await sync_to_async(self.resolve_work_code)(job_code)
+        if not oa_user_id:
+            raise APIException(f"Oa中未查询到工号为'{job_code}'的账号")
+        await self.register_user(oa_user_id)
+
+    async def get_token(self, expr=None, stale_token: str = None):
+        """
+        获取Oa API Token, 与OaApi.get_token一致
+        事件循环内的协程通过asyncio锁排队, 进程间通过OaTokenManager的分布式锁保证只有一个调用方请求OA
+        :param expr: Token有效期(秒), 默认使用配置TOKEN_EXPIRE
+        :param stale_token: 已失效的Token, 缓存中的Token与之不同时说明已被刷新, 直接使用
+        :return:
+        """
+        expr = expr or api_settings.TOKEN_EXPIRE
+        async with _get_token_lock():
+            token = await sync_to_async(oa_token_manager.get_fresh_token)(stale_token)
+            deadline = lock_wait_deadline()
+            while not token:
+                lock_expires_at = time.monotonic() + api_settings.TOKEN_LOCK_TIMEOUT
+                owner = await sync_to_async(oa_token_manager.acquire_lock)()
+                if owner:
+                    try:
+                        token = await sync_to_async(oa_token_manager.get_fresh_token)(stale_token)
+                        if not token:
+                            # 申请Token不超过分布式锁的有效期
+                            with deadline_scope(lock_expires_at):
+                                token = await self._apply_token(expr)
+                            token = await sync_to_async(oa_token_manager.store)(token, expr)
+                    finally:
+                        await sync_to_async(oa_token_manager.release_lock)(owner)
+                    break
+                await asyncio.sleep(oa_token_manager.LOCK_POLL_INTERVAL)
+                token = await sync_to_async(oa_token_manager.get_fresh_token)(stale_token)
+                if not token and time.monotonic() >= deadline:
+                    raise APIException("获取OA Token超时")
+            self.token = token
+            return self.token
+
+    async def _apply_token(self, expr):
+        """
+        向OA申请新Token
+        :param expr: Token有效期(秒)
+        :return:
+        """
+        api_path = "/api/ec/dev/auth/applytoken"
+        headers = {
+            "appid": self.app_id,
+            "secret": self.app_encrypted_secret,
+            "time": str(expr),
+        }
+        res = await self._request(api_path, "POST", headers=headers, refresh_token=False)
+        return res[self.TOKEN_KEY]
+
+    async def _ensure_token(self):
+        """
+        确保持有有效Token, 临近过期时在后台提前刷新
+        """
+        # 进程内的Token有效时无需切换到线程读取django cache
+        token = oa_token_manager.get_local_token() or await sync_to_async(oa_token_manager.get_cached_token)()
+        if not token:
+            return await self.get_token()
+        if oa_token_manager.should_refresh() and oa_token_manager.start_background_refresh():
+            task = asyncio.ensure_future(self._refresh_token_in_background(token))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        self.token = token
+        return token
+
+    async def _refresh_token_in_background(self, token):
+        try:
+            await self.get_token(stale_token=token)
+        except Exception:  # noqa
+            logger.exception("OA Token后台刷新失败")
+        finally:
+            oa_token_manager.finish_background_refresh()
+
+    @property
+    def _request_headers(self):
+        # 异步客户端的Token在register_user/_request中通过_ensure_token维护, 此处不访问缓存
+        if not self.encrypt_userid:
+            raise NotImplementedError("调用前请先使用.register_user(OA_USER_ID: str)方法注册当前要操作的OA账号")
+        return {
+            "Content-Type": self.REQUEST_CONTENTTYPE,
+            "appid": self.app_id,
+            self.TOKEN_KEY: self.token,
+            "userid": self.encrypt_userid,
+        }
+
+    async def _request(
+        self,
+        api_path,
+        method: str,
+        headers: dict = None,
+        need_json=True,
+        refresh_token=True,
+        timeout: tuple = None,
+        **kwargs,
+    ):
+        url = f"{self.oa_host}{api_path}"
+        timeout = timeout or get_timeout()
+        retry = RetryState(RetryPolicy.from_settings(), get_circuit_breaker(self.oa_host), timeout=timeout)
+        # 刷新Token等嵌套请求共用本次调用的截止时间
+        with deadline_scope(retry.deadline_at):
+            if not headers:
+                await self._ensure_token()
+                headers = self._request_headers
+            call = start_call(api_path, method)
+            try:
+                while True:
+                    # 先计算超时: 已超过截止时间时不占用熔断器的探测名额
+                    attempt_timeout = retry.attempt_timeout(timeout)
+                    retry.before_attempt()
+                    try:
+                        resp = await async_oa_session_pool.request(
+                            method, url, headers=headers, timeout=attempt_timeout, **kwargs
+                        )
+                    except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                        connect_failed = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                        timed_out = isinstance(e, httpx.TimeoutException)
+                        await asyncio.sleep(self._transport_error_delay(retry, method, e, connect_failed, timed_out))
+                        continue
+                    except Exception as e:
+                        raise APIException(str(e))
+
+                    if call is not None:
+                        call.on_response(resp)
+                    if retry.policy.is_retryable_status(resp.status_code):
+                        # 网关返回502/504时POST请求可能已被OA处理, 不重试
+                        delay = retry.on_transient_error(retryable=method == "GET")
+                        if delay is None:
+                            raise APIException(f"OA服务异常: Response[{resp.status_code}]")
+                        await asyncio.sleep(delay)
+                        continue
+                    retry.on_success()
+
+                    try:
+                        res = self._parse_response(resp, need_json=need_json)
+                    except OaTokenInvalid as e:
+                        if not refresh_token or not retry.can_refresh_token():
+                            raise APIException(str(e))
+                        headers[self.TOKEN_KEY] = await self.get_token(stale_token=headers.get(self.TOKEN_KEY))
+                        continue
+                    if call is not None:
+                        call.finish(retry)
+                    return res
+            except Exception as e:
+                if call is not None:
+                    call.finish(retry, e)
+                raise
+            finally:
+                retry.close()
+
+    async def _get_oa(self, api: str, params: dict = None, headers: dict = None, need_json=True, **kwargs):
+        return await self._request(api, "GET", params=params, headers=headers, need_json=need_json, **kwargs)
+
+    async def _post_oa(self, api: str, post_data: dict = None, headers: dict = None, need_json=True, **kwargs):
+        return await self._request(api, "POST", data=post_data, headers=headers, need_json=need_json, **kwargs)
+
+    async def _page_data(
+        self,
+        page_count_path,
+        page_data_path,
+        workflow_id,
+        page=1,
+        page_size=10,
+        conditions: dict = None,
+        concurrent: bool = None,
+        with_count: bool = True,
+    ):
+        """
+        请求分页数据, 参数同OaApi._page_data
+        """
+        if concurrent is None:
+            concurrent = api_settings.PAGE_DATA_CONCURRENT
+        search_conditions = self._page_conditions(workflow_id, conditions)
+        if not with_count:
+            return await self._page_data_has_more(page_data_path, search_conditions, page, page_size, concurrent)
+
+        post_data = {"pageNo": str(page), "pageSize": str(page_size), **search_conditions}
+        if concurrent:
+            resp, res = await asyncio.gather(
+                self._post_oa(page_count_path, post_data=search_conditions, need_json=False),
+                self._post_oa(page_data_path, post_data=post_data),
+            )
+            todo_count = int(resp)
+            if (page - 1) * page_size >= todo_count:
+                return [], page, todo_count
+            return res, page, todo_count
+
+        resp = await self._post_oa(page_count_path, post_data=search_conditions, need_json=False)
+        todo_count = int(resp)
+
+        if (page - 1) * page_size >= todo_count:
+            return [], page, todo_count
+
+        res: list = await self._post_oa(page_data_path, post_data=post_data)
+        return res, page, todo_count
+
+    async def _iter_page_data(
+        self,
+        page_count_path,
+        page_data_path,
+        workflow_id,
+        conditions: dict = None,
+        page_size: int = None,
+        prefetch: int = None,
+        max_items: int = None,
+        as_records: bool = False,
+    ):
+        """
+        逐条返回全部分页数据(异步生成器), 参数同OaApi._iter_page_data
+        """
+        page_size = page_size or api_settings.ITER_LIST_PAGE_SIZE
+        if prefetch is None:
+            prefetch = api_settings.ITER_LIST_PREFETCH_PAGES
+        search_conditions = self._page_conditions(workflow_id, conditions)
+        total = int(await self._post_oa(page_count_path, post_data=search_conditions, need_json=False))
+        if max_items is not None:
+            total = min(total, max_items)
+        last_page = -(-total // page_size)
+
+        pending = deque()
+        next_page = 1
+        seen = set()
+        try:
+            while total > 0:
+                while next_page <= last_page and len(pending) <= prefetch:
+                    post_data = {"pageNo": str(next_page), "pageSize": str(page_size), **search_conditions}
+                    pending.append(asyncio.ensure_future(self._post_oa(page_data_path, post_data=post_data)))
+                    next_page += 1
+                if not pending:
+                    return
+                res: list = await pending.popleft()
+                rows = self._unseen_rows(res, seen, total)
+                total -= len(rows)
+                if as_records:
+                    rows = WorkflowRequestRecord.from_list(rows)
+                for row in rows:
+                    yield row
+                if len(res) < page_size:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _page_data_has_more(self, page_data_path, search_conditions: dict, page, page_size, concurrent=False):
+        """
+        不请求总数的分页数据, 同OaApi._page_data_has_more
+        """
+        if page == 1:
+            post_data = {"pageNo": "1", "pageSize": str(page_size + 1), **search_conditions}
+            res: list = await self._post_oa(page_data_path, post_data=post_data)
+            return res[:page_size], page, len(res) > page_size
+
+        post_data = {"pageNo": str(page), "pageSize": str(page_size), **search_conditions}
+        next_post_data = {"pageNo": str(page * page_size + 1), "pageSize": "1", **search_conditions}
+        if concurrent:
+            res, next_res = await asyncio.gather(
+                self._post_oa(page_data_path, post_data=post_data),
+                self._post_oa(page_data_path, post_data=next_post_data),
+            )
+        else:
+            res = await self._post_oa(page_data_path, post_data=post_data)
+            next_res = await self._post_oa(page_data_path, post_data=next_post_data) if len(res) >= page_size else []
+        return res, page, self._has_next_row(res, next_res, page_size)
+
+    async def userinfo(self) -> dict:
+        """
+        获取账号信息
+        :return:
+        """
+        api_path = "/api/hrm/login/getAccountList"
+        user_info = await self._get_oa(api_path)
+        return user_info["data"]
+
+    async def upload_file(self, oa_category_id: str, file_source: BytesIO, file_name):
+        """
+        上传附件
+        :param oa_category_id: Oa附件目录ID
+        :param file_source: 上传到Oa的文件内容
+        :param file_name: 上传到Oa的文件名称
+        :return:
+        """
+        api_path = "/api/doc/upload/uploadFile2Doc"
+        body = {"category": oa_category_id, "name": file_name}
+        headers = self._request_headers.copy()
+        headers.pop("Content-Type")
+        files = {"file": file_source}
+        resp = await self._post_oa(
+            api_path, post_data=body, headers=headers, files=files, timeout=get_timeout("upload_file")
+        )
+        return resp["data"]["fileid"]
+
+    async def get_workflow_chart_url(self, staff_code: str, oa_workflow_id):
+        """
+        获取流程配置的流程图链接， 不需要注册用户
+        :param staff_code:     拥有OA可配置流程权限的账号工号
+        :param oa_workflow_id: 要获取流程图的OA流程ID
+        """
+        oa_host = api_settings.OA_HOST
+        get_chat_path = (
+            "/workflow/workflowDesign/readOnly-index.html"
+            "?isFree=0&isAllowNodeFreeFlow=0&isReadOnlyModel=true"
+            f"&isFlowModel=0&hasFreeNode=0&showE9Pic=1&isFromWfForm=true&workflowId={oa_workflow_id}"
+        )
+        oa_sso_token = await self.get_sso_token(staff_code)
+        return f"{oa_host}{get_chat_path}&ssoToken={oa_sso_token}"
+
+    async def get_workflow_chart_xml(self, oa_workflow_id):
+        """
+        获取流程配置的流程图xml数据
+        需要高权限级别的OA账号
+        :param oa_workflow_id: 要获取流程图的OA流程ID
+        """
+        get_xml_path = "/api/workflow/layout/getXml"
+        post_data = {
+            "workflowId": oa_workflow_id,
+            "backstageReadOnly": True,
+        }
+        res = await self._post_oa(get_xml_path, post_data=post_data, timeout=get_timeout("get_workflow_chart_xml"))
+        return self._decode_chart_xml(res.get("xml", ""))
+
+
+class AsyncOaWorkFlow(AsyncOaApi):
+    INBOX_LIST_APIS = OaWorkFlow.INBOX_LIST_APIS
+
+    async def get_todo_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
+        """
+        待办流程
+        """
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["todo"]
+        return await self._page_data(
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
+        )
+
+    async def get_doing_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
+        """
+        待办列表->待处理
+        """
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["doing"]
+        return await self._page_data(
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
+        )
+
+    async def get_unread_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
+        """
+        待办列表->待阅
+        """
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["unread"]
+        return await self._page_data(
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
+        )
+
+    async def get_rejected_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
+        """
+        待办列表->被退回
+        """
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["rejected"]
+        return await self._page_data(
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
+        )
+
+    async def get_handled_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
+        """
+        已办流程
+        """
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["handled"]
+        return await self._page_data(
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
+        )
+
+    def iter_list(
+        self, kind, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False
+    ):
+        """
+        逐条返回流程列表的全部数据, async for row in client.iter_list(...)
+        """
+        count_api_path, data_api_path = self.INBOX_LIST_APIS[kind]
+        return self._iter_page_data(
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            conditions=conditions,
+            page_size=page_size,
+            prefetch=prefetch,
+            max_items=max_items,
+            as_records=as_records,
+        )
+
+    def iter_todo(self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False):
+        return self.iter_list("todo", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    def iter_doing(self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False):
+        return self.iter_list("doing", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    def iter_unread(
+        self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False
+    ):
+        return self.iter_list("unread", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    def iter_rejected(
+        self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False
+    ):
+        return self.iter_list("rejected", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    def iter_handled(
+        self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False
+    ):
+        return self.iter_list("handled", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    async def get_inbox_summary(
+        self, workflow_ids="", conditions: dict = None, with_data=False, page_size=10, kinds=None
+    ):
+        """
+        并发获取各列表总数(及第一页数据), 参数及返回值同OaWorkFlow.get_inbox_summary
+        """
+        kinds, search_conditions, key = OaWorkFlow._inbox_summary_params(
+            self, workflow_ids, conditions, with_data, page_size, kinds
+        )
+        res = await sync_to_async(cache.get)(key) if key else None
+        if res is not None:
+            return res
+
+        calls = {}
+        for kind in kinds:
+            count_api_path, data_api_path = self.INBOX_LIST_APIS[kind]
+            calls[(kind, "count")] = self._post_oa(count_api_path, post_data=search_conditions, need_json=False)
+            if with_data:
+                post_data = {"pageNo": "1", "pageSize": str(page_size), **search_conditions}
+                calls[(kind, "data")] = self._post_oa(data_api_path, post_data=post_data)
+        responses = await asyncio.gather(*calls.values())
+        res = OaWorkFlow._inbox_summary_result(kinds, dict(zip(calls, responses)))
+        if key:
+            await sync_to_async(cache.set)(key, res, api_settings.INBOX_SUMMARY_CACHE_TIMEOUT)
+        return res
+
+    async def get_create_list(self, type_ids=None, workflow_ids=None):
+        """
+        可创建流程, 按流程类型分组
+        """
+        return (await self.get_create_index(type_ids, workflow_ids)).grouped()
+
+    async def get_create_index(self, type_ids=None, workflow_ids=None, refresh=False) -> CreateWorkflowIndex:
+        """
+        可创建流程索引, 与OaWorkFlow.get_create_index一致
+        """
+        conditions = create_list_conditions(type_ids, workflow_ids)
+        key = index_cache_key(getattr(self, "oa_user_id", None), conditions)
+        index = None if refresh else get_index_cache().get(key)
+        if index is None:
+            index = CreateWorkflowIndex(await self._fetch_create_list(conditions))
+            get_index_cache().set(key, index)
+        return index
+
+    async def can_create_workflow(self, workflow_id) -> bool:
+        return (await self.get_create_index()).can_create(workflow_id)
+
+    async def _fetch_create_list(self, conditions: dict) -> list:
+        api_path = "/api/workflow/paService/getCreateWorkflowList"
+        post_data = {"conditions": json_codec.dumps(conditions)}
+        return await self._post_oa(api_path, post_data=post_data)
+
+    async def submit(self, post_data: dict, work_flow_id: str = None):
+        """
+        创建流程
+        :param post_data:
+        :param work_flow_id: Oa中的流程ID
+        """
+        api_path = "/api/workflow/paService/doCreateRequest"
+        res: dict = await self._post_oa(api_path, post_data=post_data)
+        return res["data"]["requestid"]
+
+    async def submit_new(
+        self, work_flow_id, main_data: list, detail_data: list = None, title="", remark="", request_level=""
+    ):
+        """
+        创建流程
+        :param work_flow_id: Oa中的流程ID
+        :param main_data: 提交流程的主表数据
+        :param detail_data: 提交流程的子表数据
+        :param title: 提交流程的标题
+        :param remark: 提交流程的备注（审批意见）
+        :param request_level: 流程紧急度（如果有）
+        """
+        if not work_flow_id:
+            raise APIException("需要提交流程的流程ID")
+        if not main_data:
+            raise APIException("需要提交流程的主表数据")
+        post_data = {
+            "mainData": json_codec.dumps(main_data),
+            "detailData": json_codec.dumps(detail_data),
+            "otherParams": {},
+            "remark": remark,
+            "workflowId": str(work_flow_id),
+        }
+        if title:
+            post_data["requestName"] = title
+        if request_level:
+            post_data["requestLevel"] = request_level
+
+        api_path = "/api/workflow/paService/doCreateRequest"
+        res: dict = await self._post_oa(api_path, post_data=post_data)
+        return res["data"]["requestid"]
+
+    @invalidates_response
+    async def review(self, request_id: str, remark="", extras: dict = None):
+        """
+        提交/审核
+        :param request_id OA流程请求ID
+        :param remark
+        :param extras
+        """
+        api_path = "/api/workflow/paService/submitRequest"
+        post_data = {"otherParams": {}, "remark": remark, "requestId": request_id}
+        if extras:
+            post_data.update(extras)
+        return await self._post_oa(api_path, post_data=post_data)
+
+    @invalidates_response
+    async def reject(self, request_id: str, node_id: str = "", remark=""):
+        """
+        退回流程
+        """
+        api_path = "/api/workflow/paService/rejectRequest"
+        other_params = "{}"
+        if node_id:
+            other_params = json_codec.dumps({"RejectToType": 0, "RejectToNodeid": int(node_id)})
+
+        post_data = {"otherParams": other_params, "remark": remark, "requestId": request_id}
+        return await self._post_oa(api_path, post_data=post_data)
+
+    async def get_chart_url(self, request_id: str, staff_code):
+        """
+        OA流程明细页 流程图 数据
+        :param request_id: OA流程实例ID
+        :param staff_code: 用户工号或者为oa的登入名, A0009527
+        :return:
+        """
+        api_path = "/api/workflow/paService/getRequestFlowChart"
+        params = {"requestid": request_id}
+        resp, sso_token = await asyncio.gather(
+            self._get_oa(api_path, params=params),
+            self.get_sso_token(staff_code),
+        )
+        resp["data"]["chartUrl"] = resp["data"]["chartUrl"] + f"&ssoToken={sso_token}"
+        return resp
+
+    @cached_response
+    async def get_status(self, request_id: str):
+        """
+        获取流程状态
+        :param request_id:
+        :return:
+        """
+        api_path = "/api/workflow/paService/getRequestStatus"
+        return await self._get_oa(api_path, params={"requestId": request_id})
+
+    @cached_response
+    async def get_operator_info(self, request_id):
+        """
+        OA流程明细页 流程状态 数据
+        :param request_id:
+        :return:
+        """
+        api_path = "/api/workflow/paService/getRequestOperatorInfo"
+        return await self._get_oa(api_path, params={"requestId": request_id})
+
+    @cached_response
+    async def get_resources(self, request_id):
+        """
+        OA流程明细页 相关资源 数据
+        相关流程/相关文档/相关资源
+        :param request_id:
+        :return:
+        """
+        api_path = "/api/workflow/paService/getRequestResources"
+        result = await self._get_oa(api_path, params={"requestId": request_id})
+        return OaWorkFlow._with_resource_type_name(result)
+
+    @cached_response
+    async def get_remark(self, request_id, page=1, page_size=10):
+        """
+        流程意见
+        :return:
+        """
+        api_path = "/api/workflow/paService/getRequestLog"
+        post_data = {
+            "requestId": request_id,
+            "otherParams": json_codec.dumps({"pageSize": page_size, "pageNumber": page}),
+        }
+        return await self._get_oa(api_path, params=post_data)
+
+    @cached_response
+    async def get_info(self, request_id):
+        """
+        流程信息
+        :param request_id:
+        :return:
+        """
+        api_path = "/api/workflow/paService/getWorkflowRequest"
+        return await self._get_oa(api_path, params={"requestId": request_id})
+
+    @invalidates_response
+    async def transmit(self, request_id, trans_type, user_id: str, remark: str = ""):
+        """
+        转发、意见征询、转办(对外)
+        :param request_id:
+        :param trans_type:
+        :param user_id:
+        :param remark:
+        :return:
+        """
+        api_path = "/api/workflow/paService/forwardRequest"
+        if trans_type == 3:
+            if len(user_id.split(",")) > 1:
+                raise APIException(detail="转办只能转给一个用户")
+        post_data = {
+            "forwardFlag": trans_type,  # 1:转发  2:意见征询 3:转办
+            "forwardResourceIds": user_id,
+            "otherParams": {},
+            "remark": remark,
+            "requestId": request_id,
+        }
+        return await self._post_oa(api_path, post_data=post_data)
+
+    @invalidates_response
+    async def recover(self, request_id):
+        """
+        强制收回
+        :param request_id:
+        :return:
+        """
+        api_path = "/api/workflow/paService/doForceDrawBack"
+        return await self._post_oa(api_path, post_data={"requestId": request_id})
+
+    async def review_many(self, request_ids: list, remark="", extras: dict = None, max_concurrency: int = None):
+        return await self._run_many(
+            lambda i: self.review(i, remark=remark, extras=extras), request_ids, max_concurrency
+        )
+
+    async def reject_many(self, request_ids: list, node_id: str = "", remark="", max_concurrency: int = None):
+        return await self._run_many(
+            lambda i: self.reject(i, node_id=node_id, remark=remark), request_ids, max_concurrency
+        )
+
+    async def transmit_many(
+        self, request_ids: list, trans_type, user_id: str, remark: str = "", max_concurrency: int = None
+    ):
+        return await self._run_many(
+            lambda i: self.transmit(i, trans_type, user_id, remark=remark), request_ids, max_concurrency
+        )
+
+    async def _run_many(self, action, request_ids: list, max_concurrency: int = None) -> list:
+        request_ids = OaWorkFlow._check_bulk_request_ids(self, request_ids)
+        semaphore = asyncio.Semaphore(max_concurrency or api_settings.BULK_ACTION_MAX_CONCURRENCY)
+
+        async def run(request_id):
+            async with semaphore:
+                try:
+                    return OaWorkFlow.bulk_result(request_id, await action(request_id))
+                except Exception as e:
+                    return OaWorkFlow.bulk_result(request_id, error=e)
+
+        await self._ensure_token()
+        return list(await asyncio.gather(*(run(i) for i in request_ids)))
@@ -0,0 +1,199 @@
+"""
+进程内缓存
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test.signals import setting_changed
+
+from .settings import SETTING_PREFIX, api_settings
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """
+    线程安全的进程内LRU缓存, 支持过期时间
+    :param maxsize: 最大缓存条数, 超出时淘汰最久未使用的条目
+    :param ttl: 默认过期时间(秒), None为不过期
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float = _MISSING):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+
+class LocalUserInfoCache:
+    """
+    OA账号信息进程内缓存
+    注意: 仅对当前进程生效, 其他进程(如celery worker)触发的失效无法传递, 依赖过期时间兜底
+    """
+
+    def __init__(self, maxsize: int, timeout: float = None):
+        self._cache = LocalTTLCache(maxsize=maxsize, ttl=timeout)
+
+    def get(self, oa_user_id: str):
+        return self._cache.get(oa_user_id)
+
+    def set(self, oa_user_id: str, user_info: dict):
+        self._cache.set(oa_user_id, user_info)
+
+    def invalidate(self, oa_user_id: str = None):
+        if oa_user_id is None:
+            self._cache.clear()
+        else:
+            self._cache.delete(oa_user_id)
+
+
+class DjangoUserInfoCache:
+    """
+    OA账号信息缓存, 使用django cache, 多进程共享
+    全量失效通过递增版本号实现, 不依赖缓存后端的批量删除
+    """
+
+    CACHE_KEY_PREFIX = "oa-api-userinfo"
+    CACHE_VERSION_KEY = "oa-api-userinfo-version"
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout
+
+    @property
+    def _cache(self):
+        from django.core.cache import cache
+
+        return cache
+
+    def _key(self, oa_user_id: str):
+        version = self._cache.get_or_set(self.CACHE_VERSION_KEY, 1, timeout=None)
+        return f"{self.CACHE_KEY_PREFIX}:{version}:{oa_user_id}"
+
+    def get(self, oa_user_id: str):
+        return self._cache.get(self._key(oa_user_id))
+
+    def set(self, oa_user_id: str, user_info: dict):
+        self._cache.set(self._key(oa_user_id), user_info, timeout=self.timeout)
+
+    def invalidate(self, oa_user_id: str = None):
+        if oa_user_id is not None:
+            self._cache.delete(self._key(oa_user_id))
+            return
+        try:
+            self._cache.incr(self.CACHE_VERSION_KEY)
+        except ValueError:
+            self._cache.set(self.CACHE_VERSION_KEY, 1, timeout=None)
+
+
+USERINFO_CACHE_BACKENDS = {
+    "local": lambda: LocalUserInfoCache(api_settings.USERINFO_CACHE_SIZE, api_settings.USERINFO_CACHE_TIMEOUT),
+    "django": lambda: DjangoUserInfoCache(api_settings.USERINFO_CACHE_TIMEOUT),
+}
+
+_userinfo_cache = _MISSING
+_userinfo_cache_lock = threading.Lock()
+
+
+def get_userinfo_cache():
+    """
+    当前配置的OA账号信息缓存, 未启用时返回None
+    """
+    global _userinfo_cache
+    if _userinfo_cache is _MISSING:
+        with _userinfo_cache_lock:
+            if _userinfo_cache is _MISSING:
+                backend = api_settings.USERINFO_CACHE_BACKEND
+                if not backend:
+                    _userinfo_cache = None
+                elif backend in USERINFO_CACHE_BACKENDS:
+                    _userinfo_cache = USERINFO_CACHE_BACKENDS[backend]()
+                else:
+                    raise ImproperlyConfigured(
+                        f"{SETTING_PREFIX}.USERINFO_CACHE_BACKEND must be one of {list(USERINFO_CACHE_BACKENDS)}"
+                    )
+    return _userinfo_cache
+
+
+_user_context_cache = _MISSING
+
+
+def get_user_context_cache():
+    """
+    OA用户上下文(core.OaUserContext)进程内缓存, 注册用户时无需再读取账号信息缓存, 未启用时返回None
+    """
+    global _user_context_cache
+    if _user_context_cache is _MISSING:
+        with _userinfo_cache_lock:
+            if _user_context_cache is _MISSING:
+                timeout = api_settings.USER_CONTEXT_CACHE_TIMEOUT
+                _user_context_cache = (
+                    LocalTTLCache(maxsize=api_settings.USER_CONTEXT_CACHE_SIZE, ttl=timeout) if timeout else None
+                )
+    return _user_context_cache
+
+
+def invalidate_userinfo(oa_user_id=None):
+    """
+    使OA账号信息缓存失效
+    :param oa_user_id: OA用户ID, 为None时全部失效
+    """
+    userinfo_cache = get_userinfo_cache()
+    if userinfo_cache is not None:
+        userinfo_cache.invalidate(None if oa_user_id is None else str(oa_user_id))
+    user_context_cache = get_user_context_cache()
+    if user_context_cache is not None:
+        if oa_user_id is None:
+            user_context_cache.clear()
+        else:
+            user_context_cache.delete(str(oa_user_id))
+
+
+def reset_userinfo_cache(*args, **kwargs):
+    global _userinfo_cache, _user_context_cache
+    if kwargs.get("setting") == SETTING_PREFIX:
+        with _userinfo_cache_lock:
+            _userinfo_cache = _MISSING
+            _user_context_cache = _MISSING
+
+
+setting_changed.connect(reset_userinfo_cache)
@@ -0,0 +1,62 @@
+"""
+OA客户端共享状态
+
+- OaClientCore: 进程内共享的OA地址/APP_ID/公钥/加密后的secret, 首次使用时创建, 配置变更时重建
+- OaUserContext: 单个OA用户的加密userid及账号信息, 按OA用户缓存在进程内(caches.get_user_context_cache)
+每个请求构造OaWorkFlow时只需复制OaClientCore的属性并绑定OaUserContext;
+HTTP连接池(http_pool)、Token(tokens)、加密器(crypto)本身即为进程内共享
+"""
+
+import threading
+from collections import namedtuple
+
+from django.test.signals import setting_changed
+
+from .crypto import format_public_key, get_encrypted_secret
+from .settings import SETTING_PREFIX, api_settings
+
+OaUserContext = namedtuple("OaUserContext", ["oa_user_id", "encrypt_userid", "user"])
+
+
+class OaClientCore:
+    """
+    不可变, 多线程共享
+    """
+
+    __slots__ = ("oa_host", "app_id", "app_spk", "app_encrypted_secret")
+
+    def __init__(self, oa_host: str, app_id: str, app_spk: str, raw_secret: str):
+        self.oa_host = oa_host
+        self.app_id = app_id
+        self.app_spk = format_public_key(app_spk)
+        self.app_encrypted_secret = get_encrypted_secret(self.app_spk, raw_secret)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(api_settings.OA_HOST, api_settings.APP_ID, api_settings.APP_SPK, api_settings.APP_RAW_SECRET)
+
+
+_lock = threading.Lock()
+_core = None
+
+
+def get_client_core() -> OaClientCore:
+    global _core
+    core = _core
+    if core is None:
+        with _lock:
+            if _core is None:
+                _core = OaClientCore.from_settings()
+            core = _core
+    return core
+
+
+def reset_client_core(*args, **kwargs):
+    global _core
+    setting = kwargs.get("setting")
+    if setting is None or setting == SETTING_PREFIX:
+        with _lock:
+            _core = None
+
+
+setting_changed.connect(reset_client_core)
@@ -0,0 +1,122 @@
+"""
+可创建流程索引
+
+OA可创建流程列表变化很少, 按OA用户及过滤条件缓存在进程内, 并按流程类型/流程ID/名称前缀建立索引,
+判断用户能否创建某流程等查询无需请求OA
+"""
+
+import bisect
+from itertools import groupby
+
+from django.test.signals import setting_changed
+
+from .caches import LocalTTLCache
+from .settings import SETTING_PREFIX, api_settings
+
+
+class CreateWorkflowIndex:
+    """
+    :param workflows: OA接口返回的可创建流程列表, 示例数据 api_example_data.CREATE_LIST_DEMO
+    """
+
+    def __init__(self, workflows: list):
+        workflows = sorted(workflows, key=lambda x: x["workflowTypeName"])
+        self.groups = [
+            {"workflowTypeName": type_name, "workflows": list(g)}
+            for type_name, g in groupby(workflows, key=lambda x: x["workflowTypeName"])
+        ]
+        self.by_workflow_id = {str(i["workflowId"]): i for i in workflows}
+        self.by_type_id = {}
+        for i in workflows:
+            self.by_type_id.setdefault(str(i["workflowTypeId"]), []).append(i)
+        by_name = sorted(workflows, key=lambda x: x["workflowName"])
+        self._names = [i["workflowName"] for i in by_name]
+        self._by_name = by_name
+
+    def __len__(self):
+        return len(self.by_workflow_id)
+
+    def __contains__(self, workflow_id):
+        return str(workflow_id) in self.by_workflow_id
+
+    def can_create(self, workflow_id) -> bool:
+        return str(workflow_id) in self.by_workflow_id
+
+    def get(self, workflow_id):
+        return self.by_workflow_id.get(str(workflow_id))
+
+    def get_by_type(self, type_id) -> list:
+        return self.by_type_id.get(str(type_id), [])
+
+    def search(self, name_prefix: str) -> list:
+        """
+        按流程名称前缀查找
+        """
+        start = bisect.bisect_left(self._names, name_prefix)
+        res = []
+        for i in range(start, len(self._names)):
+            if not self._names[i].startswith(name_prefix):
+                break
+            res.append(self._by_name[i])
+        return res
+
+    def grouped(self) -> list:
+        """
+        按流程类型分组的可创建流程, 与get_create_list返回值一致
+        """
+        return [{"workflowTypeName": i["workflowTypeName"], "workflows": list(i["workflows"])} for i in self.groups]
+
+
+def create_list_conditions(type_ids=None, workflow_ids=None) -> dict:
+    """
+    可创建流程查询条件
+    :param type_ids: 流程类型(目录)ID, 默认使用配置CREATE_LIST_TYPE_IDS
+    :param workflow_ids: 流程ID, 默认使用配置CREATE_LIST_WORKFLOW_IDS
+    :return:
+    """
+
+    def join(ids):
+        if isinstance(ids, (list, tuple, set)):
+            return ",".join(str(i) for i in ids)
+        return str(ids or "")
+
+    conditions = {}
+    type_ids = join(api_settings.CREATE_LIST_TYPE_IDS if type_ids is None else type_ids)
+    workflow_ids = join(api_settings.CREATE_LIST_WORKFLOW_IDS if workflow_ids is None else workflow_ids)
+    if type_ids:
+        conditions["wfTypeIds"] = type_ids
+    if workflow_ids:
+        conditions["wfIds"] = workflow_ids
+    return conditions
+
+
+_index_cache = None
+
+
+def get_index_cache() -> LocalTTLCache:
+    global _index_cache
+    if _index_cache is None:
+        _index_cache = LocalTTLCache(
+            maxsize=api_settings.CREATE_LIST_CACHE_SIZE, ttl=api_settings.CREATE_LIST_CACHE_TIMEOUT
+        )
+    return _index_cache
+
+
+def index_cache_key(oa_user_id, conditions: dict):
+    return oa_user_id, tuple(sorted(conditions.items()))
+
+
+def invalidate_create_index():
+    """
+    使当前进程所有用户的可创建流程索引失效
+    """
+    get_index_cache().clear()
+
+
+def reset_index_cache(*args, **kwargs):
+    global _index_cache
+    if kwargs.get("setting") == SETTING_PREFIX:
+        _index_cache = None
+
+
+setting_changed.connect(reset_index_cache)
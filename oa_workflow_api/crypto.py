@@ -0,0 +1,107 @@
+"""
+OA SPK加密
+
+解析公钥、加密APP_RAW_SECRET和userid的结果在进程内缓存, 稳态下请求无需再做RSA运算
+"""
+import base64
+import functools
+import threading
+
+from Crypto.Cipher import PKCS1_v1_5
+from Crypto.PublicKey import RSA
+from django.test.signals import setting_changed
+
+from .caches import LocalTTLCache
+from .settings import SETTING_PREFIX, api_settings
+
+_lock = threading.Lock()
+_encrypted_userid_cache = None
+
+
+PUBLIC_KEY_PREFIX = "-----BEGIN PUBLIC KEY-----"
+PUBLIC_KEY_SUFFIX = "-----END PUBLIC KEY-----"
+
+
+def format_public_key(pub_key: str) -> str:
+    """
+    OA提供的公钥转为PEM格式, 已是PEM格式时原样返回
+    :param pub_key:
+    :return:
+    """
+    if pub_key.startswith(PUBLIC_KEY_PREFIX):
+        return pub_key
+    # 分割key，每64位长度换一行
+    lines = [pub_key[offset : offset + 64] for offset in range(0, len(pub_key), 64)]
+    return "\n".join([PUBLIC_KEY_PREFIX, *lines, PUBLIC_KEY_SUFFIX])
+
+
+@functools.lru_cache(maxsize=8)
+def get_spk_cipher(app_spk: str):
+    """
+    解析后的OA SPK加密器
+    :param app_spk: PEM格式公钥
+    :return:
+    """
+    publickey = RSA.import_key(app_spk.encode())
+    return PKCS1_v1_5.new(publickey)
+
+
+def encrypt_with_spk(app_spk: str, text: str) -> str:
+    """
+    使用OA SPK加密文本
+    :param app_spk: PEM格式公钥
+    :param text:
+    :return:
+    """
+    encrypt_text = get_spk_cipher(app_spk).encrypt(text.encode())
+    return base64.b64encode(encrypt_text).decode()
+
+
+@functools.lru_cache(maxsize=8)
+def get_encrypted_secret(app_spk: str, raw_secret: str) -> str:
+    """
+    加密后的APP_RAW_SECRET
+    """
+    return encrypt_with_spk(app_spk, raw_secret)
+
+
+def _get_encrypted_userid_cache() -> LocalTTLCache:
+    global _encrypted_userid_cache
+    if _encrypted_userid_cache is None:
+        with _lock:
+            if _encrypted_userid_cache is None:
+                _encrypted_userid_cache = LocalTTLCache(
+                    maxsize=api_settings.ENCRYPTED_USERID_CACHE_SIZE,
+                    ttl=api_settings.ENCRYPTED_USERID_CACHE_TIMEOUT,
+                )
+    return _encrypted_userid_cache
+
+
+def get_encrypted_userid(app_spk: str, oa_user_id: str) -> str:
+    """
+    加密后的OA用户ID
+    :param app_spk: PEM格式公钥
+    :param oa_user_id:
+    :return:
+    """
+    cache = _get_encrypted_userid_cache()
+    key = (app_spk, oa_user_id)
+    encrypt_userid = cache.get(key)
+    if encrypt_userid is None:
+        encrypt_userid = encrypt_with_spk(app_spk, oa_user_id)
+        cache.set(key, encrypt_userid)
+    return encrypt_userid
+
+
+def clear_crypto_cache(*args, **kwargs):
+    global _encrypted_userid_cache
+    setting = kwargs.get("setting")
+    if setting is not None and setting != SETTING_PREFIX:
+        return
+    get_spk_cipher.cache_clear()
+    get_encrypted_secret.cache_clear()
+    with _lock:
+        _encrypted_userid_cache = None
+
+
+setting_changed.connect(clear_crypto_cache)
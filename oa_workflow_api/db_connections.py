@@ -1,6 +1,17 @@
+"""
+OA 数据库连接
+
+进程内共享一个oracledb连接池(首次使用时创建), 避免每次查询都重新登录Oracle
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
 import oracledb
+from django.test.signals import setting_changed
 
-from .settings import api_settings
+from .settings import SETTING_PREFIX, api_settings
 
 # from django.conf import settings
 
@@ -10,15 +21,121 @@ try:
 except Exception as e:  # noqa
     pass
 
+_pool_lock = threading.Lock()
+_pool = None
 
-def get_oa_oracle_connection():
-    """
-    OA 数据库连接
-    """
-    return oracledb.connect(
+
+def _connect_params() -> dict:
+    return dict(
         user=api_settings.OA_DB_USER,
         password=api_settings.OA_DB_PASSWORD,
         host=api_settings.OA_DB_HOST,
         port=api_settings.OA_DB_PORT,
         service_name=api_settings.OA_DB_SERVER_NAME,
     )
+
+
+def get_oa_oracle_connection():
+    """
+    OA 数据库连接
+    新建独立连接, 使用后需调用方关闭; 查询请优先使用oa_oracle_connection()
+    """
+    return oracledb.connect(**_connect_params())
+
+
+def get_oa_oracle_pool() -> oracledb.ConnectionPool:
+    """
+    OA 数据库连接池, 进程内共享
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = oracledb.create_pool(
+                    min=api_settings.OA_DB_POOL_MIN,
+                    max=api_settings.OA_DB_POOL_MAX,
+                    increment=api_settings.OA_DB_POOL_INCREMENT,
+                    ping_interval=api_settings.OA_DB_POOL_PING_INTERVAL,
+                    timeout=api_settings.OA_DB_POOL_IDLE_TIMEOUT,
+                    wait_timeout=api_settings.OA_DB_POOL_WAIT_TIMEOUT,
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    **_connect_params(),
+                )
+    return _pool
+
+
+@contextmanager
+def oa_oracle_connection():
+    """
+    从连接池获取OA数据库连接, 退出时归还
+    OA_DB_POOL_ENABLED为False时新建连接, 退出时关闭
+
+    with oa_oracle_connection() as connection, connection.cursor() as cursor:
+        cursor.execute(sql)
+    """
+    if not api_settings.OA_DB_POOL_ENABLED:
+        connection = get_oa_oracle_connection()
+        try:
+            yield connection
+        finally:
+            connection.close()
+        return
+
+    pool = get_oa_oracle_pool()
+    connection = pool.acquire()
+    try:
+        yield connection
+    finally:
+        pool.release(connection)
+
+
+def close_oa_oracle_pool():
+    """
+    关闭连接池, 下次使用时按最新配置重新创建
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        try:
+            pool.close(force=True)
+        except oracledb.Error:
+            pass
+
+
+def get_db_pool_stats() -> dict:
+    """
+    连接池指标, 用于评估OA_DB_POOL_MAX等配置
+    :return:
+    """
+    pool = _pool
+    stats = {
+        "enabled": api_settings.OA_DB_POOL_ENABLED,
+        "created": pool is not None,
+        "min": api_settings.OA_DB_POOL_MIN,
+        "max": api_settings.OA_DB_POOL_MAX,
+        "opened": 0,
+        "busy": 0,
+    }
+    if pool is not None:
+        stats.update(opened=pool.opened, busy=pool.busy)
+    return stats
+
+
+def reset_oa_oracle_pool(*args, **kwargs):
+    setting = kwargs.get("setting")
+    if setting is None or setting == SETTING_PREFIX:
+        close_oa_oracle_pool()
+
+
+def _after_fork_in_child():
+    # 子进程不能复用父进程的数据库会话, 直接丢弃而不是close
+    global _pool_lock, _pool
+    _pool_lock = threading.Lock()
+    _pool = None
+
+
+setting_changed.connect(reset_oa_oracle_pool)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,33 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class OaTokenInvalid(Exception):
+    """
+    OA Token失效, 需要重新获取Token后重试
+    """
+
+
+class OaResponseError(APIException):
+    """
+    OA接口返回的业务错误(code不为SUCCESS)
+    :param code: OA返回的code, 如NO_PERMISSION
+    :param err_msg: OA返回的errMsg
+    :param response: OA返回的完整数据
+    """
+
+    def __init__(self, code, err_msg=None, response=None):
+        super().__init__(detail=f"OA提示: {code}, {err_msg if err_msg is not None else ''}")
+        self.oa_code = code
+        self.err_msg = err_msg
+        self.response = response
+
+
+class OaCircuitOpenError(APIException):
+    """
+    OA服务连续失败, 熔断期间直接失败不再请求OA
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "OA服务暂不可用，请稍后重试"
+    default_code = "oa_unavailable"
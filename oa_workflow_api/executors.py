@@ -0,0 +1,57 @@
+"""
+OA接口并发请求线程池
+"""
+
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .settings import api_settings
+
+_lock = threading.Lock()
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    进程内共享的线程池, 大小由CONCURRENT_MAX_WORKERS配置
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=api_settings.CONCURRENT_MAX_WORKERS,
+                    thread_name_prefix="oa-workflow-api",
+                )
+    return _executor
+
+
+def map_bounded(func, items, max_concurrency: int) -> list:
+    """
+    在共享线程池中并发执行func, 同一时刻最多max_concurrency个任务
+    :return: 与items顺序一致的结果, func抛出的异常会在此处抛出
+    """
+    executor = get_executor()
+    items = list(items)
+    results = [None] * len(items)
+    pending = {}
+    position = 0
+    while position < len(items) or pending:
+        while position < len(items) and len(pending) < max_concurrency:
+            pending[executor.submit(func, items[position])] = position
+            position += 1
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            results[pending.pop(future)] = future.result()
+    return results
+
+
+def _after_fork_in_child():
+    global _lock, _executor
+    _lock = threading.Lock()
+    _executor = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
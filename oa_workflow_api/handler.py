@@ -1,15 +1,20 @@
+from asgiref.sync import sync_to_async
 from django.utils.functional import SimpleLazyObject
 
 from .utils import OaWorkFlow
 
 
-def get_handler(request):
-    if not hasattr(request, "_oa_wf_api"):
-        request._oa_wf_api = OaWorkFlow()
+def _get_oa_user_id(request):
     try:
-        oa_user_id = request.user.oa_user_id
+        return request.user.oa_user_id
     except AttributeError:
         raise AttributeError("request.user对象需提供'oa_user_id'属性, 该值为当前登入用户对应oa的user_id")
+
+
+def get_handler(request):
+    if not hasattr(request, "_oa_wf_api"):
+        request._oa_wf_api = OaWorkFlow()
+    oa_user_id = _get_oa_user_id(request)
     request._oa_wf_api.register_user(oa_user_id)
     return request._oa_wf_api
 
@@ -17,3 +22,37 @@ def get_handler(request):
 def handle_request(request):
     request.oa_wf_api = SimpleLazyObject(lambda: get_handler(request))
     return request
+
+
+async def aget_handler(request):
+    from .async_utils import AsyncOaWorkFlow
+
+    if not hasattr(request, "_oa_wf_api"):
+        request._oa_wf_api = AsyncOaWorkFlow()
+    # request.user为惰性对象, 首次访问会查询数据库
+    oa_user_id = await sync_to_async(_get_oa_user_id)(request)
+    await request._oa_wf_api.register_user(oa_user_id)
+    return request._oa_wf_api
+
+
+class AsyncOaWFHandler:
+    """
+    异步视图中的request.oa_wf_api, 使用时需await: workflow = await request.oa_wf_api
+    """
+
+    def __init__(self, request):
+        self._request = request
+        self._workflow = None
+
+    async def _get_workflow(self):
+        if self._workflow is None:
+            self._workflow = await aget_handler(self._request)
+        return self._workflow
+
+    def __await__(self):
+        return self._get_workflow().__await__()
+
+
+def ahandle_request(request):
+    request.oa_wf_api = AsyncOaWFHandler(request)
+    return request
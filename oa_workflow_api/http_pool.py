@@ -0,0 +1,290 @@
+"""
+OA接口HTTP连接池
+
+进程内共享一个requests.Session, 复用到OA_HOST的TCP/TLS长连接, 避免每次调用OA接口都重新握手
+Session为所有用户共用, 不保存OA返回的Cookie(如ecology_JSessionid), 与每次直接调用requests.get/post一致
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import requests as system_requests
+from django.test.signals import setting_changed
+from requests.adapters import HTTPAdapter
+from requests.models import RequestEncodingMixin
+
+try:
+    import httpx
+except ModuleNotFoundError:
+    httpx = None
+
+from .settings import SETTING_PREFIX, api_settings
+
+
+def get_timeout(name: str = None) -> tuple:
+    """
+    OA接口请求超时
+    :param name: OaApi方法名, 配置了HTTP_TIMEOUT_OVERRIDES时使用对应的超时
+    :return: (连接超时, 读取超时)
+    """
+    timeout = api_settings.HTTP_TIMEOUT_OVERRIDES.get(name) if name else None
+    if timeout is None:
+        return api_settings.HTTP_CONNECT_TIMEOUT, api_settings.HTTP_READ_TIMEOUT
+    if isinstance(timeout, (list, tuple)):
+        return tuple(timeout)
+    return api_settings.HTTP_CONNECT_TIMEOUT, timeout
+
+
+def _no_cookie_jar() -> CookieJar:
+    """
+    不保存也不发送任何Cookie的CookieJar
+    """
+    return CookieJar(DefaultCookiePolicy(allowed_domains=[]))
+
+
+def _httpx_timeout(timeout: tuple):
+    connect_timeout, read_timeout = timeout
+    return httpx.Timeout(read_timeout, connect=connect_timeout)
+
+
+class OaSessionPool:
+    """
+    线程安全的OA接口连接池
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._session = None
+        self._adapter = None
+        self._pid = os.getpid()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.total_requests = 0
+        self.failed_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _create_session(self):
+        requests = api_settings.REQUESTS_LIBRARY
+        # 自定义的requests包(如封装了请求日志)提供Session时使用其Session
+        session: system_requests.Session = getattr(requests, "Session", system_requests.Session)()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(
+            pool_connections=api_settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=api_settings.HTTP_POOL_MAXSIZE,
+            pool_block=api_settings.HTTP_POOL_BLOCK,
+            max_retries=0,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not api_settings.HTTP_KEEP_ALIVE:
+            session.headers["Connection"] = "close"
+        return session, adapter
+
+    @property
+    def session(self) -> system_requests.Session:
+        if self._pid != os.getpid():
+            # 兜底: 未触发register_at_fork的子进程同样不能复用父进程的连接
+            self._after_fork_in_child()
+        session = self._session
+        if session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session, self._adapter = self._create_session()
+                session = self._session
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> system_requests.Response:
+        """
+        发起请求
+        :param method: GET/POST
+        :param url:
+        :param kwargs: 透传给requests的参数
+        :return:
+        """
+        kwargs.setdefault("timeout", get_timeout())
+        requests = api_settings.REQUESTS_LIBRARY
+        if not api_settings.HTTP_POOL_ENABLED or not hasattr(requests, "Session"):
+            # 自定义的requests包只封装了get/post时直接调用, 不使用连接池
+            return getattr(requests, method.lower())(url, **kwargs)
+
+        session = self.session
+        with self._stats_lock:
+            self.total_requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return session.request(method, url, **kwargs)
+        except Exception:
+            with self._stats_lock:
+                self.failed_requests += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+
+    def close(self):
+        """
+        关闭连接池, 下次请求时重新创建
+        """
+        with self._lock:
+            session, self._session, self._adapter = self._session, None, None
+        if session is not None:
+            session.close()
+
+    def _after_fork_in_child(self):
+        # 子进程不能复用父进程的socket, 直接丢弃而不是close
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._session = None
+        self._adapter = None
+        self._pid = os.getpid()
+        self._reset_counters()
+
+    def stats(self) -> dict:
+        """
+        连接池指标, 用于评估HTTP_POOL_MAXSIZE等配置
+        :return:
+        """
+        hosts = []
+        adapter = self._adapter
+        if adapter is not None:
+            pool_manager = adapter.poolmanager
+            for key in pool_manager.pools.keys():
+                pool = pool_manager.pools.get(key)
+                if pool is None:
+                    continue
+                idle = 0
+                if pool.pool is not None:
+                    idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+                hosts.append(
+                    {
+                        "host": f"{key.key_scheme}://{key.key_host}:{key.key_port}",
+                        "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+                        "num_connections": pool.num_connections,
+                        "num_requests": pool.num_requests,
+                        "idle_connections": idle,
+                    }
+                )
+        with self._stats_lock:
+            return {
+                "enabled": api_settings.HTTP_POOL_ENABLED,
+                "pool_connections": api_settings.HTTP_POOL_CONNECTIONS,
+                "pool_maxsize": api_settings.HTTP_POOL_MAXSIZE,
+                "total_requests": self.total_requests,
+                "failed_requests": self.failed_requests,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "hosts": hosts,
+            }
+
+
+class AsyncOaSessionPool:
+    """
+    异步OA接口连接池, 基于httpx.AsyncClient
+    AsyncClient不能跨事件循环使用, 每个事件循环各自持有一个client
+    """
+
+    def __init__(self):
+        self._clients = weakref.WeakKeyDictionary()
+        self.total_requests = 0
+        self.failed_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _create_client(self):
+        if httpx is None:
+            raise ImportError("异步OA接口需要安装httpx: pip install httpx")
+        limits = httpx.Limits(
+            max_connections=api_settings.HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=api_settings.HTTP_POOL_MAXSIZE if api_settings.HTTP_KEEP_ALIVE else 0,
+        )
+        return httpx.AsyncClient(limits=limits, timeout=_httpx_timeout(get_timeout()), cookies=_no_cookie_jar())
+
+    @property
+    def client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = self._create_client()
+        return client
+
+    async def request(self, method: str, url: str, params=None, data=None, files=None, **kwargs):
+        """
+        发起请求, 参数与OaSessionPool.request一致
+        表单与查询参数按requests的规则编码, 保证与同步接口发出的请求一致
+        """
+        if isinstance(kwargs.get("timeout"), tuple):
+            kwargs["timeout"] = _httpx_timeout(kwargs["timeout"])
+        if params is not None:
+            kwargs["params"] = RequestEncodingMixin._encode_params(params)
+        if files:
+            kwargs["files"] = files
+            kwargs["data"] = {k: str(v) for k, v in (data or {}).items()}
+        elif data is not None:
+            kwargs["content"] = RequestEncodingMixin._encode_params(data)
+        client = self.client
+        self.total_requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await client.request(method, url, **kwargs)
+        except Exception:
+            self.failed_requests += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def reset(self):
+        """
+        丢弃已创建的client, 下次请求时按最新配置重新创建
+        """
+        self._clients = weakref.WeakKeyDictionary()
+
+    async def aclose(self):
+        """
+        关闭当前事件循环的client
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "total_requests": self.total_requests,
+            "failed_requests": self.failed_requests,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+        }
+
+
+oa_session_pool = OaSessionPool()
+async_oa_session_pool = AsyncOaSessionPool()
+
+
+def get_pool_stats() -> dict:
+    return oa_session_pool.stats()
+
+
+def get_async_pool_stats() -> dict:
+    return async_oa_session_pool.stats()
+
+
+def reset_session_pool(*args, **kwargs):
+    setting = kwargs.get("setting")
+    if setting is None or setting == SETTING_PREFIX:
+        oa_session_pool.close()
+        async_oa_session_pool.reset()
+
+
+setting_changed.connect(reset_session_pool)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=oa_session_pool._after_fork_in_child)
+    os.register_at_fork(after_in_child=async_oa_session_pool.reset)
@@ -0,0 +1,205 @@
+"""
+OA接口调用指标
+
+每次OA调用(含重试及刷新Token)结束后发送signals.oa_api_called信号, METRICS_ENABLED为True时同时记录到进程内的metrics
+未启用且信号没有接收方时不计时, 调用方只多一次判断
+
+    from oa_workflow_api.instrumentation import metrics
+    metrics.render()    # Prometheus文本格式
+    metrics.snapshot()  # dict
+"""
+
+import bisect
+import logging
+import threading
+import time
+
+from .settings import api_settings
+from .signals import oa_api_called
+
+logger = logging.getLogger(__name__)
+
+
+class OaApiCall:
+    """
+    单次OA调用的计时, 由OaApi请求方法创建
+    """
+
+    __slots__ = ("api_path", "method", "started_at", "status", "response_size", "ttfb")
+
+    def __init__(self, api_path: str, method: str):
+        self.api_path = api_path
+        self.method = method
+        self.started_at = time.perf_counter()
+        self.status = None
+        self.response_size = 0
+        self.ttfb = None
+
+    def on_response(self, resp):
+        """
+        记录一次HTTP响应, 重试时以最后一次为准
+        """
+        self.status = resp.status_code
+        self.response_size += len(resp.content)
+        try:
+            # requests为发送请求到解析完响应头的时间, httpx为收到完整响应的时间
+            self.ttfb = resp.elapsed.total_seconds()
+        except (AttributeError, RuntimeError):
+            self.ttfb = None
+
+    def finish(self, retry, error: Exception = None):
+        """
+        :param retry: 本次调用的RetryState
+        :param error: 调用最终抛出的异常
+        """
+        event = {
+            "api_path": self.api_path,
+            "method": self.method,
+            # 未收到HTTP响应(网络异常/熔断/超时)时为"error"
+            "status": str(self.status) if self.status is not None else "error",
+            "duration": time.perf_counter() - self.started_at,
+            "ttfb": self.ttfb,
+            "response_size": self.response_size,
+            "attempts": retry.attempts,
+            "token_refreshes": retry.token_refreshes,
+            "error": type(error).__name__ if error is not None else None,
+        }
+        if api_settings.METRICS_ENABLED:
+            metrics.observe(event)
+        # 接收方的异常不影响OA调用结果, 也不会使调用方再次发送信号
+        for receiver, res in oa_api_called.send_robust(sender=None, **event):
+            if isinstance(res, Exception):
+                logger.error("oa_api_called接收方%r处理失败", receiver, exc_info=res)
+
+
+def start_call(api_path: str, method: str):
+    """
+    :return: OaApiCall, 未启用指标且oa_api_called没有接收方时为None
+    """
+    if not api_settings.METRICS_ENABLED and not oa_api_called.receivers:
+        return None
+    return OaApiCall(api_path, method)
+
+
+class Histogram:
+    """
+    累计直方图, 与Prometheus histogram一致
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list:
+        """
+        :return: [(上界, 累计次数), ...], 最后一项为("+Inf", 总次数)
+        """
+        res = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            res.append((bound, total))
+        res.append(("+Inf", self.count))
+        return res
+
+
+class MetricsCollector:
+    """
+    线程安全的进程内OA调用指标, 按api_path及HTTP状态码分组
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.durations = {}
+            self.ttfbs = {}
+            self.response_bytes = {}
+            self.retries = {}
+            self.token_refreshes = {}
+
+    def observe(self, event: dict):
+        api_path = event["api_path"]
+        with self._lock:
+            key = (api_path, event["status"])
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self._histogram(self.durations, api_path).observe(event["duration"])
+            if event["ttfb"] is not None:
+                self._histogram(self.ttfbs, api_path).observe(event["ttfb"])
+            self.response_bytes[api_path] = self.response_bytes.get(api_path, 0) + event["response_size"]
+            self.retries[api_path] = self.retries.get(api_path, 0) + max(event["attempts"] - 1, 0)
+            self.token_refreshes[api_path] = self.token_refreshes.get(api_path, 0) + event["token_refreshes"]
+
+    @staticmethod
+    def _histogram(histograms: dict, api_path: str) -> Histogram:
+        histogram = histograms.get(api_path)
+        if histogram is None:
+            histogram = histograms[api_path] = Histogram(api_settings.METRICS_BUCKETS)
+        return histogram
+
+    def snapshot(self) -> dict:
+        """
+        :return: {api_path: {"requests": {状态码: 次数}, "duration_sum": , "duration_buckets": [(上界, 累计次数)], ...}}
+        """
+        res = {}
+        with self._lock:
+            for (api_path, status), count in self.requests.items():
+                res.setdefault(api_path, {"requests": {}})["requests"][status] = count
+            for api_path, item in res.items():
+                duration = self.durations[api_path]
+                item.update(
+                    duration_sum=duration.sum,
+                    duration_buckets=duration.cumulative(),
+                    response_bytes=self.response_bytes[api_path],
+                    retries=self.retries[api_path],
+                    token_refreshes=self.token_refreshes[api_path],
+                )
+                if api_path in self.ttfbs:
+                    item.update(ttfb_sum=self.ttfbs[api_path].sum, ttfb_buckets=self.ttfbs[api_path].cumulative())
+        return res
+
+    def render(self) -> str:
+        """
+        Prometheus文本格式
+        """
+        lines = []
+        with self._lock:
+            lines.append("# TYPE oa_api_requests_total counter")
+            for (api_path, status), count in sorted(self.requests.items()):
+                lines.append(f'oa_api_requests_total{{api_path="{api_path}",status="{status}"}} {count}')
+            for name, histograms in (
+                ("oa_api_request_duration_seconds", self.durations),
+                ("oa_api_ttfb_seconds", self.ttfbs),
+            ):
+                lines.append(f"# TYPE {name} histogram")
+                for api_path, histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{api_path="{api_path}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{api_path="{api_path}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{api_path="{api_path}"}} {histogram.count}')
+            for name, counters in (
+                ("oa_api_response_bytes_total", self.response_bytes),
+                ("oa_api_retries_total", self.retries),
+                ("oa_api_token_refreshes_total", self.token_refreshes),
+            ):
+                lines.append(f"# TYPE {name} counter")
+                for api_path, count in sorted(counters.items()):
+                    lines.append(f'{name}{{api_path="{api_path}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsCollector()
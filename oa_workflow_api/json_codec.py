@@ -0,0 +1,41 @@
+"""
+OA接口请求/响应的JSON编解码
+
+JSON_CODEC配置为提供loads/dumps的模块, 默认标准库json, 可配置为orjson/ujson等更快的实现(需自行安装)
+- loads: 直接解析响应bytes, 不先解码为str
+- dumps: 返回str; orjson返回的bytes转为str, 不支持的类型(如非str键)回退到标准库json
+"""
+
+import json
+
+from .settings import api_settings
+
+
+def loads(data):
+    """
+    :param data: bytes或str
+    """
+    return api_settings.JSON_CODEC.loads(data)
+
+
+def dumps(obj) -> str:
+    codec = api_settings.JSON_CODEC
+    if codec is json:
+        return json.dumps(obj)
+    try:
+        res = codec.dumps(obj)
+    except TypeError:
+        return json.dumps(obj)
+    return res.decode() if type(res) is bytes else res
+
+
+def loads_response(resp):
+    """
+    解析requests/httpx的Response
+    :raise ValueError: 非JSON响应
+    """
+    try:
+        return loads(resp.content)
+    except ValueError:
+        # RFC 8259要求JSON为UTF-8, 按声明的其他编码返回时按响应文本再解析一次
+        return loads(resp.text)
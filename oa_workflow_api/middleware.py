@@ -1,4 +1,11 @@
-from .handler import handle_request
+import asyncio
+
+try:
+    from asgiref.sync import markcoroutinefunction
+except ImportError:  # asgiref<3.6
+    markcoroutinefunction = None
+
+from .handler import ahandle_request, handle_request
 
 
 class OaWFRequestMiddleware:
@@ -8,3 +15,23 @@ class OaWFRequestMiddleware:
     def __call__(self, request):
         response = self.get_response(handle_request(request))
         return response
+
+
+class AsyncOaWFRequestMiddleware:
+    """
+    ASGI下使用, 视图中通过 await request.oa_wf_api 获取AsyncOaWorkFlow
+    """
+
+    sync_capable = False
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if markcoroutinefunction is not None:
+            markcoroutinefunction(self)
+        else:
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    async def __call__(self, request):
+        response = await self.get_response(ahandle_request(request))
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.2 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oa_workflow_api', '0004_oauserinfo_dept_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='oauserinfo',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='OA中是否存在'),
+        ),
+        migrations.AddField(
+            model_name='oauserinfo',
+            name='sync_hash',
+            field=models.CharField(blank=True, default='', max_length=40, verbose_name='同步内容摘要'),
+        ),
+        migrations.AddField(
+            model_name='oauserinfo',
+            name='synced_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='最近同步变更时间'),
+        ),
+    ]
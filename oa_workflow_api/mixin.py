@@ -1,6 +1,15 @@
-from .handler import handle_request
+from .handler import ahandle_request, handle_request
 
 
 class OaWFApiViewMixin:
     def dispatch(self, request, *args, **kwargs):
         return super().dispatch(handle_request(request), *args, **kwargs)
+
+
+class AsyncOaWFApiViewMixin:
+    """
+    用于async视图, 视图中通过 await request.oa_wf_api 获取AsyncOaWorkFlow
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        return super().dispatch(ahandle_request(request), *args, **kwargs)
@@ -1,3 +1,5 @@
+import hashlib
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -21,11 +23,21 @@ class AbstractOaUserInfo(models.Model):
     )
     dept_id = models.IntegerField(null=True, verbose_name="OA用户部门ID")
     dept_name = models.CharField(max_length=480, blank=True, default="", verbose_name="OA用户部门")
+    is_active = models.BooleanField(default=True, verbose_name="OA中是否存在")
+    sync_hash = models.CharField(max_length=40, blank=True, default="", verbose_name="同步内容摘要")
+    synced_at = models.DateTimeField(null=True, blank=True, verbose_name="最近同步变更时间")
+
+    # 参与同步比较的字段, 内容摘要不变的记录增量同步时跳过
+    SYNC_FIELDS = ["staff_code_id", "dept_id", "name", "dept_name"]
 
     class Meta:
         abstract = True
         verbose_name = verbose_name_plural = "OA用户信息"
 
+    def compute_sync_hash(self) -> str:
+        content = "\x1f".join(str(getattr(self, i)) for i in self.SYNC_FIELDS)
+        return hashlib.sha1(content.encode()).hexdigest()
+
 
 class OaUserInfo(AbstractOaUserInfo):
     """
@@ -0,0 +1,168 @@
+"""
+流程列表数据的紧凑表示
+
+待办/已办等列表每行约40个字段(示例数据 api_example_data.TODO_LIST_DEMO), 报表/导出时大量保存或迭代dict占用内存较多.
+OaRecord将一行数据存为值元组, 字段名元组(RecordLayout)由字段相同的行共享, 同一批数据中相同的字符串值只保留一份;
+常用字段提供属性, 其余字段按OA字段名读取
+
+    rows = [WorkflowRequestRecord.from_json(i) for i in workflow.get_todo_list(...)[0]]
+    rows[0].request_id, rows[0]["requestName"], rows[0].to_dict()
+
+OaRecord只读, 支持keys()/items()/get()及按OA字段名取值, 可直接交给DRF Response序列化
+"""
+
+import threading
+
+_layout_lock = threading.Lock()
+_layouts = {}
+# 字段组合超过该数量时不再缓存布局, 避免异常数据导致缓存无限增长
+MAX_LAYOUTS = 256
+
+
+class RecordLayout:
+    """
+    一组字段名及其位置, 字段相同的行共享同一个RecordLayout
+    """
+
+    __slots__ = ("keys", "index")
+
+    def __init__(self, keys: tuple):
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+
+
+def get_layout(keys: tuple) -> RecordLayout:
+    layout = _layouts.get(keys)
+    if layout is None:
+        layout = RecordLayout(keys)
+        if len(_layouts) < MAX_LAYOUTS:
+            with _layout_lock:
+                layout = _layouts.setdefault(keys, layout)
+    return layout
+
+
+def field(key: str, doc: str = None):
+    """
+    按OA字段名读取的属性, 字段不存在时为None
+    """
+    return property(lambda self: self.get(key), doc=doc or key)
+
+
+class OaRecord:
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, layout: RecordLayout, values: tuple):
+        self._layout = layout
+        self._values = values
+
+    @classmethod
+    def from_json(cls, data: dict, pool: dict = None):
+        """
+        :param data: OA接口返回的一行数据, 嵌套的dict转为OaRecord
+        :param pool: 字符串值去重用的字典, 多行共用时相同的值(如创建人/节点名称/日期)只保留一份
+        """
+        if pool is None:
+            pool = {}
+        values = []
+        for value in data.values():
+            value_type = type(value)
+            if value_type is str:
+                value = pool.setdefault(value, value)
+            elif value_type is dict:
+                value = OaRecord.from_json(value, pool)
+            values.append(value)
+        return cls(get_layout(tuple(data)), tuple(values))
+
+    @classmethod
+    def from_list(cls, rows: list, pool: dict = None) -> list:
+        """
+        :param rows: OA接口返回的列表数据
+        :param pool: 同from_json, 默认同一列表内的行共用
+        """
+        if pool is None:
+            pool = {}
+        return [cls.from_json(i, pool) for i in rows]
+
+    def to_dict(self) -> dict:
+        return {
+            key: value.to_dict() if isinstance(value, OaRecord) else value
+            for key, value in zip(self._layout.keys, self._values)
+        }
+
+    def __getitem__(self, key: str):
+        return self._values[self._layout.index[key]]
+
+    def get(self, key: str, default=None):
+        i = self._layout.index.get(key)
+        return default if i is None else self._values[i]
+
+    def keys(self):
+        return self._layout.keys
+
+    def values(self):
+        return self._values
+
+    def items(self):
+        return zip(self._layout.keys, self._values)
+
+    def __contains__(self, key):
+        return key in self._layout.index
+
+    def __iter__(self):
+        return iter(self._layout.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, OaRecord):
+            return self._layout.keys == other._layout.keys and self._values == other._values
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # 反序列化(如从django cache读取)后重新共享RecordLayout
+        return _rebuild, (type(self), self._layout.keys, self._values)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _rebuild(cls, keys: tuple, values: tuple):
+    return cls(get_layout(keys), values)
+
+
+class WorkflowRequestRecord(OaRecord):
+    """
+    待办/待处理/待阅/被退回/已办列表中的一行
+    """
+
+    __slots__ = ()
+
+    request_id = field("requestId", "流程请求ID")
+    request_name = field("requestName", "流程标题")
+    request_level = field("requestLevel", "紧急程度 0: 正常 1: 重要 2: 紧急")
+    status = field("status")
+    creator_id = field("creatorId")
+    creator_name = field("creatorName")
+    create_time = field("createTime")
+    receive_time = field("receiveTime")
+    current_node_id = field("currentNodeId")
+    current_node_name = field("currentNodeName")
+    last_operator_id = field("lastOperatorId")
+    last_operator_name = field("lastOperatorName")
+    last_operate_time = field("lastOperateTime")
+    workflow_base_info = field("workflowBaseInfo")
+
+    @property
+    def workflow_id(self):
+        base_info = self.workflow_base_info
+        return base_info.get("workflowId") if base_info is not None else None
+
+    @property
+    def workflow_name(self):
+        base_info = self.workflow_base_info
+        return base_info.get("workflowName") if base_info is not None else None
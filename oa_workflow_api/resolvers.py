@@ -0,0 +1,208 @@
+"""
+OA用户解析
+
+基于同步到本地的OA用户表(SYNC_OA_USER_MODEL)在进程内建立索引, 工号/OA用户ID查询为字典查找
+- 同步OA用户完成后通过oa_users_synced信号及django cache中的版本号通知各进程重建索引
+- 索引中不存在时由调用方回退到OA数据库查询
+- 批量解析操作人名称时索引未命中的用户(如已离职)一次查询本地用户表, 结果缓存在进程内
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.test.signals import setting_changed
+
+from .caches import LocalTTLCache
+from .settings import SETTING_PREFIX, api_settings
+from .signals import oa_users_synced
+
+OaUser = namedtuple("OaUser", ["user_id", "staff_code", "dept_id", "name", "dept_name"])
+
+
+class OaUserIndex:
+    """
+    OA用户进程内索引
+    """
+
+    CACHE_VERSION_KEY = "oa-api-user-index-version"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_staff_code = None
+        self._by_user_id = None
+        self._version = None
+        self._checked_at = float("-inf")
+
+    def _current_version(self):
+        return cache.get_or_set(self.CACHE_VERSION_KEY, 1, timeout=None)
+
+    def _load(self):
+        from .utils import get_sync_oa_user_model
+
+        oa_user_model = get_sync_oa_user_model()
+        by_staff_code = {}
+        by_user_id = {}
+        queryset = oa_user_model.objects.filter(is_active=True)
+        # 调用方已在事务中时使用保存点, 查询失败(如未执行迁移)不影响调用方的事务
+        with transaction.atomic(using=queryset.db):
+            rows = queryset.values_list("user_id", "staff_code_id", "dept_id", "name", "dept_name").iterator()
+            for row in rows:
+                user = OaUser(*row)
+                by_user_id[user.user_id] = user
+                if user.staff_code:
+                    by_staff_code[user.staff_code] = user
+        return by_staff_code, by_user_id
+
+    def _ensure(self) -> bool:
+        """
+        确保索引为最新版本, 版本号每隔USER_RESOLVER_CHECK_INTERVAL秒检查一次
+        加载失败时同样间隔USER_RESOLVER_CHECK_INTERVAL秒后再重试
+        :return: 索引是否可用
+        """
+        now = time.monotonic()
+        if now - self._checked_at < api_settings.USER_RESOLVER_CHECK_INTERVAL:
+            return self._by_user_id is not None
+        with self._lock:
+            if now - self._checked_at < api_settings.USER_RESOLVER_CHECK_INTERVAL:
+                return self._by_user_id is not None
+            version = self._current_version()
+            if self._by_user_id is None or version != self._version:
+                try:
+                    self._by_staff_code, self._by_user_id = self._load()
+                except DatabaseError:
+                    # 未执行迁移或数据库不可用时不使用索引
+                    self._by_staff_code, self._by_user_id = None, None
+                    self._checked_at = now
+                    return False
+                self._version = version
+            self._checked_at = now
+        return True
+
+    def get_by_staff_code(self, staff_code: str):
+        """
+        :param staff_code: 工号
+        :return: OaUser, 不存在时为None
+        """
+        if not api_settings.USER_RESOLVER_ENABLED or not self._ensure():
+            return None
+        return self._by_staff_code.get(staff_code)
+
+    def get_by_user_id(self, user_id):
+        """
+        :param user_id: OA用户ID
+        :return: OaUser, 不存在或不是有效的OA用户ID时为None
+        """
+        user_id = _to_user_id(user_id)
+        if user_id is None:
+            return None
+        return self.get_many_by_user_id([user_id]).get(user_id)
+
+    def get_many_by_user_id(self, user_ids) -> dict:
+        """
+        :param user_ids: OA用户ID列表
+        :return: {OA用户ID: OaUser}, 不包含不存在的用户及无效的OA用户ID
+        """
+        if not api_settings.USER_RESOLVER_ENABLED or not self._ensure():
+            return {}
+        by_user_id = self._by_user_id
+        res = {}
+        for user_id in user_ids:
+            user = by_user_id.get(_to_user_id(user_id))
+            if user is not None:
+                res[user.user_id] = user
+        return res
+
+    def invalidate(self):
+        """
+        当前进程的索引失效, 下次使用时重建
+        """
+        with self._lock:
+            self._by_staff_code = None
+            self._by_user_id = None
+            self._version = None
+            self._checked_at = float("-inf")
+        _inactive_user_names.clear()
+
+    def __len__(self):
+        return len(self._by_user_id or ())
+
+
+oa_user_index = OaUserIndex()
+# 索引中不存在的用户(已离职等)名称缓存
+_inactive_user_names = LocalTTLCache(maxsize=4096, ttl=600)
+
+
+def _to_user_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve_user_names(user_ids) -> dict:
+    """
+    批量解析OA用户名称, 索引未命中的用户最多查询一次本地用户表
+    :param user_ids: OA用户ID列表
+    :return: {OA用户ID(int): 名称}, 不包含未找到的用户
+    """
+    user_ids = {i for i in map(_to_user_id, user_ids) if i is not None}
+    names = {user_id: user.name for user_id, user in oa_user_index.get_many_by_user_id(user_ids).items()}
+    missing = []
+    for user_id in user_ids - names.keys():
+        name = _inactive_user_names.get(user_id)
+        if name is None:
+            missing.append(user_id)
+        elif name:
+            names[user_id] = name
+    if missing:
+        from .utils import get_sync_oa_user_model
+
+        queryset = get_sync_oa_user_model().objects.filter(pk__in=missing)
+        try:
+            with transaction.atomic(using=queryset.db):
+                found = dict(queryset.values_list("pk", "name"))
+        except DatabaseError:
+            found = {}
+        for user_id in missing:
+            # 未找到的用户缓存空字符串, 避免重复查询
+            _inactive_user_names.set(user_id, found.get(user_id, ""))
+        names.update((k, v) for k, v in found.items() if v)
+    return names
+
+
+def annotate_operator_names(items: list, id_key: str = "operator", name_key: str = "operatorName") -> list:
+    """
+    为OA接口返回的记录(流程意见/流程状态等)批量添加操作人名称
+    :param items: 记录列表
+    :param id_key: 操作人OA用户ID字段
+    :param name_key: 写入操作人名称的字段, 未找到时为空字符串; 不含id_key的记录不处理
+    :return: items
+    """
+    names = resolve_user_names(i.get(id_key) for i in items)
+    for i in items:
+        if id_key in i:
+            i[name_key] = names.get(_to_user_id(i[id_key]), "")
+    return items
+
+
+def invalidate_user_index(*args, **kwargs):
+    """
+    所有进程的OA用户索引失效
+    """
+    try:
+        cache.incr(OaUserIndex.CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(OaUserIndex.CACHE_VERSION_KEY, 1, timeout=None)
+    oa_user_index.invalidate()
+
+
+def reset_user_index(*args, **kwargs):
+    if kwargs.get("setting") == SETTING_PREFIX:
+        oa_user_index.invalidate()
+
+
+oa_users_synced.connect(invalidate_user_index)
+setting_changed.connect(reset_user_index)
@@ -0,0 +1,129 @@
+"""
+OA流程只读接口响应缓存, 默认不启用(RESPONSE_CACHE_TIMEOUTS中配置了过期时间的方法才缓存)
+
+- 缓存键包含OA用户、方法名、流程请求ID及其他参数
+- 审核/退回/转发/收回等操作成功后, 通过递增流程请求ID的版本号使该流程所有用户的缓存失效
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from .settings import api_settings
+
+CACHE_KEY_PREFIX = "oa-api-response"
+CACHE_VERSION_KEY_PREFIX = "oa-api-response-version"
+
+
+def _version_key(request_id) -> str:
+    return f"{CACHE_VERSION_KEY_PREFIX}:{request_id}"
+
+
+def _cache_key(client, name: str, request_id, args: tuple, kwargs: dict):
+    """
+    :return: 缓存键及过期时间, 不缓存时为(None, None)
+    """
+    timeout = api_settings.RESPONSE_CACHE_TIMEOUTS.get(name)
+    oa_user_id = getattr(client, "oa_user_id", None)
+    if not timeout or oa_user_id is None:
+        return None, None
+    params = json.dumps([args, kwargs], sort_keys=True, default=str)
+    params_hash = hashlib.md5(params.encode()).hexdigest()
+    # 版本号初始值取当前时间, 版本号被缓存淘汰后不会与旧缓存键重复
+    version = cache.get_or_set(_version_key(request_id), lambda: time.time_ns(), timeout=None)
+    return f"{CACHE_KEY_PREFIX}:{request_id}:{version}:{oa_user_id}:{name}:{params_hash}", timeout
+
+
+def _get(client, name, request_id, args, kwargs):
+    key, timeout = _cache_key(client, name, request_id, args, kwargs)
+    if key is None:
+        return None, None, None
+    return key, timeout, cache.get(key)
+
+
+def invalidate_request(request_id):
+    """
+    使流程请求ID相关的响应缓存失效
+    """
+    if request_id is None:
+        return
+    try:
+        cache.incr(_version_key(request_id))
+    except ValueError:
+        pass
+
+
+def _split_request_id(args: tuple, kwargs: dict):
+    if "request_id" in kwargs:
+        kwargs = dict(kwargs)
+        return kwargs.pop("request_id"), args, kwargs
+    if args:
+        return args[0], args[1:], kwargs
+    return "", args, kwargs
+
+
+def cached_response(func):
+    """
+    缓存OaWorkFlow只读方法的返回值, 同步/异步方法通用
+    方法的第一个参数为流程请求ID(无此参数的方法如get_create_list按空请求ID缓存)
+    """
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            request_id, params, params_kwargs = _split_request_id(args, kwargs)
+            key, timeout, res = await sync_to_async(_get)(self, name, request_id, params, params_kwargs)
+            if res is not None:
+                return res
+            res = await func(self, *args, **kwargs)
+            if key is not None:
+                await sync_to_async(cache.set)(key, res, timeout)
+            return res
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        request_id, params, params_kwargs = _split_request_id(args, kwargs)
+        key, timeout, res = _get(self, name, request_id, params, params_kwargs)
+        if res is not None:
+            return res
+        res = func(self, *args, **kwargs)
+        if key is not None:
+            cache.set(key, res, timeout)
+        return res
+
+    return wrapper
+
+
+def invalidates_response(func):
+    """
+    方法执行成功后使其第一个参数(流程请求ID)相关的响应缓存失效, 同步/异步方法通用
+    """
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            res = await func(self, *args, **kwargs)
+            if api_settings.RESPONSE_CACHE_TIMEOUTS:
+                await sync_to_async(invalidate_request)(_split_request_id(args, kwargs)[0])
+            return res
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        res = func(self, *args, **kwargs)
+        if api_settings.RESPONSE_CACHE_TIMEOUTS:
+            invalidate_request(_split_request_id(args, kwargs)[0])
+        return res
+
+    return wrapper
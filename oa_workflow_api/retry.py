@@ -0,0 +1,305 @@
+"""
+OA接口重试与熔断
+
+- RetryPolicy: 最大尝试次数、指数退避(带抖动)、可重试状态码、整体截止时间
+- CircuitBreaker: 按OA主机统计连续失败, 达到阈值后熔断, 冷却后放行一个探测请求
+- 截止时间通过contextvars传递, 调用内部的刷新Token等嵌套请求共用外层调用的截止时间
+"""
+
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.test.signals import setting_changed
+from rest_framework.exceptions import APIException
+
+from .exceptions import OaCircuitOpenError
+from .settings import SETTING_PREFIX, api_settings
+
+# 当前OA调用的截止时间(time.monotonic)
+_deadline = contextvars.ContextVar("oa_request_deadline", default=None)
+
+
+def get_deadline():
+    """
+    当前OA调用的截止时间(time.monotonic), 不在OA调用内时为None
+    """
+    return _deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """
+    在上下文内设置截止时间, 外层已有更早的截止时间时沿用外层
+    :param deadline: time.monotonic()时间点, None为不限制
+    """
+    current = _deadline.get()
+    if current is not None and (deadline is None or current < deadline):
+        deadline = current
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def _min_timeout(timeout, remaining):
+    if timeout is None:
+        return remaining
+    return min(timeout, remaining)
+
+
+class RetryPolicy:
+    """
+    :param max_attempts: 最大尝试次数(含首次请求), 仅统计网络异常及5xx
+    :param backoff_base: 退避基数(秒), 第n次重试前等待 base * 2^(n-1)
+    :param backoff_max: 单次退避上限(秒)
+    :param jitter: 是否在[0, 退避时间]内随机等待
+    :param retry_statuses: 可重试的HTTP状态码
+    :param deadline: 整体截止时间(秒), 超过后不再重试, None为不限制
+    :param max_token_refreshes: Token失效时最多刷新Token重试的次数
+    """
+
+    def __init__(
+        self,
+        max_attempts=3,
+        backoff_base=0.2,
+        backoff_max=3.0,
+        jitter=True,
+        retry_statuses=(500, 502, 503, 504),
+        deadline=None,
+        max_token_refreshes=2,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.deadline = deadline
+        self.max_token_refreshes = max_token_refreshes
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_attempts=api_settings.RETRY_MAX_ATTEMPTS,
+            backoff_base=api_settings.RETRY_BACKOFF_BASE,
+            backoff_max=api_settings.RETRY_BACKOFF_MAX,
+            retry_statuses=api_settings.RETRY_STATUSES,
+            deadline=api_settings.RETRY_DEADLINE,
+            max_token_refreshes=api_settings.RETRY_MAX_TOKEN_REFRESHES,
+        )
+
+    def is_retryable_status(self, status_code) -> bool:
+        return status_code in self.retry_statuses
+
+    def backoff(self, attempt: int) -> float:
+        """
+        第attempt次请求失败后的等待时间
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class RetryState:
+    """
+    单次OA调用的重试状态
+
+    :param policy:
+    :param breaker:
+    :param timeout: 单次请求的(连接超时, 读取超时), 截止时间不小于二者之和, 避免超时较长的调用(如上传附件)被截断
+    """
+
+    def __init__(self, policy: RetryPolicy, breaker: "CircuitBreaker" = None, timeout: tuple = None):
+        self.policy = policy
+        self.breaker = breaker
+        self.attempts = 0
+        self.token_refreshes = 0
+        # 本次请求是否为熔断器冷却后放行的探测请求
+        self._probing = False
+        self.started_at = time.monotonic()
+        deadline = policy.deadline
+        if deadline is not None and timeout is not None:
+            if None in timeout:
+                deadline = None
+            else:
+                deadline = max(deadline, sum(timeout))
+        deadline_at = None if deadline is None else self.started_at + deadline
+        inherited = get_deadline()
+        if inherited is not None and (deadline_at is None or inherited < deadline_at):
+            deadline_at = inherited
+        self.deadline_at = deadline_at
+
+    @property
+    def remaining(self):
+        """
+        距截止时间的剩余秒数, 不限制时为None
+        """
+        if self.deadline_at is None:
+            return None
+        return self.deadline_at - time.monotonic()
+
+    def attempt_timeout(self, timeout: tuple) -> tuple:
+        """
+        本次请求的(连接超时, 读取超时), 不超过剩余时间
+        :raise APIException: 已超过截止时间
+        """
+        remaining = self.remaining
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise APIException("OA接口调用超时")
+        connect_timeout, read_timeout = timeout
+        return _min_timeout(connect_timeout, remaining), _min_timeout(read_timeout, remaining)
+
+    def before_attempt(self):
+        if self.breaker is not None:
+            self._probing = self.breaker.before_request()
+        self.attempts += 1
+
+    def on_success(self):
+        self._probing = False
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def on_transient_error(self, retryable=True):
+        """
+        网络异常/5xx
+        :param retryable: 是否允许重试(如POST读超时时请求可能已被处理, 不应重试)
+        :return: 重试前的等待时间(秒), 不再重试时为None
+        """
+        self._probing = False
+        if self.breaker is not None:
+            self.breaker.record_failure()
+        if not retryable or self.attempts >= self.policy.max_attempts:
+            return None
+        delay = self.policy.backoff(self.attempts)
+        remaining = self.remaining
+        if remaining is not None and delay >= remaining:
+            return None
+        if self.breaker is not None and self.breaker.is_open:
+            return None
+        return delay
+
+    def can_refresh_token(self) -> bool:
+        if self.token_refreshes >= self.policy.max_token_refreshes:
+            return False
+        self.token_refreshes += 1
+        return True
+
+    def close(self):
+        """
+        调用结束(含异常、取消)时调用, 探测请求未得到结果时释放熔断器的探测名额
+        """
+        if self._probing:
+            self._probing = False
+            self.breaker.release_probe()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+
+class CircuitBreaker:
+    """
+    熔断器
+    :param failure_threshold: 连续失败次数达到该值后熔断, 0为不启用
+    :param reset_timeout: 熔断持续时间(秒), 之后放行一个探测请求
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def before_request(self) -> bool:
+        """
+        :return: 是否为冷却结束后放行的探测请求
+        :raise OaCircuitOpenError: 熔断中
+        """
+        if not self.failure_threshold:
+            return False
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # 冷却结束, 只放行一个探测请求
+                self._state = self.HALF_OPEN
+                return True
+            raise OaCircuitOpenError()
+
+    def release_probe(self):
+        """
+        探测请求未得到结果(非网络异常、超过截止时间、被取消)时恢复为熔断, 下一个请求重新探测
+        否则熔断器会一直停留在HALF_OPEN, 拒绝所有请求
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                # _opened_at不变, 冷却已结束
+                self._state = self.OPEN
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """
+    OA主机对应的熔断器, 进程内共享
+    """
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(host)
+            if breaker is None:
+                breaker = _breakers[host] = CircuitBreaker(
+                    failure_threshold=api_settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                    reset_timeout=api_settings.CIRCUIT_BREAKER_RESET_TIMEOUT,
+                )
+    return breaker
+
+
+def reset_circuit_breakers(*args, **kwargs):
+    setting = kwargs.get("setting")
+    if setting is not None and setting != SETTING_PREFIX:
+        return
+    with _breakers_lock:
+        _breakers.clear()
+
+
+setting_changed.connect(reset_circuit_breakers)
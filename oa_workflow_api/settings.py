@@ -33,6 +33,29 @@ DEFAULTS = {
     "OA_DB_HOST": "",
     "OA_DB_PORT": 0,
     "OA_DB_SERVER_NAME": "",
+    # OA数据库连接池, 进程内共享, 为False时每次查询新建连接
+    "OA_DB_POOL_ENABLED": True,
+    "OA_DB_POOL_MIN": 1,
+    "OA_DB_POOL_MAX": 4,
+    "OA_DB_POOL_INCREMENT": 1,
+    # 空闲连接取出前超过该时间(秒)未使用时先检测连接是否可用, 负数为不检测
+    "OA_DB_POOL_PING_INTERVAL": 60,
+    # 空闲连接超过该时间(秒)后关闭, 0为不关闭
+    "OA_DB_POOL_IDLE_TIMEOUT": 300,
+    # 连接池已满时等待空闲连接的时间(毫秒)
+    "OA_DB_POOL_WAIT_TIMEOUT": 5000,
+    # 批量查询OA数据库时每次网络往返读取的行数
+    "OA_DB_FETCH_ARRAYSIZE": 1000,
+    # 同步OA用户时OA中已不存在的用户, "deactivate": 标记is_active=False, "delete": 删除, 空值: 保留
+    "SYNC_OA_USER_REMOVED": "deactivate",
+    # 同步OA用户每批读取/写入的用户数, 每批在独立事务中提交
+    "SYNC_OA_USER_BATCH_SIZE": 1000,
+    # 同步OA用户时写入当前批次的同时读取下一批次
+    "SYNC_OA_USER_PIPELINE": False,
+    # 工号注册用户(register_user_with_job_code)时优先从本地同步的OA用户表(进程内索引)解析, 未找到时查询OA数据库
+    "USER_RESOLVER_ENABLED": True,
+    # 进程内索引检查版本号(同步OA用户后更新)的间隔(秒)
+    "USER_RESOLVER_CHECK_INTERVAL": 5,
     # OA数据库用户表信息
     "OA_DB_USER_TABLE": OA_DB_USER_TABLE,
     "OA_DB_USER_ID_COLUMN": OA_DB_USER_ID_COLUMN,
@@ -48,12 +71,88 @@ DEFAULTS = {
     "OA_SSO_TOKEN_APP_ID": "",
     # requests包
     "REQUESTS_LIBRARY": "requests",
+    # OA请求/响应JSON编解码模块(需提供loads/dumps), 可使用更快的"orjson"/"ujson"(需自行安装)
+    "JSON_CODEC": "json",
+    # HTTP连接池, 进程内复用到OA的长连接
+    "HTTP_POOL_ENABLED": True,
+    # 缓存的主机连接池数量
+    "HTTP_POOL_CONNECTIONS": 10,
+    # 单个主机保持的最大连接数
+    "HTTP_POOL_MAXSIZE": 20,
+    # 连接数达到上限时是否阻塞等待空闲连接
+    "HTTP_POOL_BLOCK": False,
+    "HTTP_KEEP_ALIVE": True,
+    # 连接/读取超时(秒), None为不限制
+    "HTTP_CONNECT_TIMEOUT": 5,
+    "HTTP_READ_TIMEOUT": 30,
+    # 按OaApi方法名覆盖超时, 值为读取超时或(连接超时, 读取超时)
+    "HTTP_TIMEOUT_OVERRIDES": {
+        "upload_file": (5, 120),
+        "get_workflow_chart_xml": (5, 60),
+    },
+    # 加密后的OA用户ID进程内缓存条数及过期时间(秒)
+    "ENCRYPTED_USERID_CACHE_SIZE": 4096,
+    "ENCRYPTED_USERID_CACHE_TIMEOUT": 3600,
+    # OA账号信息缓存, "local": 进程内LRU, "django": django cache, 空值: 不缓存
+    "USERINFO_CACHE_BACKEND": "django",
+    "USERINFO_CACHE_TIMEOUT": 600,
+    # 仅"local"有效
+    "USERINFO_CACHE_SIZE": 4096,
+    # OA用户上下文(加密后的userid及账号信息)进程内缓存条数及过期时间(秒), 0为不缓存
+    # 注册用户(request.oa_wf_api)时命中该缓存则无需读取账号信息缓存
+    "USER_CONTEXT_CACHE_SIZE": 4096,
+    "USER_CONTEXT_CACHE_TIMEOUT": 60,
+    # 并发请求OA接口的线程池大小
+    "CONCURRENT_MAX_WORKERS": 16,
+    # 分页接口是否并发请求总数和数据
+    "PAGE_DATA_CONCURRENT": False,
+    # OA API Token有效期(秒)
+    "TOKEN_EXPIRE": 10800,
+    # Token过期前多少秒开始在后台提前刷新
+    "TOKEN_REFRESH_MARGIN": 600,
+    # 刷新Token分布式锁的超时时间(秒), 持有锁时申请Token的截止时间不超过该值
+    "TOKEN_LOCK_TIMEOUT": 10,
+    # 重试: 网络异常及RETRY_STATUSES状态码时按指数退避重试, POST请求仅在连接失败时重试
+    "RETRY_MAX_ATTEMPTS": 3,
+    "RETRY_BACKOFF_BASE": 0.2,
+    "RETRY_BACKOFF_MAX": 3.0,
+    "RETRY_STATUSES": [500, 502, 503, 504],
+    # 单次调用(含重试及刷新Token)的截止时间(秒), 不小于该调用的连接+读取超时, None为不限制
+    "RETRY_DEADLINE": 30,
+    # Token失效时最多刷新Token重试的次数
+    "RETRY_MAX_TOKEN_REFRESHES": 2,
+    # 熔断: 同一OA主机连续失败次数达到阈值后熔断, 0为不启用
+    "CIRCUIT_BREAKER_FAILURE_THRESHOLD": 5,
+    # 熔断持续时间(秒)
+    "CIRCUIT_BREAKER_RESET_TIMEOUT": 30,
+    # 流程只读接口响应缓存过期时间(秒), 按OaWorkFlow方法名配置, 未配置的方法不缓存
+    # 可配置: get_info/get_status/get_operator_info/get_resources/get_remark
+    "RESPONSE_CACHE_TIMEOUTS": {},
+    # 可创建流程(get_create_list)过滤条件, 流程类型(目录)ID及流程ID, 多个用逗号分隔或使用列表
+    "CREATE_LIST_TYPE_IDS": "1",
+    "CREATE_LIST_WORKFLOW_IDS": "",
+    # 可创建流程索引按OA用户缓存在进程内的条数及过期时间(秒)
+    "CREATE_LIST_CACHE_SIZE": 1024,
+    "CREATE_LIST_CACHE_TIMEOUT": 600,
+    # 批量流程操作(review_many等)的最大并发数及单次最多处理的流程数
+    "BULK_ACTION_MAX_CONCURRENCY": 8,
+    "BULK_ACTION_MAX_ITEMS": 200,
+    # 流程列表汇总(get_inbox_summary)按OA用户及查询条件缓存的时间(秒), 0为不缓存
+    "INBOX_SUMMARY_CACHE_TIMEOUT": 15,
+    # 全部列表数据迭代(iter_todo等)的每页条数及预取页数
+    "ITER_LIST_PAGE_SIZE": 100,
+    "ITER_LIST_PREFETCH_PAGES": 2,
+    # OA接口调用指标(instrumentation.metrics), 按api_path统计次数/耗时/响应大小/重试次数
+    "METRICS_ENABLED": False,
+    # 耗时直方图的分桶上界(秒)
+    "METRICS_BUCKETS": [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
 }
 
 
 # List of settings that may be in string import notation.
 IMPORT_STRINGS = [
     "REQUESTS_LIBRARY",
+    "JSON_CODEC",
 ]
 
 
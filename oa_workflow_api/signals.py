@@ -0,0 +1,8 @@
+from django.dispatch import Signal
+
+# 同步OA用户完成且有数据变化时发送, 参数: counts={"inserted": 0, "updated": 0, "unchanged": 0, "removed": 0}
+oa_users_synced = Signal()
+
+# 每次OA调用(含重试及刷新Token)结束后发送, 参数: api_path, method, status, duration, ttfb, response_size,
+# attempts, token_refreshes, error; 见instrumentation.OaApiCall.finish
+oa_api_called = Signal()
@@ -1,24 +1,134 @@
 try:
     from celery import shared_task  # noqa
 except ModuleNotFoundError:
-    shared_task = lambda name: type(name)  # noqa
+    # 未安装celery时作为普通函数使用
+    shared_task = lambda *args, **kwargs: lambda func: func  # noqa
 
+from concurrent.futures import wait
+from contextlib import closing
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .caches import invalidate_userinfo
+from .executors import get_executor
+from .settings import api_settings
+from .signals import oa_users_synced
 from .utils import FetchOaDbHandler, get_sync_oa_user_model
 
+# 按主键批量更新/删除时每条语句的主键个数, 避免超过数据库参数个数限制
+REMOVE_BATCH_SIZE = 500
+
 
 @shared_task(name="oa_workflow_api:同步Oa用户")
-def sync_oa_users():
+def sync_oa_users(full=False):
     """
     同步Oa用户
+    默认增量同步: 只写入新增及内容有变化的用户, OA中已不存在的用户按SYNC_OA_USER_REMOVED配置处理
+    按SYNC_OA_USER_BATCH_SIZE分批读取和写入, 每批在独立的短事务中提交
+    :param full: 全量同步, 重写全部用户
+    :return: {"inserted": 新增数, "updated": 更新数, "unchanged": 未变化数, "removed": 移除数}
     """
     oa_user_model = get_sync_oa_user_model()
-    all_oa_users = FetchOaDbHandler.get_all_oa_users()
-    objs = []
-    for i in all_oa_users:
-        objs.append(oa_user_model.as_obj(i))
-    oa_user_model.objects.bulk_create(
-        objs,
-        update_conflicts=True,
-        update_fields=["staff_code_id", "dept_id", "name", "dept_name"],
-        unique_fields=["user_id"],
-    )
+    batch_size = api_settings.SYNC_OA_USER_BATCH_SIZE
+    existing = {
+        pk: (sync_hash, is_active)
+        for pk, sync_hash, is_active in oa_user_model.objects.values_list("pk", "sync_hash", "is_active").iterator()
+    }
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    now = timezone.now()
+    seen = False
+    batches = _iter_batches(FetchOaDbHandler.iter_all_oa_users(), batch_size)
+    if api_settings.SYNC_OA_USER_PIPELINE:
+        # 写入当前批次时在线程池中读取下一批次
+        batches = _iter_prefetched(batches)
+    # 写入失败时立即关闭读取OA数据库的生成器, 不等待垃圾回收
+    with closing(batches):
+        for batch in batches:
+            seen = True
+            objs = []
+            for i in batch:
+                obj = oa_user_model.as_obj(i)
+                obj.sync_hash = obj.compute_sync_hash()
+                state = existing.pop(obj.pk, None)
+                if state is None:
+                    counts["inserted"] += 1
+                elif full or state != (obj.sync_hash, True):
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+                    continue
+                obj.is_active = True
+                obj.synced_at = now
+                objs.append(obj)
+            if objs:
+                with transaction.atomic(using=oa_user_model.objects.db):
+                    oa_user_model.objects.bulk_create(
+                        objs,
+                        batch_size=batch_size,
+                        update_conflicts=True,
+                        update_fields=[*oa_user_model.SYNC_FIELDS, "is_active", "sync_hash", "synced_at"],
+                        unique_fields=["user_id"],
+                    )
+    # OA未返回任何用户时视为查询异常, 不移除本地用户
+    if seen:
+        counts["removed"] = _remove_departed_users(oa_user_model, existing, now)
+    if counts["inserted"] or counts["updated"] or counts["removed"]:
+        invalidate_userinfo()
+        oa_users_synced.send(sender=oa_user_model, counts=counts)
+    return counts
+
+
+def _remove_departed_users(oa_user_model, departed: dict, now) -> int:
+    """
+    处理OA中已不存在的用户
+    :param departed: {主键: (内容摘要, 是否有效)}
+    :return: 移除数
+    """
+    mode = api_settings.SYNC_OA_USER_REMOVED
+    if mode == "delete":
+        pks = list(departed)
+    elif mode == "deactivate":
+        pks = [pk for pk, (_, is_active) in departed.items() if is_active]
+    else:
+        return 0
+    for start in range(0, len(pks), REMOVE_BATCH_SIZE):
+        queryset = oa_user_model.objects.filter(pk__in=pks[start : start + REMOVE_BATCH_SIZE])
+        with transaction.atomic(using=queryset.db):
+            if mode == "delete":
+                queryset.delete()
+            else:
+                queryset.update(is_active=False, synced_at=now)
+    return len(pks)
+
+
+def _iter_batches(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _iter_prefetched(iterator):
+    """
+    在线程池中提前读取下一项, 调用方处理当前项时并行读取
+    """
+    executor = get_executor()
+    future = executor.submit(next, iterator, None)
+    try:
+        while True:
+            item = future.result()
+            if item is None:
+                return
+            future = executor.submit(next, iterator, None)
+            yield item
+    finally:
+        # 调用方中途退出(如写入失败)时, 等待进行中的读取结束后关闭iterator, 及时释放数据库游标及连接
+        if not future.cancel():
+            wait([future])
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,223 @@
+"""
+OA API Token管理
+
+多进程/多线程部署时同一时刻只允许一个调用方向OA申请Token:
+- 进程内使用线程锁, 进程间使用django cache实现的分布式锁(cache.add)
+- 获得锁后先确认缓存中的Token是否已被其他进程刷新, 已刷新则直接使用
+- OA每次applytoken都会使之前的Token失效, 持有锁时申请到的Token直接写入缓存
+- 持有锁时申请Token的截止时间不超过锁的有效期(TOKEN_LOCK_TIMEOUT), 避免锁过期后其他进程申请了新Token又被覆盖
+- Token临近过期(TOKEN_REFRESH_MARGIN)时在后台线程提前刷新, 请求无需等待
+"""
+
+import logging
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from rest_framework.exceptions import APIException
+
+from .retry import deadline_scope, get_deadline
+from .settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+def lock_wait_deadline() -> float:
+    """
+    等待其他调用方刷新Token的截止时间(time.monotonic)
+    持有锁的进程异常退出时锁在TOKEN_LOCK_TIMEOUT后释放, 等待时间需大于该值; 不超过当前OA调用的截止时间
+    """
+    deadline = time.monotonic() + 2 * api_settings.TOKEN_LOCK_TIMEOUT
+    current = get_deadline()
+    if current is not None:
+        deadline = min(deadline, current)
+    return deadline
+
+
+class OaTokenManager:
+    CACHE_TOKEN_KEY = "oa-api-token"
+    CACHE_TOKEN_EXPIRES_KEY = "oa-api-token-expires-at"
+    CACHE_LOCK_KEY = "oa-api-token-lock"
+    LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._background_lock = threading.Lock()
+        self._token = None
+        self._expires_at = None
+        self._background_refreshing = False
+
+    def _read_cache(self):
+        values = cache.get_many([self.CACHE_TOKEN_KEY, self.CACHE_TOKEN_EXPIRES_KEY])
+        token = values.get(self.CACHE_TOKEN_KEY)
+        expires_at = values.get(self.CACHE_TOKEN_EXPIRES_KEY)
+        if token:
+            self._token, self._expires_at = token, expires_at
+        return token, expires_at
+
+    @staticmethod
+    def _is_expired(expires_at, margin=0) -> bool:
+        # 旧版本写入的Token没有过期时间, 视为有效, 失效时由调用方刷新
+        return expires_at is not None and time.time() >= expires_at - margin
+
+    def get_local_token(self):
+        """
+        进程内保存的Token, 不访问django cache
+        :return: Token, 不存在或已过期时为None
+        """
+        token = self._token
+        if not token or self._is_expired(self._expires_at):
+            return None
+        return token
+
+    def get_cached_token(self):
+        """
+        当前Token, 不请求OA
+        :return: Token, 不存在或已过期时为None
+        """
+        token = self.get_local_token()
+        if token:
+            return token
+        token, expires_at = self._read_cache()
+        if not token or self._is_expired(expires_at):
+            return None
+        return token
+
+    def get_fresh_token(self, stale_token: str = None):
+        """
+        缓存中与stale_token不同且未过期的Token
+        """
+        token, expires_at = self._read_cache()
+        if token and token != stale_token and not self._is_expired(expires_at):
+            return token
+        return None
+
+    def get_token(self, fetch):
+        """
+        获取Token, 不存在或已过期时同步刷新, 临近过期时后台刷新
+        :param fetch: 向OA申请Token的方法, fetch(expr) -> token
+        :return:
+        """
+        token = self.get_cached_token()
+        if not token:
+            return self.refresh(fetch)
+        if self.should_refresh():
+            self._refresh_in_background(fetch, token)
+        return token
+
+    def should_refresh(self) -> bool:
+        """
+        Token是否临近过期, 需要提前刷新
+        """
+        return self._is_expired(self._expires_at, margin=api_settings.TOKEN_REFRESH_MARGIN)
+
+    def acquire_lock(self):
+        """
+        尝试获取分布式锁
+        :return: 锁持有者标识, 未获取到时为None
+        """
+        owner = uuid.uuid4().hex
+        if cache.add(self.CACHE_LOCK_KEY, owner, timeout=api_settings.TOKEN_LOCK_TIMEOUT):
+            return owner
+        return None
+
+    def release_lock(self, owner: str):
+        """
+        释放分布式锁(尽力而为)
+        django cache没有原子的比较并删除, get与delete之间锁恰好过期并被其他调用方获取时会误删其锁,
+        后果仅为多申请一次Token; 持有锁的调用不超过锁的有效期, 正常情况下不会发生
+        """
+        if cache.get(self.CACHE_LOCK_KEY) == owner:
+            cache.delete(self.CACHE_LOCK_KEY)
+
+    def store(self, token: str, expr: int = None) -> str:
+        """
+        写入刚向OA申请到的Token
+        OA申请新Token后之前的Token即失效, 因此总是覆盖缓存中的Token
+        """
+        expr = expr or api_settings.TOKEN_EXPIRE
+        expires_at = time.time() + expr
+        cache.set_many({self.CACHE_TOKEN_KEY: token, self.CACHE_TOKEN_EXPIRES_KEY: expires_at}, timeout=expr)
+        self._token, self._expires_at = token, expires_at
+        logger.info("OA Token已刷新, 有效期%s秒", expr)
+        return token
+
+    def refresh(self, fetch, stale_token: str = None, wait: bool = True, expr: int = None):
+        """
+        刷新Token, 进程内及进程间同一时刻只有一个调用方请求OA
+        :param fetch: 向OA申请Token的方法, fetch(expr) -> token
+        :param stale_token: 调用方认定已失效的Token
+        :param wait: 其他调用方正在刷新时是否等待, 为False时直接返回None
+        :param expr: Token有效期(秒), 默认使用配置TOKEN_EXPIRE
+        :return:
+        """
+        expr = expr or api_settings.TOKEN_EXPIRE
+        deadline = lock_wait_deadline()
+        if not wait:
+            if not self._lock.acquire(blocking=False):
+                return None
+        elif not self._lock.acquire(timeout=max(0, deadline - time.monotonic())):
+            raise APIException("获取OA Token超时")
+        try:
+            token = self.get_fresh_token(stale_token)
+            if token:
+                return token
+            while True:
+                lock_expires_at = time.monotonic() + api_settings.TOKEN_LOCK_TIMEOUT
+                owner = self.acquire_lock()
+                if owner:
+                    try:
+                        token = self.get_fresh_token(stale_token)
+                        if token:
+                            return token
+                        with deadline_scope(lock_expires_at):
+                            token = fetch(expr)
+                        return self.store(token, expr)
+                    finally:
+                        self.release_lock(owner)
+                if not wait:
+                    return None
+                time.sleep(self.LOCK_POLL_INTERVAL)
+                token = self.get_fresh_token(stale_token)
+                if token:
+                    return token
+                if time.monotonic() >= deadline:
+                    raise APIException("获取OA Token超时")
+        finally:
+            self._lock.release()
+
+    def start_background_refresh(self) -> bool:
+        """
+        标记开始后台刷新, 已有后台刷新进行中时返回False
+        """
+        with self._background_lock:
+            if self._background_refreshing:
+                return False
+            self._background_refreshing = True
+            return True
+
+    def finish_background_refresh(self):
+        self._background_refreshing = False
+
+    def _refresh_in_background(self, fetch, token: str):
+        if not self.start_background_refresh():
+            return
+
+        def run():
+            try:
+                # 提前刷新不需要与其他进程争抢, 已有进程在刷新时直接放弃
+                self.refresh(fetch, stale_token=token, wait=False)
+            except Exception:  # noqa
+                logger.exception("OA Token后台刷新失败")
+            finally:
+                self.finish_background_refresh()
+
+        threading.Thread(target=run, name="oa-token-refresh", daemon=True).start()
+
+    def clear(self):
+        self._token = None
+        self._expires_at = None
+
+
+oa_token_manager = OaTokenManager()
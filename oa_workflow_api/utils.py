@@ -1,24 +1,35 @@
 import base64
+import hashlib
 import json
 import re
+import time
+from collections import deque
 from io import BytesIO
-from itertools import groupby
-from json.decoder import JSONDecodeError as BaseJSONDecodeError
 
 import requests as system_requests
-from Crypto.Cipher import PKCS1_v1_5
-from Crypto.PublicKey import RSA
 from django.apps import apps as django_apps
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
-from requests.exceptions import ConnectionError, JSONDecodeError
-from rest_framework.exceptions import APIException
-
-from .db_connections import get_oa_oracle_connection
+from requests.exceptions import ChunkedEncodingError, ConnectionError, ConnectTimeout, ContentDecodingError, Timeout
+from rest_framework.exceptions import APIException, ValidationError
+
+from . import json_codec
+from .caches import get_user_context_cache, get_userinfo_cache
+from .core import OaClientCore, OaUserContext, get_client_core
+from .create_list import CreateWorkflowIndex, create_list_conditions, get_index_cache, index_cache_key
+from .crypto import encrypt_with_spk, format_public_key, get_encrypted_userid
+from .db_connections import oa_oracle_connection
+from .exceptions import OaResponseError, OaTokenInvalid
+from .executors import get_executor, map_bounded
+from .http_pool import get_timeout, oa_session_pool
+from .instrumentation import start_call
+from .records import WorkflowRequestRecord
+from .resolvers import oa_user_index
+from .response_cache import cached_response, invalidates_response
+from .retry import RetryPolicy, RetryState, deadline_scope, get_circuit_breaker
 from .settings import DEFAULT_SYNC_OA_USER_MODEL, SETTING_PREFIX, api_settings
-
-requests: system_requests = api_settings.REQUESTS_LIBRARY
+from .tokens import oa_token_manager
 
 
 def get_sync_oa_user_model():
@@ -34,6 +45,9 @@ def get_sync_oa_user_model():
 
 
 class FetchOaDbHandler:
+    # IN条件绑定变量个数按以下档位补齐, 同一档位的SQL文本相同, 可复用Oracle语句缓存; 最大档位不超过Oracle IN列表上限1000
+    IN_BIND_BUCKETS = (1, 8, 32, 128, 512, 1000)
+
     @classmethod
     def pre_checking(cls):
         if not all(
@@ -58,15 +72,27 @@ class FetchOaDbHandler:
         sql = f"""
             SELECT {api_settings.OA_DB_USER_FETCH_COLUMNS}
             FROM {api_settings.OA_DB_USER_TABLE}
-            WHERE {api_settings.OA_DB_USER_STAFF_CODE_COLUMN} = '{job_code}'
+            WHERE {api_settings.OA_DB_USER_STAFF_CODE_COLUMN} = :job_code
             """
-        with get_oa_oracle_connection().cursor() as cursor:
-            cursor.execute(sql)
+        with oa_oracle_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(sql, job_code=job_code)
             res = cursor.fetchone()
         if not res:
             return None, None
         return res[0], res[1]
 
+    @classmethod
+    def resolve_work_code(cls, job_code: str) -> tuple:
+        """
+        通过长工号获取对应的OA用户id, 优先使用本地同步的OA用户索引, 不存在时查询OA数据库
+        :param job_code: 长工号， A0009527...
+        :return: OA用户ID, OA用户部门ID
+        """
+        user = oa_user_index.get_by_staff_code(job_code)
+        if user is not None:
+            return user.user_id, user.dept_id
+        return cls.get_oa_user_id_by_work_code(job_code)
+
     @classmethod
     def get_oa_users_id_by_work_code(cls, job_codes: list) -> list:
         """
@@ -75,17 +101,34 @@ class FetchOaDbHandler:
         :return: [[OA用户ID, OA用户部门ID], ...] -> [[18781, 23], [18782, 23], ...]
         """
         cls.pre_checking()
-        job_codes = [f"'{i}'" for i in job_codes]
-        conditions = f"({','.join(job_codes)})"
-        sql = f"""
-            SELECT {api_settings.OA_DB_USER_FETCH_COLUMNS}
-            FROM {api_settings.OA_DB_USER_TABLE}
-            WHERE {api_settings.OA_DB_USER_STAFF_CODE_COLUMN} IN {conditions}
-            """
-        with get_oa_oracle_connection().cursor() as cursor:
-            cursor.execute(sql)
-            res = cursor.fetchall()
-        return list(res)
+        job_codes = list(dict.fromkeys(job_codes))
+        res = []
+        if not job_codes:
+            return res
+        with oa_oracle_connection() as connection, connection.cursor() as cursor:
+            for binds in cls._in_bind_chunks(job_codes):
+                placeholders = ",".join(f":{i}" for i in range(1, len(binds) + 1))
+                sql = f"""
+                    SELECT {api_settings.OA_DB_USER_FETCH_COLUMNS}
+                    FROM {api_settings.OA_DB_USER_TABLE}
+                    WHERE {api_settings.OA_DB_USER_STAFF_CODE_COLUMN} IN ({placeholders})
+                    """
+                cursor.execute(sql, binds)
+                res.extend(cursor.fetchall())
+        return res
+
+    @classmethod
+    def _in_bind_chunks(cls, values: list):
+        """
+        按IN_BIND_BUCKETS拆分并补齐IN条件的绑定变量, 补齐值为None(IN条件中不匹配任何行)
+        :param values:
+        :return: 每次查询的绑定变量列表
+        """
+        max_size = cls.IN_BIND_BUCKETS[-1]
+        for start in range(0, len(values), max_size):
+            chunk = values[start : start + max_size]
+            size = next(i for i in cls.IN_BIND_BUCKETS if i >= len(chunk))
+            yield chunk + [None] * (size - len(chunk))
 
     @classmethod
     def get_all_oa_users(cls, fields=None, capital=True) -> list:
@@ -95,7 +138,35 @@ class FetchOaDbHandler:
         :param capital: 字段名大写
         :return:
         """
+        return list(cls.iter_all_oa_users(fields=fields, capital=capital))
+
+    @classmethod
+    def iter_all_oa_users(cls, fields=None, capital=True, as_dict=True):
+        """
+        逐行获取全部OA用户信息, 按OA_DB_FETCH_ARRAYSIZE分批从数据库读取, 内存占用与用户总数无关
+        迭代结束(或生成器关闭)前占用一个数据库连接
+        :param fields: 查询字段
+        :param capital: 字段名大写
+        :param as_dict: 为False时返回元组, 顺序与查询字段一致, 默认字段为(ID, 工号, 部门ID, 名称, 部门名称)
+        :return:
+        """
         cls.pre_checking()
+        sql = cls._all_oa_users_sql(fields)
+        arraysize = api_settings.OA_DB_FETCH_ARRAYSIZE
+        with oa_oracle_connection() as connection, connection.cursor() as cursor:
+            cursor.arraysize = arraysize
+            # 执行查询时即预取第一批数据, 减少一次网络往返
+            cursor.prefetchrows = arraysize + 1
+            cursor.execute(sql)
+            if as_dict:
+                columns = [col[0].upper() if capital else col[0].lower() for col in cursor.description]
+                for row in cursor:
+                    yield dict(zip(columns, row))
+            else:
+                yield from cursor
+
+    @staticmethod
+    def _all_oa_users_sql(fields=None) -> str:
         user_table_alias = "U"
         dept_table_alias = "D"
         default_fields = (
@@ -106,7 +177,7 @@ class FetchOaDbHandler:
             f"{dept_table_alias}.{api_settings.OA_DB_DEPT_NAME_COLUMN}"
         )
         fetch_fields = fields or default_fields
-        sql = f"""
+        return f"""
         SELECT {fetch_fields}
         FROM
             {api_settings.OA_DB_USER_TABLE} {user_table_alias}
@@ -115,12 +186,6 @@ class FetchOaDbHandler:
         WHERE
             {user_table_alias}.{api_settings.OA_DB_USER_STAFF_CODE_COLUMN} IS NOT NULL
         """  # noqa
-        with get_oa_oracle_connection().cursor() as cursor:
-            cursor.execute(sql)
-            columns = [col[0].upper() if capital else col[0].lower() for col in cursor.description]
-            cursor.rowfactory = lambda *values: dict(zip(columns, values))
-            res = cursor.fetchall()
-        return list(res)
 
 
 class OaApi(FetchOaDbHandler):
@@ -139,42 +204,20 @@ class OaApi(FetchOaDbHandler):
         :param pub_key:
         :return:
         """
-        start = f"{cls.PUBLIC_KEY_PREFIX}\n"
-        end = cls.PUBLIC_KEY_SUFFIX
-        result = ''
-        # 分割key，每64位长度换一行
-        length = len(pub_key)
-        divide = 64  # 切片长度
-        offset = 0  # 拼接长度
-        while length - offset > 0:
-            if length - offset > divide:
-                result += pub_key[offset : offset + divide] + '\n'
-            else:
-                result += pub_key[offset:] + '\n'
-            offset += divide
-        result = start + result + end
-        return result
+        return format_public_key(pub_key)
 
-    def __init__(self):
-        self.oa_host = api_settings.OA_HOST
-        self.app_id = api_settings.APP_ID
-        if not api_settings.APP_SPK.startswith(self.PUBLIC_KEY_PREFIX):
-            self.app_spk = self.handle_pub_key(api_settings.APP_SPK)
-        else:
-            self.app_spk = api_settings.APP_SPK
-        self.app_encrypted_secret = self.__encrypt_with_spk(api_settings.APP_RAW_SECRET)
-        # self.encrypt_userid = self.__get_encrypt_userid(oa_user_id)
+    def __init__(self, core: OaClientCore = None):
+        """
+        :param core: 进程内共享的OA配置, 默认使用get_client_core()
+        """
+        core = core or get_client_core()
+        self.oa_host = core.oa_host
+        self.app_id = core.app_id
+        self.app_spk = core.app_spk
+        self.app_encrypted_secret = core.app_encrypted_secret
         self.encrypt_userid = ""
-
-        self.token = cache.get(self.CACHE_TOKEN_KEY)
-
-        self.maximum_recursion = 8
-        self.recursion_c = 0
-
-    def __helpme(self, error):
-        if self.recursion_c >= self.maximum_recursion:
-            raise APIException(error)
-        self.recursion_c += 1
+        # 注册用户或请求时获取
+        self.token = None
 
     def get_sso_token(self, staff_code):
         """
@@ -204,18 +247,39 @@ class OaApi(FetchOaDbHandler):
         if getattr(self, "user", {}) and str(self.user["userid"]) == oa_user_id:
             return
 
-        if not self.token:
-            self.get_token()
-        self.oa_user_id = oa_user_id
-        self.encrypt_userid = self.__encrypt_with_spk(oa_user_id)
-        self._user = self.userinfo()
+        self.token = oa_token_manager.get_token(self._apply_token)
+        context_cache = get_user_context_cache()
+        context = context_cache.get(oa_user_id) if context_cache is not None else None
+        if context is None:
+            self.oa_user_id = oa_user_id
+            self.encrypt_userid = get_encrypted_userid(self.app_spk, oa_user_id)
+            userinfo_cache = get_userinfo_cache()
+            user_info = userinfo_cache.get(oa_user_id) if userinfo_cache is not None else None
+            if user_info is None:
+                user_info = self.userinfo()
+                if userinfo_cache is not None:
+                    userinfo_cache.set(oa_user_id, user_info)
+            context = OaUserContext(oa_user_id, self.encrypt_userid, user_info)
+            if context_cache is not None:
+                context_cache.set(oa_user_id, context)
+        self.bind_user(context)
+
+    @property
+    def user_context(self) -> OaUserContext:
+        """
+        当前注册的OA用户, 可通过bind_user绑定到其他客户端, 无需再次注册
+        """
+        return OaUserContext(getattr(self, "oa_user_id", None), self.encrypt_userid, getattr(self, "_user", None))
+
+    def bind_user(self, context: OaUserContext):
+        self.oa_user_id, self.encrypt_userid, self._user = context
 
     def register_user_with_job_code(self, job_code: str):
         """
         使用工号
         :param job_code: 长工号， A0009527...
         """
-        oa_user_id, oa_user_dept_id = self.get_oa_user_id_by_work_code(job_code)
+        oa_user_id, oa_user_dept_id = self.resolve_work_code(job_code)
         if not oa_user_id:
             raise APIException(f"Oa中未查询到工号为'{job_code}'的账号")
         self.register_user(oa_user_id)
@@ -226,16 +290,23 @@ class OaApi(FetchOaDbHandler):
         :param text:
         :return:
         """
-        publickey = RSA.import_key(self.app_spk.encode())
-        pk = PKCS1_v1_5.new(publickey)
-        encrypt_text = pk.encrypt(text.encode())
-        result = base64.b64encode(encrypt_text)
-        return result.decode()
+        return encrypt_with_spk(self.app_spk, text)
 
-    def get_token(self, expr=10800):
+    def get_token(self, expr=None, stale_token: str = None):
         """
         获取Oa API Token
-        :param expr:
+        多线程/多进程同时调用时只有一个调用方请求OA, 其余调用方等待后使用其获取的Token
+        :param expr: Token有效期(秒), 默认使用配置TOKEN_EXPIRE
+        :param stale_token: 已失效的Token, 缓存中的Token与之不同时说明已被刷新, 直接使用
+        :return:
+        """
+        self.token = oa_token_manager.refresh(self._apply_token, stale_token=stale_token, expr=expr)
+        return self.token
+
+    def _apply_token(self, expr):
+        """
+        向OA申请新Token
+        :param expr: Token有效期(秒)
         :return:
         """
         api_path = "/api/ec/dev/auth/applytoken"
@@ -244,19 +315,17 @@ class OaApi(FetchOaDbHandler):
             "secret": self.app_encrypted_secret,
             "time": str(expr),
         }
-        res = self._post_oa(api_path, headers=headers)
+        res = self._post_oa(api_path, headers=headers, refresh_token=False)
         # resp.text {
         # "msg":"获取成功!","code":0,"msgShowType":"none","status":true,"token":"e3d7e45b-805c-43c3-9c0c-e452135ae1ea"
         # }
-        print("新Token: ", res[self.TOKEN_KEY])
-        self.token = res[self.TOKEN_KEY]
-        cache.set(self.CACHE_TOKEN_KEY, self.token, timeout=None)
-        return self.token
+        return res[self.TOKEN_KEY]
 
     @property
     def _request_headers(self):
         if not self.encrypt_userid:
             raise NotImplementedError("调用前请先使用.register_user(OA_USER_ID: str)方法注册当前要操作的OA账号")
+        self.token = oa_token_manager.get_token(self._apply_token)
         headers = {
             "Content-Type": self.REQUEST_CONTENTTYPE,
             "appid": self.app_id,
@@ -268,36 +337,106 @@ class OaApi(FetchOaDbHandler):
     def __request(
         self,
         api_path,
-        rf: any([system_requests.get, system_requests.post]),
+        method: str,
         headers: dict = None,
         need_json=True,
+        refresh_token=True,
+        timeout: tuple = None,
         **kwargs,  # noqa
     ):
+        """
+        :param timeout: (连接超时, 读取超时), 默认使用配置HTTP_CONNECT_TIMEOUT/HTTP_READ_TIMEOUT
+        """
         url = f"{self.oa_host}{api_path}"
-        headers = headers or self._request_headers
-        try:
-            resp: system_requests.Response = rf(url, headers=headers, **kwargs)
-        except ConnectionError:
-            raise APIException("网络异常，系统无法连接到OA服务")
-        except Exception as e:
-            raise APIException(str(e))
-
+        timeout = timeout or get_timeout()
+        retry = RetryState(RetryPolicy.from_settings(), get_circuit_breaker(self.oa_host), timeout=timeout)
+        # 刷新Token等嵌套请求共用本次调用的截止时间
+        with deadline_scope(retry.deadline_at):
+            headers = headers or self._request_headers
+            call = start_call(api_path, method)
+            try:
+                while True:
+                    # 先计算超时: 已超过截止时间时不占用熔断器的探测名额
+                    attempt_timeout = retry.attempt_timeout(timeout)
+                    retry.before_attempt()
+                    try:
+                        resp: system_requests.Response = oa_session_pool.request(
+                            method, url, headers=headers, timeout=attempt_timeout, **kwargs
+                        )
+                    except (ConnectionError, Timeout, ChunkedEncodingError, ContentDecodingError) as e:
+                        connect_failed = isinstance(e, (ConnectionError, ConnectTimeout))
+                        time.sleep(
+                            self._transport_error_delay(retry, method, e, connect_failed, isinstance(e, Timeout))
+                        )
+                        continue
+                    except Exception as e:
+                        raise APIException(str(e))
+
+                    if call is not None:
+                        call.on_response(resp)
+                    if retry.policy.is_retryable_status(resp.status_code):
+                        # 网关返回502/504时POST请求可能已被OA处理, 不重试
+                        delay = retry.on_transient_error(retryable=method == "GET")
+                        if delay is None:
+                            raise APIException(f"OA服务异常: Response[{resp.status_code}]")
+                        time.sleep(delay)
+                        continue
+                    retry.on_success()
+
+                    try:
+                        res = self._parse_response(resp, need_json=need_json)
+                    except OaTokenInvalid as e:
+                        if not refresh_token or not retry.can_refresh_token():
+                            raise APIException(str(e))
+                        headers[self.TOKEN_KEY] = self.get_token(stale_token=headers.get(self.TOKEN_KEY))
+                        continue
+                    if call is not None:
+                        call.finish(retry)
+                    return res
+            except Exception as e:
+                if call is not None:
+                    call.finish(retry, e)
+                raise
+            finally:
+                retry.close()
+
+    @staticmethod
+    def _transport_error_delay(retry: RetryState, method: str, error, connect_failed: bool, timed_out: bool) -> float:
+        """
+        网络异常(连接失败/超时/读取响应中断)计入熔断, requests/httpx通用
+        :param connect_failed: 是否连接失败, 此时请求未发出, POST也可重试
+        :param timed_out: 是否超时
+        :return: 重试前的等待时间(秒)
+        :raise APIException: 不再重试
+        """
+        # 读超时或读取响应中断时POST请求可能已被OA处理, 不重试
+        delay = retry.on_transient_error(retryable=method == "GET" or connect_failed)
+        if delay is None:
+            if connect_failed:
+                raise APIException("网络异常，系统无法连接到OA服务")
+            raise APIException(f"OA服务响应超时: {error}" if timed_out else f"OA服务响应异常: {error}")
+        return delay
+
+    def _parse_response(self, resp, need_json=True):
+        """
+        解析OA接口响应, requests/httpx的Response通用
+        :param resp:
+        :param need_json:
+        :return:
+        :raise OaTokenInvalid: 需要重新获取Token后重试
+        """
         if resp.status_code != 200:
-            # 错误导致递归的问题
-            # print(resp.text)
-            # raise SystemError(f"OA: Response[{resp.status_code}]")
-            self.__helpme(f"OA服务异常: Response[{resp.status_code}]")
-            headers[self.TOKEN_KEY] = self.get_token()
-            return self.__request(api_path, rf, headers=headers, need_json=need_json, **kwargs)
-
-        if not need_json:
+            # 5xx等可重试状态码已由调用方处理, 其余非200按Token失效处理
+            raise OaTokenInvalid(f"OA服务异常: Response[{resp.status_code}]")
+
+        # 非JSON接口(如列表总数)出错时OA同样返回JSON错误信息
+        if not need_json and not resp.text.lstrip().startswith("{"):
             return resp.text
 
         try:
-            res = resp.json()
-        except (JSONDecodeError, BaseJSONDecodeError):
+            res = json_codec.loads_response(resp)
+        except ValueError:
             raise ValueError(f"OA返回异常: {resp.text}")
-            res = {"code": -1}
 
         # TODO 错误响应
         # {"msg":"secret解密失败,请检查加密内容.","code":-1,"msgShowType":"none","status":false}
@@ -312,32 +451,34 @@ class OaApi(FetchOaDbHandler):
                 elif resp_msg.startswith("认证信息错误"):
                     explain_suf = "(或为OA APP_SECRET失效)"
                 elif resp_msg.startswith("token不存在或者超时"):
-                    self.__helpme(resp.text)
-                    headers[self.TOKEN_KEY] = self.get_token()
-                    return self.__request(api_path, rf, headers=headers, need_json=need_json, **kwargs)
+                    raise OaTokenInvalid(resp.text)
                 else:
                     explain_suf = "(或为OA License过期)"
                 raise APIException(detail=f"OA Error: {resp_msg}。{explain_suf}")
             if resp_msg == "登录信息超时":
-                self.__helpme(resp.text)
-                headers[self.TOKEN_KEY] = self.get_token()
-                return self.__request(api_path, rf, headers=headers, need_json=need_json, **kwargs)
+                raise OaTokenInvalid(resp.text)
             raise ValueError(f"Error: {resp.text}")
         if type(res) is dict and res.get("code", "") and res["code"] != "SUCCESS":
-            raise APIException(detail=f"OA提示: {res['code']}, {res.get('errMsg', '')}")
-        return res
+            raise OaResponseError(res["code"], res.get("errMsg", ""), res)
+        return res if need_json else resp.text
 
-    def _get_oa(self, api: str, params: dict = None, headers: dict = None, need_json=True):
-        res = self.__request(api, requests.get, params=params, headers=headers, need_json=need_json)
-        self.recursion_c = 0
-        return res
+    def _get_oa(self, api: str, params: dict = None, headers: dict = None, need_json=True, **kwargs):
+        return self.__request(api, "GET", params=params, headers=headers, need_json=need_json, **kwargs)
 
     def _post_oa(self, api: str, post_data: dict = None, headers: dict = None, need_json=True, **kwargs):
-        res = self.__request(api, requests.post, data=post_data, headers=headers, need_json=need_json, **kwargs)
-        self.recursion_c = 0
-        return res
+        return self.__request(api, "POST", data=post_data, headers=headers, need_json=need_json, **kwargs)
 
-    def _page_data(self, page_count_path, page_data_path, workflow_id, page=1, page_size=10, conditions: dict = None):
+    def _page_data(
+        self,
+        page_count_path,
+        page_data_path,
+        workflow_id,
+        page=1,
+        page_size=10,
+        conditions: dict = None,
+        concurrent: bool = None,
+        with_count: bool = True,
+    ):
         """
         请求分页数据
         :param page_count_path:
@@ -349,7 +490,9 @@ class OaApi(FetchOaDbHandler):
             -- requestlevel:  紧急程度      0: 正常 1: 重要 2: 紧急
             -- workflowIds：  流程路径id 以','分隔
             -- workflowTypes：流程类型id 以','分隔
-        :return:
+        :param concurrent: 是否并发请求总数和数据, 默认使用配置PAGE_DATA_CONCURRENT
+        :param with_count: 是否请求总数, 为False时不请求总数接口, 返回的第三项为是否还有下一页
+        :return: 数据, 页码, 总数(with_count=False时为是否还有下一页)
         """
         """
         - 测试目录                       workflowTypes    type_id = 1021
@@ -357,24 +500,29 @@ class OaApi(FetchOaDbHandler):
            内部价2                       workflowIds           id = 51022
            内部价                        workflowIds           id = 50522
         """
-        if not conditions:
-            conditions = {}
-        search_conditions = {
-            "conditions": json.dumps(
-                {
-                    # "workflowTypes": "1021",  # 流程目录ID  2,3,4
-                    **conditions,
-                    "workflowIds": workflow_id,  # 流程ID     1,2,3
-                }
-            )
-        }
+        if concurrent is None:
+            concurrent = api_settings.PAGE_DATA_CONCURRENT
+        search_conditions = self._page_conditions(workflow_id, conditions)
+        if not with_count:
+            return self._page_data_has_more(page_data_path, search_conditions, page, page_size, concurrent)
+
+        post_data = {"pageNo": str(page), "pageSize": str(page_size), **search_conditions}
+        if concurrent:
+            executor = get_executor()
+            count_future = executor.submit(self._post_oa, page_count_path, post_data=search_conditions, need_json=False)
+            data_future = executor.submit(self._post_oa, page_data_path, post_data=post_data)
+            todo_count = int(count_future.result())
+            res: list = data_future.result()
+            if (page - 1) * page_size >= todo_count:
+                return [], page, todo_count
+            return res, page, todo_count
+
         resp = self._post_oa(page_count_path, post_data=search_conditions, need_json=False)
         todo_count = int(resp)
 
         if (page - 1) * page_size >= todo_count:
             return [], page, todo_count
 
-        post_data = {"pageNo": str(page), "pageSize": str(page_size), **search_conditions}
         res: list = self._post_oa(
             page_data_path,
             post_data=post_data,  # , need_json=False
@@ -382,6 +530,121 @@ class OaApi(FetchOaDbHandler):
 
         return res, page, todo_count
 
+    def _page_data_has_more(self, page_data_path, search_conditions: dict, page, page_size, concurrent=False):
+        """
+        不请求总数的分页数据
+        :return: 数据, 页码, 是否还有下一页
+        """
+        if page == 1:
+            post_data = {"pageNo": "1", "pageSize": str(page_size + 1), **search_conditions}
+            res: list = self._post_oa(page_data_path, post_data=post_data)
+            return res[:page_size], page, len(res) > page_size
+
+        # 非首页时pageSize+1会改变偏移量, 改为额外查询下一页第一条数据
+        post_data = {"pageNo": str(page), "pageSize": str(page_size), **search_conditions}
+        next_post_data = {"pageNo": str(page * page_size + 1), "pageSize": "1", **search_conditions}
+        if concurrent:
+            executor = get_executor()
+            data_future = executor.submit(self._post_oa, page_data_path, post_data=post_data)
+            next_future = executor.submit(self._post_oa, page_data_path, post_data=next_post_data)
+            res, next_res = data_future.result(), next_future.result()
+        else:
+            res = self._post_oa(page_data_path, post_data=post_data)
+            next_res = self._post_oa(page_data_path, post_data=next_post_data) if len(res) >= page_size else []
+        return res, page, self._has_next_row(res, next_res, page_size)
+
+    @staticmethod
+    def _has_next_row(res: list, next_res: list, page_size) -> bool:
+        if len(res) < page_size or not next_res:
+            return False
+        # 页码越界时OA可能返回最后一条数据, 与当前页重复则视为没有下一页
+        current_ids = {i.get("requestId") for i in res if isinstance(i, dict)}
+        next_row = next_res[0]
+        return not (isinstance(next_row, dict) and next_row.get("requestId") in current_ids)
+
+    def _iter_page_data(
+        self,
+        page_count_path,
+        page_data_path,
+        workflow_id,
+        conditions: dict = None,
+        page_size: int = None,
+        prefetch: int = None,
+        max_items: int = None,
+        as_records: bool = False,
+    ):
+        """
+        逐条返回全部分页数据, 按总数规划页码, 处理当前页时在线程池中预取后续页
+        同一时刻最多缓存prefetch+1页数据
+        :param page_size: 每页条数, 默认使用配置ITER_LIST_PAGE_SIZE
+        :param prefetch: 预取页数, 默认使用配置ITER_LIST_PREFETCH_PAGES, 0为不预取
+        :param max_items: 最多返回的条数
+        :param as_records: 是否返回WorkflowRequestRecord, 默认返回OA接口原始的dict
+        """
+        page_size = page_size or api_settings.ITER_LIST_PAGE_SIZE
+        if prefetch is None:
+            prefetch = api_settings.ITER_LIST_PREFETCH_PAGES
+        search_conditions = self._page_conditions(workflow_id, conditions)
+        total = int(self._post_oa(page_count_path, post_data=search_conditions, need_json=False))
+        if max_items is not None:
+            total = min(total, max_items)
+        last_page = -(-total // page_size)
+
+        executor = get_executor()
+        pending = deque()
+        next_page = 1
+        seen = set()
+        try:
+            while total > 0:
+                while next_page <= last_page and len(pending) <= prefetch:
+                    post_data = {"pageNo": str(next_page), "pageSize": str(page_size), **search_conditions}
+                    pending.append(executor.submit(self._post_oa, page_data_path, post_data=post_data))
+                    next_page += 1
+                if not pending:
+                    return
+                res: list = pending.popleft().result()
+                rows = self._unseen_rows(res, seen, total)
+                total -= len(rows)
+                if as_records:
+                    rows = WorkflowRequestRecord.from_list(rows)
+                yield from rows
+                if len(res) < page_size:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def _unseen_rows(res: list, seen: set, limit: int) -> list:
+        """
+        过滤翻页期间因列表变化而重复返回的流程, 最多返回limit条
+        """
+        rows = []
+        for row in res:
+            request_id = row.get("requestId") if isinstance(row, dict) else None
+            if request_id is not None:
+                if request_id in seen:
+                    continue
+                seen.add(request_id)
+            rows.append(row)
+            if len(rows) >= limit:
+                break
+        return rows
+
+    @staticmethod
+    def _page_conditions(workflow_id, conditions: dict = None) -> dict:
+        if not conditions:
+            conditions = {}
+        return {
+            "conditions": json_codec.dumps(
+                {
+                    # "workflowTypes": "1021",  # 流程目录ID  2,3,4
+                    **conditions,
+                    "workflowIds": workflow_id,  # 流程ID     1,2,3
+                }
+            )
+        }
+
     def userinfo(self) -> dict:
         """
         获取账号信息
@@ -437,7 +700,7 @@ class OaApi(FetchOaDbHandler):
         headers = self._request_headers.copy()
         headers.pop("Content-Type")
         files = {"file": file_source}
-        resp = self._post_oa(api_path, post_data=body, headers=headers, files=files)
+        resp = self._post_oa(api_path, post_data=body, headers=headers, files=files, timeout=get_timeout("upload_file"))
         return resp["data"]["fileid"]
 
     def get_workflow_chart_url(self, staff_code: str, oa_workflow_id):
@@ -467,8 +730,11 @@ class OaApi(FetchOaDbHandler):
             "workflowId": oa_workflow_id,
             "backstageReadOnly": True,
         }
-        res = self._post_oa(get_xml_path, post_data=post_data)
-        xml_content = res.get("xml", "")
+        res = self._post_oa(get_xml_path, post_data=post_data, timeout=get_timeout("get_workflow_chart_xml"))
+        return self._decode_chart_xml(res.get("xml", ""))
+
+    @staticmethod
+    def _decode_chart_xml(xml_content: str) -> str:
         if not xml_content:
             return ""
 
@@ -483,84 +749,268 @@ class OaApi(FetchOaDbHandler):
 
 
 class OaWorkFlow(OaApi):
-    def get_todo_list(self, workflow_id, page, page_size, conditions=None):
+    # 流程列表接口: (总数接口, 数据接口)
+    INBOX_LIST_APIS = {
+        "todo": (
+            "/api/workflow/paService/getToDoWorkflowRequestCount",
+            "/api/workflow/paService/getToDoWorkflowRequestList",
+        ),
+        "doing": (
+            "/api/workflow/paService/getDoingWorkflowRequestCount",
+            "/api/workflow/paService/getDoingWorkflowRequestList",
+        ),
+        "unread": (
+            "/api/workflow/paService/getToBeReadWorkflowRequestCount",
+            "/api/workflow/paService/getToBeReadWorkflowRequestList",
+        ),
+        "rejected": (
+            "/api/workflow/paService/getBeRejectWorkflowRequestCount",
+            "/api/workflow/paService/getBeRejectWorkflowRequestList",
+        ),
+        "handled": (
+            "/api/workflow/paService/getHandledWorkflowRequestCount",
+            "/api/workflow/paService/getHandledWorkflowRequestList",
+        ),
+    }
+
+    def get_todo_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
         """
         待办流程
         """
-        count_api_path = "/api/workflow/paService/getToDoWorkflowRequestCount"
-        data_api_path = "/api/workflow/paService/getToDoWorkflowRequestList"
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["todo"]
         data, page, total_count = self._page_data(
-            count_api_path, data_api_path, workflow_id, page=page, page_size=page_size, conditions=conditions
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
         )
         # 示例数据 api_example_data.TODO_LIST_DEMO
         return data, page, total_count
 
-    def get_doing_list(self, workflow_id, page, page_size, conditions=None):
+    def get_doing_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
         """
         待办列表->待处理
         """
-        count_api_path = "/api/workflow/paService/getDoingWorkflowRequestCount"
-        data_api_path = "/api/workflow/paService/getDoingWorkflowRequestList"
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["doing"]
         data, page, total_count = self._page_data(
-            count_api_path, data_api_path, workflow_id, page=page, page_size=page_size, conditions=conditions
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
         )
         return data, page, total_count
 
-    def get_unread_list(self, workflow_id, page, page_size, conditions=None):
+    def get_unread_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
         """
         待办列表->待阅
         """
-        count_api_path = "/api/workflow/paService/getToBeReadWorkflowRequestCount"
-        data_api_path = "/api/workflow/paService/getToBeReadWorkflowRequestList"
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["unread"]
         data, page, total_count = self._page_data(
-            count_api_path, data_api_path, workflow_id, page=page, page_size=page_size, conditions=conditions
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
         )
         return data, page, total_count
 
-    def get_rejected_list(self, workflow_id, page, page_size, conditions=None):
+    def get_rejected_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
         """
         待办列表->被退回
         """
-        count_api_path = "/api/workflow/paService/getBeRejectWorkflowRequestCount"
-        data_api_path = "/api/workflow/paService/getBeRejectWorkflowRequestList"
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["rejected"]
         data, page, total_count = self._page_data(
-            count_api_path, data_api_path, workflow_id, page=page, page_size=page_size, conditions=conditions
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
         )
         return data, page, total_count
 
-    def get_handled_list(self, workflow_id, page, page_size, conditions=None):
+    def get_handled_list(self, workflow_id, page, page_size, conditions=None, concurrent=None, with_count=True):
         """
         已办流程
         """
-        count_api_path = "/api/workflow/paService/getHandledWorkflowRequestCount"
-        data_api_path = "/api/workflow/paService/getHandledWorkflowRequestList"
+        count_api_path, data_api_path = self.INBOX_LIST_APIS["handled"]
         data, page, total_count = self._page_data(
-            count_api_path, data_api_path, workflow_id, page=page, page_size=page_size, conditions=conditions
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            page=page,
+            page_size=page_size,
+            conditions=conditions,
+            concurrent=concurrent,
+            with_count=with_count,
         )
         # 示例数据 api_example_data.HANDLED_LIST_DEMO
         return data, page, total_count
 
-    def get_create_list(self):
+    def iter_list(
+        self, kind, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False
+    ):
+        """
+        逐条返回流程列表的全部数据, 用于报表/导出, 参数同_iter_page_data
+        :param kind: 列表类型, INBOX_LIST_APIS中的键
+        """
+        count_api_path, data_api_path = self.INBOX_LIST_APIS[kind]
+        return self._iter_page_data(
+            count_api_path,
+            data_api_path,
+            workflow_id,
+            conditions=conditions,
+            page_size=page_size,
+            prefetch=prefetch,
+            max_items=max_items,
+            as_records=as_records,
+        )
+
+    def iter_todo(self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False):
+        """
+        全部待办流程
+        """
+        return self.iter_list("todo", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    def iter_doing(self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False):
+        """
+        全部待处理流程
+        """
+        return self.iter_list("doing", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    def iter_unread(
+        self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False
+    ):
+        """
+        全部待阅流程
+        """
+        return self.iter_list("unread", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    def iter_rejected(
+        self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False
+    ):
+        """
+        全部被退回流程
+        """
+        return self.iter_list("rejected", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    def iter_handled(
+        self, workflow_id, conditions=None, page_size=None, prefetch=None, max_items=None, as_records=False
+    ):
+        """
+        全部已办流程
+        """
+        return self.iter_list("handled", workflow_id, conditions, page_size, prefetch, max_items, as_records)
+
+    def get_inbox_summary(self, workflow_ids="", conditions: dict = None, with_data=False, page_size=10, kinds=None):
+        """
+        并发获取待办/待处理/待阅/被退回/已办的总数(及第一页数据), 结果缓存INBOX_SUMMARY_CACHE_TIMEOUT秒
+        :param workflow_ids: 流程ID, 多个用逗号分隔或使用列表
+        :param conditions: 查询条件, 同_page_data
+        :param with_data: 是否同时获取第一页数据
+        :param page_size: 第一页数据条数
+        :param kinds: 列表类型, 默认INBOX_LIST_APIS中全部类型
+        :return: {"todo": {"count": 总数, "data": 第一页数据(with_data时)}, ...}
+        """
+        kinds, search_conditions, key = self._inbox_summary_params(
+            workflow_ids, conditions, with_data, page_size, kinds
+        )
+        res = cache.get(key) if key else None
+        if res is not None:
+            return res
+
+        executor = get_executor()
+        futures = {}
+        for kind in kinds:
+            count_api_path, data_api_path = self.INBOX_LIST_APIS[kind]
+            futures[(kind, "count")] = executor.submit(
+                self._post_oa, count_api_path, post_data=search_conditions, need_json=False
+            )
+            if with_data:
+                post_data = {"pageNo": "1", "pageSize": str(page_size), **search_conditions}
+                futures[(kind, "data")] = executor.submit(self._post_oa, data_api_path, post_data=post_data)
+        res = self._inbox_summary_result(kinds, {k: v.result() for k, v in futures.items()})
+        if key:
+            cache.set(key, res, api_settings.INBOX_SUMMARY_CACHE_TIMEOUT)
+        return res
+
+    def _inbox_summary_params(self, workflow_ids, conditions, with_data, page_size, kinds):
+        """
+        :return: 列表类型, 查询条件, 缓存键(不缓存时为None)
+        """
+        kinds = list(kinds or self.INBOX_LIST_APIS)
+        unknown = set(kinds) - set(self.INBOX_LIST_APIS)
+        if unknown:
+            raise APIException(f"不支持的列表类型: {','.join(sorted(unknown))}")
+        if isinstance(workflow_ids, (list, tuple, set)):
+            workflow_ids = ",".join(str(i) for i in workflow_ids)
+        search_conditions = self._page_conditions(workflow_ids, conditions)
+        key = None
+        oa_user_id = getattr(self, "oa_user_id", None)
+        if api_settings.INBOX_SUMMARY_CACHE_TIMEOUT and oa_user_id is not None:
+            params = json.dumps([kinds, search_conditions, with_data, page_size], sort_keys=True)
+            key = f"oa-api-inbox-summary:{oa_user_id}:{hashlib.md5(params.encode()).hexdigest()}"
+        return kinds, search_conditions, key
+
+    @staticmethod
+    def _inbox_summary_result(kinds: list, responses: dict) -> dict:
+        res = {}
+        for kind in kinds:
+            res[kind] = {"count": int(responses[(kind, "count")])}
+            if (kind, "data") in responses:
+                res[kind]["data"] = responses[(kind, "data")] if res[kind]["count"] else []
+        return res
+
+    def get_create_list(self, type_ids=None, workflow_ids=None):
+        """
+        可创建流程, 按流程类型分组
+        :param type_ids: 流程类型(目录)ID, 默认使用配置CREATE_LIST_TYPE_IDS
+        :param workflow_ids: 流程ID, 默认使用配置CREATE_LIST_WORKFLOW_IDS
         """
-        可创建流程
+        return self.get_create_index(type_ids, workflow_ids).grouped()
+
+    def get_create_index(self, type_ids=None, workflow_ids=None, refresh=False) -> CreateWorkflowIndex:
         """
+        可创建流程索引, 按OA用户及过滤条件缓存CREATE_LIST_CACHE_TIMEOUT秒
+        :param type_ids: 流程类型(目录)ID, 默认使用配置CREATE_LIST_TYPE_IDS
+        :param workflow_ids: 流程ID, 默认使用配置CREATE_LIST_WORKFLOW_IDS
+        :param refresh: 忽略缓存重新请求OA
+        """
+        conditions = create_list_conditions(type_ids, workflow_ids)
+        key = index_cache_key(getattr(self, "oa_user_id", None), conditions)
+        index = None if refresh else get_index_cache().get(key)
+        if index is None:
+            index = CreateWorkflowIndex(self._fetch_create_list(conditions))
+            get_index_cache().set(key, index)
+        return index
+
+    def can_create_workflow(self, workflow_id) -> bool:
+        """
+        当前用户是否可创建流程
+        :param workflow_id: OA流程ID
+        """
+        return self.get_create_index().can_create(workflow_id)
+
+    def _fetch_create_list(self, conditions: dict) -> list:
         # count_api_path = "/api/workflow/paService/getCreateWorkflowCount"
         api_path = "/api/workflow/paService/getCreateWorkflowList"
-        post_data = {
-            "conditions": json.dumps(
-                {
-                    # "wfIds": "51022",  # 流程
-                    "wfTypeIds": "1"  # "1021"  # 目录
-                }
-            )
-        }
+        post_data = {"conditions": json_codec.dumps(conditions)}
         res: list = self._post_oa(api_path, post_data=post_data)
         # 示例数据 api_example_data.CREATE_LIST_DEMO
-        result = []
-        res.sort(key=lambda x: x["workflowTypeName"])
-        for type_name, g in groupby(res, key=lambda x: x["workflowTypeName"]):
-            result.append({"workflowTypeName": type_name, "workflows": list(g)})
-        return result
+        return res
 
     def submit(self, post_data: dict, work_flow_id: str = None):
         """
@@ -597,8 +1047,8 @@ class OaWorkFlow(OaApi):
         if not main_data:
             raise APIException("需要提交流程的主表数据")
         post_data = {
-            "mainData": json.dumps(main_data),
-            "detailData": json.dumps(detail_data),
+            "mainData": json_codec.dumps(main_data),
+            "detailData": json_codec.dumps(detail_data),
             "otherParams": {},
             "remark": remark,
             # "requestLevel": "0",
@@ -616,6 +1066,7 @@ class OaWorkFlow(OaApi):
         oa_request_id = res["data"]["requestid"]
         return oa_request_id
 
+    @invalidates_response
     def review(self, request_id: str, remark="", extras: dict = None):
         """
         提交/审核
@@ -642,6 +1093,7 @@ class OaWorkFlow(OaApi):
         }
         return resp
 
+    @invalidates_response
     def reject(self, request_id: str, node_id: str = "", remark=""):
         """
         退回流程
@@ -649,7 +1101,7 @@ class OaWorkFlow(OaApi):
         api_path = "/api/workflow/paService/rejectRequest"
         other_params = "{}"
         if node_id:
-            other_params = json.dumps({"RejectToType": 0, "RejectToNodeid": int(node_id)})
+            other_params = json_codec.dumps({"RejectToType": 0, "RejectToNodeid": int(node_id)})
 
         post_data = {"otherParams": other_params, "remark": remark, "requestId": request_id}
         resp = self._post_oa(api_path, post_data=post_data)
@@ -685,14 +1137,12 @@ class OaWorkFlow(OaApi):
         resp = self._get_oa(api_path, params=params)
         _ = {  # noqa
             "code": "SUCCESS",
-            "data": {
-                "chartUrl": """
+            "data": {"chartUrl": """
                 /workflow/workflowDesign/readOnly-index.html?requestid=315470
                 &f_weaver_belongto_userid=1&f_weaver_belongto_usertype=0
                 &isFree=0&isAllowNodeFreeFlow=&isReadOnlyModel=true
                 &isFlowModel=0&hasFreeNode=0&showE9Pic=1&isFromWfForm=true&workflowId=50021
-                """
-            },
+                """},
             "errMsg": {},
         }
         # 获取单点Token
@@ -700,6 +1150,7 @@ class OaWorkFlow(OaApi):
         resp["data"]["chartUrl"] = resp["data"]["chartUrl"] + f"&ssoToken={sso_token}"
         return resp
 
+    @cached_response
     def get_status(self, request_id: str):
         """
         获取流程状态
@@ -712,6 +1163,7 @@ class OaWorkFlow(OaApi):
         # 示例数据 api_example_data.WF_STATUS_DATA_DEMO
         return resp
 
+    @cached_response
     def get_operator_info(self, request_id):
         """
         OA流程明细页 流程状态 数据
@@ -722,6 +1174,7 @@ class OaWorkFlow(OaApi):
         res = self._get_oa(api_path, params={"requestId": request_id})
         return res
 
+    @cached_response
     def get_resources(self, request_id):
         """
         OA流程明细页 相关资源 数据
@@ -732,6 +1185,10 @@ class OaWorkFlow(OaApi):
         api_path = "/api/workflow/paService/getRequestResources"
         params = {"requestId": request_id}
         result = self._get_oa(api_path, params=params)
+        return self._with_resource_type_name(result)
+
+    @staticmethod
+    def _with_resource_type_name(result: dict) -> dict:
         # 示例数据 api_example_data.WF_RESOURCE_DATA_DEMO
         # 资源类型 type
         # 1: 相关流程
@@ -745,17 +1202,22 @@ class OaWorkFlow(OaApi):
             res["typeName"] = type_map[res["type"]]
         return result
 
+    @cached_response
     def get_remark(self, request_id, page=1, page_size=10):
         """
         流程意见
         :return:
         """
         api_path = "/api/workflow/paService/getRequestLog"
-        post_data = {"requestId": request_id, "otherParams": json.dumps({"pageSize": page_size, "pageNumber": page})}
+        post_data = {
+            "requestId": request_id,
+            "otherParams": json_codec.dumps({"pageSize": page_size, "pageNumber": page}),
+        }
         resp = self._get_oa(api_path, params=post_data)
         # 示例数据 api_example_data.WF_REMARK_DATA_DEMO
         return resp
 
+    @cached_response
     def get_info(self, request_id):
         """
         流程信息
@@ -767,6 +1229,7 @@ class OaWorkFlow(OaApi):
         # 示例数据 api_example_data.WF_INFO_DATA_DEMO
         return res
 
+    @invalidates_response
     def transmit(self, request_id, trans_type, user_id: str, remark: str = ""):
         """
         转发、意见征询、转办(对外)
@@ -790,6 +1253,7 @@ class OaWorkFlow(OaApi):
         resp = self._post_oa(api_path, post_data=post_data)
         return resp
 
+    @invalidates_response
     def recover(self, request_id):
         """
         强制收回
@@ -801,3 +1265,72 @@ class OaWorkFlow(OaApi):
         resp = self._post_oa(api_path, post_data=post_data)
         _ = {"code": "SUCCESS", "errMsg": {}}  # noqa
         return resp
+
+    def review_many(self, request_ids: list, remark="", extras: dict = None, max_concurrency: int = None) -> list:
+        """
+        批量提交/审核
+        :param request_ids: OA流程请求ID列表
+        :param max_concurrency: 最大并发数, 默认使用配置BULK_ACTION_MAX_CONCURRENCY
+        :return: 每个流程的处理结果, 见bulk_result
+        """
+        return self._run_many(lambda i: self.review(i, remark=remark, extras=extras), request_ids, max_concurrency)
+
+    def reject_many(self, request_ids: list, node_id: str = "", remark="", max_concurrency: int = None) -> list:
+        """
+        批量退回
+        """
+        return self._run_many(lambda i: self.reject(i, node_id=node_id, remark=remark), request_ids, max_concurrency)
+
+    def transmit_many(
+        self, request_ids: list, trans_type, user_id: str, remark: str = "", max_concurrency: int = None
+    ) -> list:
+        """
+        批量转发、意见征询、转办
+        """
+        return self._run_many(
+            lambda i: self.transmit(i, trans_type, user_id, remark=remark), request_ids, max_concurrency
+        )
+
+    def _run_many(self, action, request_ids: list, max_concurrency: int = None) -> list:
+        request_ids = self._check_bulk_request_ids(request_ids)
+
+        def run(request_id):
+            try:
+                return self.bulk_result(request_id, action(request_id))
+            except Exception as e:
+                return self.bulk_result(request_id, error=e)
+
+        return map_bounded(run, request_ids, max_concurrency or api_settings.BULK_ACTION_MAX_CONCURRENCY)
+
+    def _check_bulk_request_ids(self, request_ids: list) -> list:
+        if not self.encrypt_userid:
+            raise NotImplementedError("调用前请先使用.register_user(OA_USER_ID: str)方法注册当前要操作的OA账号")
+        # 字符串等其他可迭代对象会被逐个字符拆分为流程ID, 不接受
+        if not isinstance(request_ids, (list, tuple)):
+            raise ValidationError({"request_ids": "需为流程请求ID列表"})
+        request_ids = list(request_ids)
+        if len(request_ids) > api_settings.BULK_ACTION_MAX_ITEMS:
+            raise ValidationError({"request_ids": f"单次最多处理{api_settings.BULK_ACTION_MAX_ITEMS}个流程"})
+        return request_ids
+
+    @staticmethod
+    def bulk_result(request_id, resp: dict = None, error: Exception = None) -> dict:
+        """
+        批量操作中单个流程的处理结果
+        :return: {"requestId": , "success": 是否成功, "code": OA返回的code, "errMsg": OA返回的errMsg}
+        """
+        if error is None:
+            resp = resp if isinstance(resp, dict) else {}
+            return {
+                "requestId": request_id,
+                "success": True,
+                "code": resp.get("code", "SUCCESS"),
+                "errMsg": resp.get("errMsg", {}),
+            }
+        if isinstance(error, OaResponseError):
+            code, err_msg = error.oa_code, error.err_msg
+        elif isinstance(error, APIException):
+            code, err_msg = "ERROR", str(error.detail)
+        else:
+            code, err_msg = "ERROR", str(error)
+        return {"requestId": request_id, "success": False, "code": code, "errMsg": err_msg}
@@ -1,10 +1,12 @@
 import datetime
 
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .mixin import OaWFApiViewMixin
+from .resolvers import annotate_operator_names
 
 
 class OaWorkFlowView(OaWFApiViewMixin, APIView):
@@ -73,6 +75,20 @@ class OaWorkFlowView(OaWFApiViewMixin, APIView):
         }
         return Response(res)
 
+    @action(detail=False, url_path="inbox-summary")
+    def inbox_summary(self, request, *args, **kwargs):
+        """
+        待办/待处理/待阅/被退回/已办总数汇总
+        ?workflow_ids=1,2&with_data=1&page_size=5
+        :return: {"todo": {"count": , "data": [...]}, ...}
+        """
+        workflow = request.oa_wf_api
+        workflow_ids = request.GET.get("workflow_ids", "")
+        with_data = request.GET.get("with_data", "") in ("1", "true")
+        page_size = int(request.GET.get("page_size", 10))
+        res = workflow.get_inbox_summary(workflow_ids, with_data=with_data, page_size=page_size)
+        return Response(res)
+
     # @action(detail=False, methods=["POST"])
     # def submit(self, request, *args, **kwargs):
     #     data = request.data
@@ -139,6 +155,33 @@ class OaWorkFlowView(OaWFApiViewMixin, APIView):
         res = workflow.reject(oa_request_id, node_id=data.get("node_id", ""), remark=data.get("remark", ""))
         return Response(res)
 
+    @action(detail=False, methods=["POST"], url_path="bulk-action")
+    def bulk_action(self, request, *args, **kwargs):
+        """
+        批量审核/退回/转发
+        {"action": "review"|"reject"|"transmit", "request_ids": [...], "remark": ""}
+        退回可传node_id, 转发需传trans_type及user_id
+        :return: 每个流程的处理结果 [{"requestId": , "success": , "code": , "errMsg": }, ...]
+        """
+        data = request.data
+        workflow = request.oa_wf_api
+        # 表单提交时request_ids为多个同名字段
+        request_ids = data.getlist("request_ids") if hasattr(data, "getlist") else data.get("request_ids") or []
+        remark = data.get("remark", "")
+        bulk_action = data.get("action")
+        if bulk_action == "review":
+            res = workflow.review_many(request_ids, remark=remark)
+        elif bulk_action == "reject":
+            res = workflow.reject_many(request_ids, node_id=data.get("node_id", ""), remark=remark)
+        elif bulk_action == "transmit":
+            missing = [key for key in ("trans_type", "user_id") if data.get(key) in (None, "")]
+            if missing:
+                raise ValidationError({key: "转发时必填" for key in missing})
+            res = workflow.transmit_many(request_ids, data["trans_type"], data["user_id"], remark=remark)
+        else:
+            raise ValidationError({"action": "可选值: review/reject/transmit"})
+        return Response(res)
+
     @action(detail=True, url_path="oa-remarks")
     def oa_remarks(self, request, oa_request_id, *args, **kwargs):
         """
@@ -158,10 +201,16 @@ class OaWorkFlowView(OaWFApiViewMixin, APIView):
             "h": "转办",
             "i": "流程干预",
         }
-        user_map = request.user.oa_user_map
+        annotate_operator_names(logs["data"])
+        unresolved = [i for i in logs["data"] if not i.get("operatorName")]
+        if unresolved:
+            # 本地OA用户表中未找到的操作人, 回退到项目提供的request.user.oa_user_map
+            user_map = getattr(request.user, "oa_user_map", None) or {}
+            for i in unresolved:
+                if i.get("operator") in user_map:
+                    i["operatorName"] = user_map[i["operator"]]["name"]
         for i in logs["data"]:
             i["operateType"] = log_type.get(i["logtype"], "(未知操作，需要定义)")
-            i["operatorName"] = user_map[i["operator"]]["name"]
         res = {
             "total": 100,
             "page_size": page_size,
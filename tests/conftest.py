@@ -0,0 +1,120 @@
+"""Pytest configuration for `oa_workflow_api` package."""
+import django
+import pytest
+from Crypto.PublicKey import RSA
+from django.conf import settings
+from django.core.management import call_command
+
+
+def pytest_configure():
+    public_key = RSA.generate(1024).publickey().export_key().decode()
+    settings.configure(
+        INSTALLED_APPS=[
+            "django.contrib.auth",
+            "django.contrib.contenttypes",
+            "oa_workflow_api",
+        ],
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        OA_WORKFLOW_API={
+            "APP_ID": "test-app",
+            "APP_RAW_SECRET": "test-secret",
+            "APP_SPK": public_key,
+            "OA_HOST": "http://127.0.0.1:1",
+        },
+    )
+    django.setup()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="run tests/test_benchmarks.py with full iterations and injected latency instead of a quick smoke run",
+    )
+
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    """Create the `oa_workflow_api` tables in the in-memory test database; use with `pytest.mark.usefixtures`."""
+    call_command("migrate", "oa_workflow_api", verbosity=0)
+
+
+@pytest.fixture
+def fake_oa_latency():
+    """Response latency (seconds) of the `fake_oa` server; override in a test module to change it."""
+    return 0.0
+
+
+@pytest.fixture
+def fake_oa_settings():
+    """Extra `OA_WORKFLOW_API` settings used while `fake_oa` runs; override in a test module to change them."""
+    return {}
+
+
+@pytest.fixture
+def fake_oa(fake_oa_latency, fake_oa_settings):
+    """A running `FakeOaServer` with `OA_HOST` pointing at it, starting from an empty cache and no OA token."""
+    from django.core.cache import cache
+    from django.test import override_settings
+
+    from oa_workflow_api.tokens import oa_token_manager
+
+    from .fake_oa import FakeOaServer
+
+    cache.clear()
+    oa_token_manager.clear()
+    with FakeOaServer(latency=fake_oa_latency) as server:
+        oa_settings = dict(settings.OA_WORKFLOW_API, OA_HOST=server.host, **fake_oa_settings)
+        with override_settings(OA_WORKFLOW_API=oa_settings):
+            yield server
+    oa_token_manager.clear()
+
+
+@pytest.fixture
+def fake_workflow():
+    """Factory for `OaWorkFlow` instances that answer `_get_oa`/`_post_oa` locally instead of calling OA.
+
+    `respond(api, data)` returns the OA response (or raises) for the query/form dict `data`. Every call is recorded in
+    `workflow.calls` as `(api, data)`.
+    """
+    from oa_workflow_api.utils import OaWorkFlow
+
+    class FakeOaWorkFlow(OaWorkFlow):
+        def __init__(self, respond, oa_user_id="1"):
+            super().__init__()
+            self.respond = respond
+            self.oa_user_id = oa_user_id
+            self.encrypt_userid = "encrypted"
+            self.calls = []
+
+        def _get_oa(self, api: str, params: dict = None, headers: dict = None, need_json=True, **kwargs):
+            self.calls.append((api, params))
+            return self.respond(api, params)
+
+        def _post_oa(self, api: str, post_data: dict = None, headers: dict = None, need_json=True, **kwargs):
+            self.calls.append((api, post_data))
+            return self.respond(api, post_data)
+
+    return FakeOaWorkFlow
+
+
+@pytest.fixture
+def paged_workflow(fake_workflow):
+    """Factory for `fake_workflow` instances that page through `total` rows of workflow id "1"."""
+    import json
+
+    def make(total):
+        rows = [{"requestId": str(i)} for i in range(total)]
+
+        def respond(api, data):
+            assert json.loads(data["conditions"])["workflowIds"] == "1"
+            if api.endswith("Count"):
+                return str(len(rows))
+            page, page_size = int(data["pageNo"]), int(data["pageSize"])
+            return rows[(page - 1) * page_size : page * page_size]
+
+        return fake_workflow(respond)
+
+    return make
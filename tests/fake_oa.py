@@ -0,0 +1,163 @@
+"""Local stand-in OA server used by the benchmark suite.
+
+The payloads are built from `oa_workflow_api.api_example_data`, so the client parses responses shaped like the real
+OA. Latency and error injection are configurable per server. Like the real OA, every response sets a session cookie for
+the calling user; the `Cookie` header of each request is recorded in `cookies`.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from oa_workflow_api import api_example_data
+
+PA_SERVICE = "/api/workflow/paService/"
+
+# 列表接口使用的示例行, 每行的requestId按序号改写
+LIST_ROWS = {
+    "getToDoWorkflowRequestList": api_example_data.TODO_LIST_DEMO[0],
+    "getDoingWorkflowRequestList": api_example_data.TODO_LIST_DEMO[0],
+    "getToBeReadWorkflowRequestList": api_example_data.TODO_LIST_DEMO[0],
+    "getBeRejectWorkflowRequestList": api_example_data.TODO_LIST_DEMO[0],
+    "getHandledWorkflowRequestList": api_example_data.HANDLED_LIST_DEMO[0],
+}
+
+SUCCESS = {"code": "SUCCESS", "data": {}, "errMsg": {}}
+
+STATIC_PAYLOADS = {
+    "/api/hrm/login/getAccountList": {
+        "data": {"userid": "1", "deptid": 21, "deptname": "公共关系部", "username": "系统管理员"},
+        "status": "1",
+    },
+    PA_SERVICE + "getCreateWorkflowList": api_example_data.CREATE_LIST_DEMO,
+    PA_SERVICE + "getRequestStatus": api_example_data.WF_STATUS_DATA_DEMO,
+    PA_SERVICE + "getRequestLog": api_example_data.WF_REMARK_DATA_DEMO,
+    PA_SERVICE + "getWorkflowRequest": api_example_data.WF_INFO_DATA_DEMO,
+    PA_SERVICE + "getRequestOperatorInfo": {"code": "SUCCESS", "data": [], "errMsg": {}},
+    PA_SERVICE + "getRequestResources": {"code": "SUCCESS", "data": [], "errMsg": {}},
+}
+
+
+class FakeOaServer:
+    """
+    :param latency: 每个请求的响应延迟(秒)
+    :param error_rate: 返回503的概率, 用于验证重试
+    :param total: 各列表接口的总数
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, total: int = 95, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.total = total
+        self.calls = Counter()
+        self.cookies = []
+        self.token = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._payloads = {path: json.dumps(payload).encode() for path, payload in STATIC_PAYLOADS.items()}
+        self._success = json.dumps(SUCCESS).encode()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-oa", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def respond(self, path: str, headers, form: dict):
+        """
+        :return: (HTTP状态码, 响应体)
+        """
+        with self._lock:
+            self.calls[path] += 1
+            self.cookies.append(headers.get("Cookie"))
+        if self.latency:
+            time.sleep(self.latency)
+        if self._should_fail():
+            return 503, b"Service Unavailable"
+
+        if path == "/api/ec/dev/auth/applytoken":
+            with self._lock:
+                self.token = f"fake-token-{self.calls[path]}"
+            body = {"msg": "获取成功!", "code": 0, "msgShowType": "none", "status": True, "token": self.token}
+            return 200, json.dumps(body).encode()
+        if headers.get("token") != self.token:
+            body = {"msg": f"token不存在或者超时：{headers.get('token')}", "code": -1, "status": False}
+            return 200, json.dumps(body, ensure_ascii=False).encode()
+
+        name = path[len(PA_SERVICE) :] if path.startswith(PA_SERVICE) else ""
+        if name.endswith("Count"):
+            return 200, str(self.total).encode()
+        if name in LIST_ROWS:
+            return 200, self._list_page(LIST_ROWS[name], form)
+        if path in self._payloads:
+            return 200, self._payloads[path]
+        return 200, self._success
+
+    def _list_page(self, row: dict, form: dict) -> bytes:
+        page = int(form.get("pageNo", 1))
+        page_size = int(form.get("pageSize", 10))
+        start = min((page - 1) * page_size, self.total)
+        end = min(page * page_size, self.total)
+        return json.dumps([dict(row, requestId=str(100000 + i)) for i in range(start, end)]).encode()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 响应头与响应体分两次写入, 不关闭Nagle时每个请求会多等待一次延迟ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                self._send(*server.respond(url.path, self.headers, _single_values(parse_qs(url.query))))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                form = _single_values(parse_qs(body.decode()))
+                self._send(*server.respond(urlsplit(self.path).path, self.headers, form))
+
+            def _send(self, status: int, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Set-Cookie", f"ecology_JSessionid={self.headers.get('userid', '')}; Path=/")
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def _single_values(query: dict) -> dict:
+    return {key: values[-1] for key, values in query.items()}
@@ -0,0 +1,141 @@
+"""Tests for `oa_workflow_api.async_utils` against a local fake OA server."""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.views import View
+
+pytest.importorskip("httpx")
+
+from oa_workflow_api import async_utils  # noqa: E402
+from oa_workflow_api.async_utils import AsyncOaWorkFlow  # noqa: E402
+from oa_workflow_api.http_pool import async_oa_session_pool  # noqa: E402
+from oa_workflow_api.middleware import AsyncOaWFRequestMiddleware  # noqa: E402
+from oa_workflow_api.mixin import AsyncOaWFApiViewMixin  # noqa: E402
+from oa_workflow_api.retry import CircuitBreaker, get_circuit_breaker  # noqa: E402
+from oa_workflow_api.tokens import oa_token_manager  # noqa: E402
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_oa_session_pool.aclose()
+
+    return asyncio.run(main())
+
+
+def oa_request(path="/"):
+    request = RequestFactory().get(path)
+    request.user = SimpleNamespace(oa_user_id="1")
+    return request
+
+
+def test_async_workflow(fake_oa):
+    async def main():
+        workflow = AsyncOaWorkFlow()
+        await workflow.register_user("1")
+        assert workflow.user["userid"] == "1"
+
+        data, page, total = await workflow.get_todo_list("1", 2, 10)
+        assert (len(data), page, total) == (10, 2, fake_oa.total)
+        assert (await workflow.get_info("1"))["code"] == "SUCCESS"
+        rows = [i async for i in workflow.iter_todo("1", page_size=20)]
+        assert len(rows) == fake_oa.total
+        summary = await workflow.get_inbox_summary("1")
+        assert summary["todo"]["count"] == fake_oa.total
+
+    run(main())
+    # 多个协程/请求只申请一次Token
+    assert fake_oa.calls["/api/ec/dev/auth/applytoken"] == 1
+
+
+def test_async_token_refresh(fake_oa, monkeypatch):
+    async def main():
+        workflow = AsyncOaWorkFlow()
+        await workflow.register_user("1")
+        token = workflow.token
+
+        # 进程内Token有效时不读取django cache
+        monkeypatch.setattr(oa_token_manager, "_read_cache", None)
+        assert await workflow._ensure_token() == token
+        monkeypatch.undo()
+
+        # 临近过期时后台刷新, 任务结束前保持引用
+        oa_token_manager._expires_at = time.time() + 1
+        assert await workflow._ensure_token() == token
+        assert len(async_utils._background_tasks) == 1
+        await asyncio.gather(*async_utils._background_tasks)
+        assert not async_utils._background_tasks
+        assert oa_token_manager.get_local_token() != token
+
+    run(main())
+    assert fake_oa.calls["/api/ec/dev/auth/applytoken"] == 2
+
+
+def test_async_middleware_and_mixin(fake_oa):
+    async def get_response(request):
+        workflow = await request.oa_wf_api
+        return JsonResponse(workflow.user)
+
+    class UserView(AsyncOaWFApiViewMixin, View):
+        async def get(self, request, *args, **kwargs):
+            workflow = await request.oa_wf_api
+            assert workflow is await request.oa_wf_api
+            data, page, total = await workflow.get_todo_list("1", 1, 5)
+            return JsonResponse({"total": total, "results": data})
+
+    async def main():
+        middleware = AsyncOaWFRequestMiddleware(get_response)
+        assert asyncio.iscoroutinefunction(middleware)
+        response = await middleware(oa_request())
+        assert json.loads(response.content)["userid"] == "1"
+
+        response = await UserView.as_view()(oa_request("/todo-list"))
+        res = json.loads(response.content)
+        assert res["total"] == fake_oa.total and len(res["results"]) == 5
+
+    run(main())
+
+
+def test_async_cookies_are_not_shared_between_users(fake_oa):
+    async def main():
+        first, second = AsyncOaWorkFlow(), AsyncOaWorkFlow()
+        await first.register_user("1")
+        await second.register_user("2")
+        await first.get_status("1")
+        await second.get_status("2")
+        assert not async_oa_session_pool.client.cookies
+
+    run(main())
+    # OA返回的会话Cookie不能在其他用户的请求中带回
+    assert len(fake_oa.cookies) >= 3 and not any(fake_oa.cookies)
+
+
+def test_cancelled_probe_is_released(fake_oa, monkeypatch):
+    async def request(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    async def main():
+        workflow = AsyncOaWorkFlow()
+        await workflow.register_user("1")
+        breaker = get_circuit_breaker(workflow.oa_host)
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        breaker._opened_at -= breaker.reset_timeout
+
+        # 探测请求被取消后, 下一个请求重新探测而不是一直熔断
+        with monkeypatch.context() as m:
+            m.setattr(async_oa_session_pool, "request", request)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(workflow.get_status("1"), 0.05)
+        assert (await workflow.get_status("1"))["code"] == "SUCCESS"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    run(main())
@@ -0,0 +1,226 @@
+"""Benchmarks of `OaWorkFlow` and `OaWorkFlowView` against a local fake OA server.
+
+By default every benchmark runs a few iterations as a smoke test. For real numbers run:
+
+    pytest tests/test_benchmarks.py --benchmark -s
+
+JSON_CODEC (json/orjson) is compared on the example payloads by `test_bench_json_codec`.
+"""
+
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from oa_workflow_api import api_example_data, json_codec
+from oa_workflow_api.handler import handle_request
+from oa_workflow_api.utils import OaWorkFlow
+from oa_workflow_api.views import OaWorkFlowView
+
+from .fake_oa import FakeOaServer
+
+# 单次调用除去服务端延迟后客户端自身的耗时上限(秒), 超出视为性能退化
+MAX_CLIENT_OVERHEAD = 0.05
+
+pytestmark = pytest.mark.usefixtures("migrated_db")
+
+
+@pytest.fixture(scope="module")
+def bench(request):
+    if request.config.getoption("--benchmark"):
+        return SimpleNamespace(full=True, iterations=200, concurrency=8, latency=0.01)
+    return SimpleNamespace(full=False, iterations=4, concurrency=2, latency=0.0)
+
+
+@pytest.fixture
+def fake_oa_latency(bench):
+    return bench.latency
+
+
+@pytest.fixture
+def fake_oa_settings():
+    return {"RETRY_BACKOFF_BASE": 0.01, "INBOX_SUMMARY_CACHE_TIMEOUT": 0}
+
+
+def oa_settings(server: FakeOaServer, **kwargs):
+    return override_settings(
+        OA_WORKFLOW_API=dict(
+            settings.OA_WORKFLOW_API,
+            OA_HOST=server.host,
+            RETRY_BACKOFF_BASE=0.01,
+            INBOX_SUMMARY_CACHE_TIMEOUT=0,
+            **kwargs,
+        )
+    )
+
+
+def run_benchmark(name: str, func, iterations: int, concurrency: int) -> dict:
+    """
+    并发执行func(i), 统计每次调用的耗时
+    """
+
+    def timed(i):
+        started_at = time.perf_counter()
+        func(i)
+        return time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - started_at
+    stats = {
+        "calls": iterations,
+        "throughput": iterations / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+        "max": latencies[-1],
+    }
+    print(
+        f"\n{name:<32} {stats['calls']:>5} calls  {stats['throughput']:>8.1f}/s  "
+        f"p50 {stats['p50'] * 1000:>7.2f}ms  p95 {stats['p95'] * 1000:>7.2f}ms  max {stats['max'] * 1000:>7.2f}ms"
+    )
+    return stats
+
+
+def assert_overhead(stats: dict, bench, round_trips: int = 1):
+    if bench.full:
+        assert stats["p50"] - bench.latency * round_trips < MAX_CLIENT_OVERHEAD
+
+
+def new_workflow() -> OaWorkFlow:
+    workflow = OaWorkFlow()
+    workflow.register_user("1")
+    return workflow
+
+
+def test_bench_get_todo_list(fake_oa, bench):
+    workflow = new_workflow()
+    page_count = fake_oa.total // 10
+
+    def call(i):
+        data, page, total = workflow.get_todo_list("1", i % page_count + 1, 10)
+        assert total == fake_oa.total and len(data) == 10
+
+    stats = run_benchmark("get_todo_list", call, bench.iterations, bench.concurrency)
+    assert_overhead(stats, bench, round_trips=2)
+
+
+@pytest.mark.parametrize("method", ["get_info", "get_status", "get_remark"])
+def test_bench_read_methods(fake_oa, bench, method):
+    workflow = new_workflow()
+
+    def call(i):
+        assert getattr(workflow, method)(str(i))["code"] == "SUCCESS"
+
+    stats = run_benchmark(method, call, bench.iterations, bench.concurrency)
+    assert_overhead(stats, bench)
+
+
+def test_bench_inbox_summary(fake_oa, bench):
+    workflow = new_workflow()
+
+    def call(i):
+        res = workflow.get_inbox_summary("1", with_data=True)
+        assert res["todo"]["count"] == fake_oa.total
+
+    # 每次汇总在共享线程池中并发发出10个请求, 多个调用方同时汇总时受CONCURRENT_MAX_WORKERS限制, 这里只测单次汇总的延迟
+    stats = run_benchmark("get_inbox_summary", call, bench.iterations, 1)
+    assert_overhead(stats, bench, round_trips=2)
+
+
+def test_bench_iter_todo_prefetch(fake_oa, bench):
+    workflow = new_workflow()
+    elapsed = {}
+    for prefetch in (0, 4):
+        started_at = time.perf_counter()
+        rows = list(workflow.iter_todo("1", page_size=10, prefetch=prefetch))
+        elapsed[prefetch] = time.perf_counter() - started_at
+        assert len(rows) == fake_oa.total
+        print(f"\niter_todo prefetch={prefetch:<2} {len(rows)} rows  {elapsed[prefetch] * 1000:.2f}ms")
+    if bench.full:
+        assert elapsed[4] < elapsed[0]
+
+
+def test_bench_review_many(fake_oa, bench):
+    workflow = new_workflow()
+    request_ids = [str(i) for i in range(bench.iterations)]
+    started_at = time.perf_counter()
+    res = workflow.review_many(request_ids)
+    elapsed = time.perf_counter() - started_at
+    assert all(i["success"] for i in res)
+    print(f"\nreview_many {len(request_ids)} requests  {len(request_ids) / elapsed:.1f}/s")
+
+
+def test_bench_retries_under_errors(bench):
+    with FakeOaServer(latency=bench.latency, error_rate=0.05) as server:
+        with oa_settings(server, CIRCUIT_BREAKER_FAILURE_THRESHOLD=0):
+            workflow = new_workflow()
+
+            def call(i):
+                assert workflow.get_info(str(i))["code"] == "SUCCESS"
+
+            run_benchmark("get_info (5% 503)", call, bench.iterations, bench.concurrency)
+
+
+@pytest.mark.parametrize(
+    "action, path",
+    [
+        ("todo_list", "/todo-list"),
+        ("inbox_summary", "/inbox-summary?workflow_ids=1"),
+        ("oa_info", "/1/oa-info"),
+        ("oa_remarks", "/1/oa-remarks"),
+    ],
+)
+def test_bench_views(fake_oa, bench, action, path):
+    factory = APIRequestFactory()
+    view = OaWorkFlowView()
+
+    def call(i):
+        django_request = factory.get(path)
+        django_request.user = SimpleNamespace(oa_user_id="1")
+        request = Request(handle_request(django_request))
+        kwargs = {"oa_request_id": "1"} if path.startswith("/1/") else {}
+        assert getattr(view, action)(request, **kwargs).status_code == 200
+
+    concurrency = 1 if action == "inbox_summary" else bench.concurrency
+    stats = run_benchmark(f"OaWorkFlowView.{action}", call, bench.iterations, concurrency)
+    # 注册用户(获取账号信息)及视图本身的请求
+    assert_overhead(stats, bench, round_trips=3)
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson"])
+def test_bench_json_codec(bench, codec):
+    pytest.importorskip(codec)
+    rows = [dict(api_example_data.TODO_LIST_DEMO[0], requestId=str(i)) for i in range(100)]
+    payloads = {
+        "todo list (100 rows)": json.dumps(rows, ensure_ascii=False).encode(),
+        "workflow info": json.dumps(api_example_data.WF_INFO_DATA_DEMO, ensure_ascii=False).encode(),
+    }
+    main_data = [{"fieldName": f"field{i}", "fieldValue": f"值{i}" * 10} for i in range(50)]
+    detail_data = [
+        {
+            "tableDBName": "formtable_main_1_dt1",
+            "workflowRequestTableRecords": [{"recordOrder": 0, "workflowRequestTableFields": main_data}] * 200,
+        }
+    ]
+    iterations = 200 if bench.full else 5
+    with override_settings(OA_WORKFLOW_API=dict(settings.OA_WORKFLOW_API, JSON_CODEC=codec)):
+        for name, body in payloads.items():
+            resp = SimpleNamespace(content=body, text=body.decode())
+            started_at = time.perf_counter()
+            for _ in range(iterations):
+                json_codec.loads_response(resp)
+            elapsed = time.perf_counter() - started_at
+            print(f"\n{codec:<7} loads {name:<24} {len(body) / 1024:>7.1f}KB  {elapsed / iterations * 1e6:>9.1f}us")
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            json_codec.dumps(detail_data)
+        elapsed = time.perf_counter() - started_at
+        print(f"\n{codec:<7} dumps {'detailData (200 rows)':<24} {elapsed / iterations * 1e6:>20.1f}us")
@@ -0,0 +1,39 @@
+"""Tests for bulk workflow actions."""
+
+import threading
+import time
+
+import pytest
+from rest_framework.exceptions import APIException, ValidationError
+
+from oa_workflow_api.exceptions import OaResponseError
+
+
+def test_review_many(fake_workflow):
+    lock = threading.Lock()
+    concurrency = {"in_flight": 0, "max_in_flight": 0}
+
+    def respond(api, data):
+        with lock:
+            concurrency["in_flight"] += 1
+            concurrency["max_in_flight"] = max(concurrency["max_in_flight"], concurrency["in_flight"])
+        time.sleep(0.01)
+        with lock:
+            concurrency["in_flight"] -= 1
+        if data["requestId"] == "2":
+            raise OaResponseError("NO_PERMISSION", {"isremark": 2})
+        if data["requestId"] == "3":
+            raise APIException("网络异常，系统无法连接到OA服务")
+        return {"code": "SUCCESS", "errMsg": {}}
+
+    workflow = fake_workflow(respond)
+    res = workflow.review_many([str(i) for i in range(1, 11)], max_concurrency=3)
+    assert [i["requestId"] for i in res] == [str(i) for i in range(1, 11)]
+    assert res[0] == {"requestId": "1", "success": True, "code": "SUCCESS", "errMsg": {}}
+    assert res[1] == {"requestId": "2", "success": False, "code": "NO_PERMISSION", "errMsg": {"isremark": 2}}
+    assert res[2]["code"] == "ERROR" and not res[2]["success"]
+    assert sum(i["success"] for i in res) == 8
+    assert 1 < concurrency["max_in_flight"] <= 3
+
+    with pytest.raises(ValidationError):
+        workflow.reject_many(["1"] * 201)
@@ -0,0 +1,78 @@
+"""Tests for `oa_workflow_api.caches`."""
+import time
+
+import pytest
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from oa_workflow_api.caches import (
+    DjangoUserInfoCache,
+    LocalTTLCache,
+    LocalUserInfoCache,
+    get_userinfo_cache,
+    invalidate_userinfo,
+)
+
+
+def userinfo_settings(**kwargs):
+    return override_settings(OA_WORKFLOW_API=dict(settings.OA_WORKFLOW_API, **kwargs))
+
+
+def test_lru_eviction():
+    cache = LocalTTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_expiry():
+    cache = LocalTTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=None)
+    time.sleep(0.02)
+    assert "a" not in cache
+    assert cache.get("b") == 2
+
+
+@pytest.mark.parametrize("backend, cache_class", [("local", LocalUserInfoCache), ("django", DjangoUserInfoCache)])
+def test_userinfo_cache_backend(backend, cache_class):
+    with userinfo_settings(USERINFO_CACHE_BACKEND=backend):
+        userinfo_cache = get_userinfo_cache()
+        assert type(userinfo_cache) is cache_class and get_userinfo_cache() is userinfo_cache
+        userinfo_cache.set("1", {"userid": "1"})
+        userinfo_cache.set("2", {"userid": "2"})
+        invalidate_userinfo(1)
+        assert userinfo_cache.get("1") is None and userinfo_cache.get("2") == {"userid": "2"}
+        invalidate_userinfo()
+        assert userinfo_cache.get("2") is None
+
+    with userinfo_settings(USERINFO_CACHE_BACKEND=""):
+        assert get_userinfo_cache() is None
+    with userinfo_settings(USERINFO_CACHE_BACKEND="redis"):
+        with pytest.raises(ImproperlyConfigured):
+            get_userinfo_cache()
+
+
+def test_django_userinfo_cache_version_key():
+    from django.core.cache import cache
+
+    userinfo_cache = DjangoUserInfoCache(timeout=60)
+    userinfo_cache.set("1", {"userid": "1"})
+    version = cache.get(DjangoUserInfoCache.CACHE_VERSION_KEY)
+    assert cache.get(f"{DjangoUserInfoCache.CACHE_KEY_PREFIX}:{version}:1") == {"userid": "1"}
+
+    # 全量失效只递增版本号, 旧版本的数据不再被读取
+    userinfo_cache.invalidate()
+    assert cache.get(DjangoUserInfoCache.CACHE_VERSION_KEY) == version + 1
+    assert userinfo_cache.get("1") is None
+
+    # 版本号被清除(如缓存重启)时重新初始化
+    cache.delete(DjangoUserInfoCache.CACHE_VERSION_KEY)
+    userinfo_cache.invalidate()
+    userinfo_cache.set("1", {"userid": "1"})
+    assert userinfo_cache.get("1") == {"userid": "1"}
@@ -0,0 +1,35 @@
+"""Tests for `oa_workflow_api.core`."""
+
+from oa_workflow_api import tokens
+from oa_workflow_api.caches import invalidate_userinfo
+from oa_workflow_api.core import OaUserContext, get_client_core
+from oa_workflow_api.utils import OaWorkFlow
+
+
+def test_user_context_is_shared(monkeypatch, fake_workflow):
+    userinfo_calls = []
+
+    def respond(api, data):
+        assert api == "/api/hrm/login/getAccountList"
+        userinfo_calls.append(api)
+        return {"data": {"userid": "7", "deptid": 1, "deptname": ""}, "status": "1"}
+
+    monkeypatch.setattr(tokens.oa_token_manager, "get_token", lambda fetch: "token")
+    invalidate_userinfo()
+    assert get_client_core() is get_client_core()
+
+    first = fake_workflow(respond)
+    first.register_user("7")
+    second = fake_workflow(respond)
+    second.register_user(7)
+    assert len(userinfo_calls) == 1
+    assert second.user_context == first.user_context == OaUserContext("7", first.encrypt_userid, first.user)
+    assert second.app_encrypted_secret == first.app_encrypted_secret
+
+    invalidate_userinfo("7")
+    fake_workflow(respond).register_user("7")
+    assert len(userinfo_calls) == 2
+
+    third = OaWorkFlow()
+    third.bind_user(first.user_context)
+    assert third.encrypt_userid == first.encrypt_userid
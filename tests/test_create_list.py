@@ -0,0 +1,38 @@
+"""Tests for `oa_workflow_api.create_list`."""
+
+import json
+
+from oa_workflow_api.create_list import invalidate_create_index
+
+WORKFLOWS = [
+    {"workflowId": "1", "workflowName": "采购申请", "workflowTypeId": "10", "workflowTypeName": "采购"},
+    {"workflowId": "2", "workflowName": "请假申请", "workflowTypeId": "20", "workflowTypeName": "行政"},
+    {"workflowId": "3", "workflowName": "采购变更", "workflowTypeId": "10", "workflowTypeName": "采购"},
+]
+
+
+def respond(api, data):
+    return [dict(i) for i in WORKFLOWS]
+
+
+def conditions(workflow) -> list:
+    return [json.loads(data["conditions"]) for _, data in workflow.calls]
+
+
+def test_create_index(fake_workflow):
+    invalidate_create_index()
+    workflow = fake_workflow(respond, "1")
+    groups = workflow.get_create_list()
+    assert [(i["workflowTypeName"], len(i["workflows"])) for i in groups] == [("行政", 1), ("采购", 2)]
+    assert conditions(workflow) == [{"wfTypeIds": "1"}]
+
+    index = workflow.get_create_index()
+    assert workflow.can_create_workflow("3") and not workflow.can_create_workflow(4)
+    assert [i["workflowId"] for i in index.get_by_type(10)] == ["1", "3"]
+    assert {i["workflowId"] for i in index.search("采购")} == {"1", "3"}
+    assert index.search("报销") == []
+    assert len(workflow.calls) == 1
+
+    workflow.get_create_list(type_ids=[10, 20])
+    fake_workflow(respond, "2").get_create_list()
+    assert conditions(workflow)[-1] == {"wfTypeIds": "10,20"}
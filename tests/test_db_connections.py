@@ -0,0 +1,104 @@
+"""Tests for `oa_workflow_api.db_connections`."""
+
+import oracledb
+
+from oa_workflow_api import db_connections
+
+
+class FakePool:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.opened = 0
+        self.busy = 0
+        self.closed = False
+
+    def acquire(self):
+        self.opened = max(self.opened, self.busy + 1)
+        self.busy += 1
+        return object()
+
+    def release(self, connection):
+        self.busy -= 1
+
+    def close(self, force=False):
+        self.closed = True
+
+
+def test_pool_is_shared_and_connections_released(monkeypatch):
+    pools = []
+
+    def create_pool(**kwargs):
+        pools.append(FakePool(**kwargs))
+        return pools[-1]
+
+    monkeypatch.setattr(oracledb, "create_pool", create_pool)
+    db_connections.close_oa_oracle_pool()
+    try:
+        for _ in range(3):
+            with db_connections.oa_oracle_connection():
+                assert db_connections.get_db_pool_stats()["busy"] == 1
+        assert len(pools) == 1
+        assert pools[0].kwargs["max"] == 4
+        stats = db_connections.get_db_pool_stats()
+        assert stats["created"] and stats["opened"] == 1 and stats["busy"] == 0
+    finally:
+        db_connections.close_oa_oracle_pool()
+    assert pools[0].closed
+    assert not db_connections.get_db_pool_stats()["created"]
+
+
+def test_in_bind_chunks_are_bucketed():
+    from oa_workflow_api.utils import FetchOaDbHandler
+
+    chunks = list(FetchOaDbHandler._in_bind_chunks([f"A{i}" for i in range(1005)]))
+    assert [len(i) for i in chunks] == [1000, 8]
+    assert chunks[1][:5] == ["A1000", "A1001", "A1002", "A1003", "A1004"]
+    assert chunks[1][5:] == [None] * 3
+    assert [len(i) for i in FetchOaDbHandler._in_bind_chunks(["A1"])] == [1]
+
+
+def test_iter_all_oa_users_streams_rows(monkeypatch):
+    from contextlib import contextmanager
+
+    from django.conf import settings
+    from django.test import override_settings
+
+    from oa_workflow_api import utils
+
+    oa_settings = dict(
+        settings.OA_WORKFLOW_API,
+        OA_DB_USER="u",
+        OA_DB_PASSWORD="p",
+        OA_DB_HOST="h",
+        OA_DB_PORT=1521,
+        OA_DB_SERVER_NAME="s",
+        OA_DB_FETCH_ARRAYSIZE=2,
+    )
+
+    class FakeCursor:
+        description = [("ID",), ("LOGINID",)]
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def execute(self, sql):
+            self.rows = iter([(1, "A1"), (2, "A2"), (3, "A3")])
+
+        def __iter__(self):
+            return self.rows
+
+    cursor = FakeCursor()
+
+    @contextmanager
+    def fake_connection():
+        yield type("Connection", (), {"cursor": lambda self: cursor})()
+
+    monkeypatch.setattr(utils, "oa_oracle_connection", fake_connection)
+    with override_settings(OA_WORKFLOW_API=oa_settings):
+        rows = utils.FetchOaDbHandler.iter_all_oa_users(capital=False)
+        assert next(rows) == {"id": 1, "loginid": "A1"}
+        assert cursor.arraysize == 2 and cursor.prefetchrows == 3
+        assert list(utils.FetchOaDbHandler.iter_all_oa_users(as_dict=False))[-1] == (3, "A3")
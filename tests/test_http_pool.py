@@ -0,0 +1,72 @@
+"""Tests for `oa_workflow_api.http_pool`."""
+
+from types import SimpleNamespace
+
+import requests as system_requests
+from django.conf import settings
+from django.test import override_settings
+
+from oa_workflow_api.http_pool import oa_session_pool
+from oa_workflow_api.utils import OaWorkFlow
+
+from .fake_oa import FakeOaServer
+
+
+def test_workflows_share_session(monkeypatch):
+    with FakeOaServer() as server:
+        oa_settings = dict(settings.OA_WORKFLOW_API, OA_HOST=server.host, HTTP_POOL_MAXSIZE=7)
+        with override_settings(OA_WORKFLOW_API=oa_settings):
+            first, second = OaWorkFlow(), OaWorkFlow()
+            first.register_user("1")
+            second.register_user("2")
+            assert first.get_status("1")["code"] == second.get_status("2")["code"] == "SUCCESS"
+
+            session = oa_session_pool.session
+            assert oa_session_pool._adapter._pool_maxsize == 7
+            assert session.get_adapter(server.host) is oa_session_pool._adapter
+            stats = oa_session_pool.stats()
+            assert stats["total_requests"] >= 4 and stats["hosts"][0]["num_connections"] >= 1
+            assert server.calls["/api/ec/dev/auth/applytoken"] <= 1
+
+            # 子进程(PID变化)不复用父进程的连接
+            monkeypatch.setattr("os.getpid", lambda: -1)
+            assert oa_session_pool.session is not session
+            assert oa_session_pool.stats()["total_requests"] == 0
+
+
+def test_cookies_are_not_shared_between_users():
+    with FakeOaServer() as server:
+        with override_settings(OA_WORKFLOW_API=dict(settings.OA_WORKFLOW_API, OA_HOST=server.host)):
+            first, second = OaWorkFlow(), OaWorkFlow()
+            first.register_user("1")
+            second.register_user("2")
+            first.get_status("1")
+            second.get_status("2")
+            assert not oa_session_pool.session.cookies
+    # OA返回的会话Cookie不能在其他用户的请求中带回
+    assert len(server.cookies) >= 3 and not any(server.cookies)
+
+
+def test_custom_requests_library_without_session():
+    logged = []
+
+    def get(url, **kwargs):
+        logged.append(url)
+        return system_requests.get(url, **kwargs)
+
+    def post(url, **kwargs):
+        logged.append(url)
+        return system_requests.post(url, **kwargs)
+
+    # 只封装了get/post(如记录请求日志)的requests包不能被连接池绕过
+    with FakeOaServer() as server:
+        oa_settings = dict(
+            settings.OA_WORKFLOW_API, OA_HOST=server.host, REQUESTS_LIBRARY=SimpleNamespace(get=get, post=post)
+        )
+        with override_settings(OA_WORKFLOW_API=oa_settings):
+            pooled = oa_session_pool.stats()["total_requests"]
+            workflow = OaWorkFlow()
+            workflow.register_user("1")
+            assert workflow.get_status("1")["code"] == "SUCCESS"
+            assert oa_session_pool.stats()["total_requests"] == pooled
+    assert f"{server.host}/api/workflow/paService/getRequestStatus" in logged
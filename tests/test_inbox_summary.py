@@ -0,0 +1,34 @@
+"""Tests for `OaWorkFlow.get_inbox_summary`."""
+
+import json
+
+from django.core.cache import cache
+
+from oa_workflow_api.utils import OaWorkFlow
+
+COUNTS = {"todo": 3, "doing": 0, "unread": 2, "rejected": 1, "handled": 7}
+
+
+def respond(api, data):
+    assert json.loads(data["conditions"])["workflowIds"] == "1,2"
+    kind = next(k for k, apis in OaWorkFlow.INBOX_LIST_APIS.items() if api in apis)
+    if api.endswith("Count"):
+        return str(COUNTS[kind])
+    return [{"requestId": f"{kind}-{i}"} for i in range(min(COUNTS[kind], int(data["pageSize"])))]
+
+
+def test_inbox_summary(fake_workflow):
+    cache.clear()
+    workflow = fake_workflow(respond, "1")
+    res = workflow.get_inbox_summary(["1", "2"])
+    assert res == {kind: {"count": count} for kind, count in COUNTS.items()}
+    assert len(workflow.calls) == 5
+
+    res = workflow.get_inbox_summary("1,2", with_data=True, page_size=2, kinds=["todo", "doing"])
+    assert res["todo"] == {"count": 3, "data": [{"requestId": "todo-0"}, {"requestId": "todo-1"}]}
+    assert res["doing"] == {"count": 0, "data": []}
+    assert len(workflow.calls) == 9
+
+    # 短时缓存
+    workflow.get_inbox_summary("1,2", with_data=True, page_size=2, kinds=["todo", "doing"])
+    assert len(workflow.calls) == 9
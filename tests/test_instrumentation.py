@@ -0,0 +1,88 @@
+"""Tests for `oa_workflow_api.instrumentation`."""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+
+from oa_workflow_api.instrumentation import Histogram, MetricsCollector, OaApiCall
+from oa_workflow_api.retry import RetryPolicy, RetryState
+from oa_workflow_api.signals import oa_api_called
+from oa_workflow_api.tokens import oa_token_manager
+from oa_workflow_api.utils import OaWorkFlow
+
+from .fake_oa import FakeOaServer
+
+
+def test_histogram_is_cumulative():
+    histogram = Histogram([0.1, 1])
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.1, 2), (1, 3), ("+Inf", 4)]
+    assert histogram.sum == 3.65
+
+
+def test_collector_aggregates_calls():
+    collector = MetricsCollector()
+    event = {
+        "api_path": "/api/a",
+        "status": "200",
+        "duration": 0.2,
+        "ttfb": 0.1,
+        "response_size": 10,
+        "attempts": 2,
+        "token_refreshes": 1,
+    }
+    collector.observe(event)
+    collector.observe(dict(event, status="error", ttfb=None, attempts=1, token_refreshes=0))
+    res = collector.snapshot()["/api/a"]
+    assert res["requests"] == {"200": 1, "error": 1}
+    assert (res["response_bytes"], res["retries"], res["token_refreshes"]) == (20, 1, 1)
+    assert res["duration_buckets"][-1] == ("+Inf", 2)
+    assert 'oa_api_requests_total{api_path="/api/a",status="error"} 1' in collector.render()
+
+
+def test_call_is_published():
+    events = []
+
+    def receiver(sender, **kwargs):
+        events.append(kwargs)
+
+    oa_api_called.connect(receiver)
+    try:
+        OaApiCall("/api/a", "GET").finish(RetryState(RetryPolicy()), error=ValueError())
+    finally:
+        oa_api_called.disconnect(receiver)
+    assert events[0]["status"] == "error" and events[0]["error"] == "ValueError"
+
+
+def test_failing_receiver_does_not_fail_call(caplog):
+    events = []
+
+    def receiver(sender, **kwargs):
+        events.append(kwargs)
+
+    def failing_receiver(sender, **kwargs):
+        raise RuntimeError("receiver failed")
+
+    cache.clear()
+    oa_token_manager.clear()
+    oa_api_called.connect(receiver)
+    oa_api_called.connect(failing_receiver)
+    try:
+        with FakeOaServer() as server:
+            with override_settings(OA_WORKFLOW_API=dict(settings.OA_WORKFLOW_API, OA_HOST=server.host)):
+                workflow = OaWorkFlow()
+                workflow.register_user("1")
+                events.clear()
+                with caplog.at_level(logging.ERROR, logger="oa_workflow_api.instrumentation"):
+                    assert workflow.get_status("1")["code"] == "SUCCESS"
+    finally:
+        oa_api_called.disconnect(receiver)
+        oa_api_called.disconnect(failing_receiver)
+        oa_token_manager.clear()
+    # 接收方异常被记录, 事件只发送一次
+    assert [i["api_path"] for i in events] == ["/api/workflow/paService/getRequestStatus"]
+    assert events[0]["status"] == "200" and events[0]["error"] is None
+    assert "receiver failed" in caplog.text
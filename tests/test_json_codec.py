@@ -0,0 +1,38 @@
+"""Tests for `oa_workflow_api.json_codec`."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+from oa_workflow_api import json_codec
+from oa_workflow_api.api_example_data import TODO_LIST_DEMO
+
+
+def codec_settings(codec: str):
+    return override_settings(OA_WORKFLOW_API=dict(settings.OA_WORKFLOW_API, JSON_CODEC=codec))
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson"])
+def test_codec_round_trip(codec):
+    pytest.importorskip(codec)
+    with codec_settings(codec):
+        body = json.dumps(TODO_LIST_DEMO, ensure_ascii=False).encode()
+        resp = SimpleNamespace(content=body, text=body.decode())
+        assert json_codec.loads_response(resp) == TODO_LIST_DEMO
+
+        encoded = json_codec.dumps([{"fieldName": "bz", "fieldValue": "备注"}])
+        assert type(encoded) is str and json.loads(encoded) == [{"fieldName": "bz", "fieldValue": "备注"}]
+        # orjson不支持非str键, 回退到标准库json
+        assert json.loads(json_codec.dumps({1: "a"})) == {"1": "a"}
+
+        with pytest.raises(ValueError):
+            json_codec.loads_response(SimpleNamespace(content=b"<html>", text="<html>"))
+
+
+def test_loads_response_declared_encoding():
+    text = json.dumps({"deptname": "公共关系部"}, ensure_ascii=False)
+    resp = SimpleNamespace(content=text.encode("gbk"), text=text)
+    assert json_codec.loads_response(resp) == {"deptname": "公共关系部"}
@@ -0,0 +1,40 @@
+"""Tests for `OaApi._page_data`."""
+
+import pytest
+
+
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_page_data_with_count(concurrent, paged_workflow):
+    workflow = paged_workflow(25)
+    data, page, total = workflow.get_todo_list("1", 3, 10, concurrent=concurrent)
+    assert [i["requestId"] for i in data] == [str(i) for i in range(20, 25)]
+    assert (page, total) == (3, 25)
+
+    data, page, total = workflow.get_todo_list("1", 4, 10, concurrent=concurrent)
+    assert (data, total) == ([], 25)
+
+
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_page_data_without_count(concurrent, paged_workflow):
+    workflow = paged_workflow(20)
+    data, _, has_more = workflow.get_todo_list("1", 1, 10, concurrent=concurrent, with_count=False)
+    assert len(data) == 10 and has_more
+    assert len(workflow.calls) == 1
+
+    data, _, has_more = workflow.get_todo_list("1", 2, 10, concurrent=concurrent, with_count=False)
+    assert [i["requestId"] for i in data] == [str(i) for i in range(10, 20)]
+    assert not has_more
+    assert not any(api.endswith("Count") for api, _ in workflow.calls)
+
+
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_iter_page_data(prefetch, paged_workflow):
+    workflow = paged_workflow(25)
+    rows = list(workflow.iter_todo("1", page_size=10, prefetch=prefetch))
+    assert [i["requestId"] for i in rows] == [str(i) for i in range(25)]
+    assert len(workflow.calls) == 4
+
+    workflow = paged_workflow(25)
+    rows = list(workflow.iter_todo("1", page_size=10, prefetch=prefetch, max_items=12))
+    assert [i["requestId"] for i in rows] == [str(i) for i in range(12)]
+    assert len(workflow.calls) == 3
@@ -0,0 +1,31 @@
+"""Tests for `oa_workflow_api.records`."""
+
+import json
+import pickle
+
+from rest_framework.renderers import JSONRenderer
+
+from oa_workflow_api.api_example_data import TODO_LIST_DEMO
+from oa_workflow_api.records import WorkflowRequestRecord
+
+
+def test_record_round_trip():
+    rows = [dict(TODO_LIST_DEMO[0], requestId=str(i)) for i in range(3)]
+    records = WorkflowRequestRecord.from_list(json.loads(json.dumps(rows)))
+    record = records[1]
+    assert (record.request_id, record.workflow_id, record.current_node_name) == ("1", "51022", "创建")
+    assert record["requestName"] == "NBJ2-Leslie-202308040005" and record.get("missing") is None
+    assert record.to_dict() == rows[1] and record == rows[1]
+    # 字段相同的行共享字段名, 相同的字符串值只保留一份
+    assert records[0]._layout is records[2]._layout
+    assert records[0].create_time is records[2].create_time
+
+    restored = pickle.loads(pickle.dumps(record))
+    assert restored == record and restored._layout is record._layout
+    assert json.loads(JSONRenderer().render(records)) == rows
+
+
+def test_iter_as_records(paged_workflow):
+    workflow = paged_workflow(25)
+    records = list(workflow.iter_todo("1", page_size=10, as_records=True))
+    assert [i.request_id for i in records] == [str(i) for i in range(25)]
@@ -0,0 +1,80 @@
+"""Tests for `oa_workflow_api.resolvers`."""
+
+import pytest
+
+from oa_workflow_api import tasks
+from oa_workflow_api.models import OaUserInfo
+from oa_workflow_api.resolvers import OaUser, oa_user_index
+from oa_workflow_api.utils import FetchOaDbHandler
+
+pytestmark = pytest.mark.usefixtures("migrated_db")
+
+
+def test_resolve_work_code_uses_synced_users(monkeypatch):
+    OaUserInfo.objects.all().delete()
+    oa_users = [{"ID": 1, "LOGINID": "A1", "DEPARTMENTID": 7, "LASTNAME": "张三", "DEPARTMENTNAME": "研发部"}]
+    monkeypatch.setattr(tasks.FetchOaDbHandler, "iter_all_oa_users", classmethod(lambda cls: iter(oa_users)))
+    oracle_lookups = []
+    monkeypatch.setattr(
+        FetchOaDbHandler,
+        "get_oa_user_id_by_work_code",
+        classmethod(lambda cls, job_code: oracle_lookups.append(job_code) or (None, None)),
+    )
+    tasks.sync_oa_users()
+
+    assert FetchOaDbHandler.resolve_work_code("A1") == (1, 7)
+    assert oa_user_index.get_by_user_id("1") == OaUser(1, "A1", 7, "张三", "研发部")
+    assert oracle_lookups == []
+
+    # 同步后索引随之更新, 离职用户回退到OA数据库查询
+    oa_users[0] = {"ID": 2, "LOGINID": "A2", "DEPARTMENTID": 7, "LASTNAME": "李四", "DEPARTMENTNAME": "研发部"}
+    tasks.sync_oa_users()
+    assert FetchOaDbHandler.resolve_work_code("A1") == (None, None)
+    assert oracle_lookups == ["A1"]
+    assert FetchOaDbHandler.resolve_work_code("A2") == (2, 7)
+
+
+def test_annotate_operator_names():
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from oa_workflow_api.resolvers import annotate_operator_names
+
+    OaUserInfo.objects.all().delete()
+    OaUserInfo.objects.create(user_id=1, name="张三")
+    OaUserInfo.objects.create(user_id=2, name="李四", is_active=False)
+    oa_user_index.invalidate()
+    logs = [{"operator": "1"}, {"operator": "2"}, {"operator": "2"}, {"operator": "3"}, {}]
+    annotate_operator_names(logs)
+    assert [i.get("operatorName") for i in logs] == ["张三", "李四", "李四", "", None]
+
+    # 未命中索引的用户已缓存, 再次解析不查询数据库
+    with CaptureQueriesContext(connection) as queries:
+        annotate_operator_names(logs)
+    assert len(queries) == 0
+
+
+def test_unavailable_index_backs_off(monkeypatch):
+    from django.db import DatabaseError
+
+    from oa_workflow_api.resolvers import OaUserIndex
+
+    loads = []
+
+    def broken_load():
+        loads.append(True)
+        raise DatabaseError("no such table")
+
+    index = OaUserIndex()
+    monkeypatch.setattr(index, "_load", broken_load)
+    assert index.get_by_staff_code("A1") is None
+    assert index.get_by_user_id("1") is None
+    assert index.get_many_by_user_id(["1", "2"]) == {}
+    # 加载失败后在检查间隔内不再查询数据库
+    assert len(loads) == 1
+    index.invalidate()
+    assert index.get_by_user_id("1") is None
+    assert len(loads) == 2
+
+    assert oa_user_index.get_by_user_id("A0009527") is None
+    assert oa_user_index.get_many_by_user_id(["A0009527", None]) == {}
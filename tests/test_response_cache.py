@@ -0,0 +1,39 @@
+"""Tests for `oa_workflow_api.response_cache`."""
+
+import itertools
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+
+
+def test_response_cache_invalidated_by_actions(fake_workflow):
+    counter = itertools.count(1)
+
+    def respond(api, data):
+        return {"code": "SUCCESS", "data": {"calls": next(counter)}, "errMsg": {}}
+
+    cache.clear()
+    oa_settings = dict(settings.OA_WORKFLOW_API, RESPONSE_CACHE_TIMEOUTS={"get_info": 60, "get_remark": 60})
+    with override_settings(OA_WORKFLOW_API=oa_settings):
+        workflow = fake_workflow(respond, "1")
+        assert workflow.get_info("100") == workflow.get_info("100")
+        workflow.get_info("200")
+        workflow.get_remark("100", page=1)
+        workflow.get_remark("100", page=2)
+        workflow.get_status("100")
+        workflow.get_status("100")
+        assert len(workflow.calls) == 6
+
+        # 不同OA用户不共用缓存
+        fake_workflow(respond, "2").get_info("100")
+        assert len(workflow.calls) == 6
+
+        # 其他客户端审核后该流程的缓存失效, 其他流程不受影响
+        fake_workflow(respond, "2").review("100")
+        workflow.get_info("100")
+        workflow.get_info("200")
+        assert len(workflow.calls) == 7
+
+    workflow.get_info("100")
+    assert len(workflow.calls) == 8
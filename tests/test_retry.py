@@ -0,0 +1,162 @@
+"""Tests for `oa_workflow_api.retry`."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.exceptions import APIException
+
+from oa_workflow_api.exceptions import OaCircuitOpenError
+from oa_workflow_api.http_pool import oa_session_pool
+from oa_workflow_api.retry import (
+    CircuitBreaker,
+    RetryPolicy,
+    RetryState,
+    deadline_scope,
+    get_circuit_breaker,
+    get_deadline,
+)
+from oa_workflow_api.utils import OaWorkFlow
+
+
+def test_retry_is_bounded():
+    state = RetryState(RetryPolicy(max_attempts=3, backoff_base=0.1, jitter=False))
+    delays = []
+    while True:
+        state.before_attempt()
+        delay = state.on_transient_error()
+        if delay is None:
+            break
+        delays.append(delay)
+    assert delays == [0.1, 0.2]
+    assert state.attempts == 3
+
+    state = RetryState(RetryPolicy(max_attempts=3))
+    state.before_attempt()
+    assert state.on_transient_error(retryable=False) is None
+
+
+def test_token_refreshes_are_bounded():
+    state = RetryState(RetryPolicy(max_token_refreshes=2))
+    assert [state.can_refresh_token() for _ in range(3)] == [True, True, False]
+
+
+def test_circuit_breaker_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # 冷却结束后只放行一个探测请求
+    breaker.before_request()
+    with pytest.raises(OaCircuitOpenError):
+        breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    with pytest.raises(OaCircuitOpenError):
+        breaker.before_request()
+
+
+def test_deadline_is_propagated():
+    policy = RetryPolicy(deadline=10)
+    outer = RetryState(policy, timeout=(1, 2))
+    with deadline_scope(outer.deadline_at):
+        # 嵌套调用(如刷新Token)不会超过外层调用的截止时间
+        inner = RetryState(RetryPolicy(deadline=60), timeout=(1, 2))
+        assert inner.deadline_at == outer.deadline_at
+        assert inner.attempt_timeout((1, 2)) == (1, 2)
+    assert get_deadline() is None
+
+    # 截止时间不小于单次请求的超时
+    state = RetryState(RetryPolicy(deadline=1), timeout=(5, 120))
+    assert state.remaining > 120
+
+    state = RetryState(RetryPolicy(deadline=0))
+    with pytest.raises(APIException):
+        state.attempt_timeout((1, 2))
+
+
+def fake_responses(monkeypatch, status_code=503, error=None):
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(method)
+        if error is not None:
+            raise error
+        return SimpleNamespace(status_code=status_code, content=b"", text="")
+
+    monkeypatch.setattr(oa_session_pool, "request", request)
+    return calls
+
+
+def retry_settings():
+    return override_settings(
+        OA_WORKFLOW_API=dict(settings.OA_WORKFLOW_API, RETRY_BACKOFF_BASE=0, CIRCUIT_BREAKER_FAILURE_THRESHOLD=5)
+    )
+
+
+@pytest.mark.parametrize("method, attempts", [("GET", 3), ("POST", 1)])
+def test_retryable_status_retries_only_get(monkeypatch, method, attempts):
+    calls = fake_responses(monkeypatch, status_code=502)
+    with retry_settings():
+        workflow = OaWorkFlow()
+        request = workflow._get_oa if method == "GET" else workflow._post_oa
+        with pytest.raises(APIException):
+            request("/api/workflow/paService/reviewRequest", headers={"token": "token"})
+    # 网关502时POST(审核/退回/转发等)可能已被OA处理, 重试会重复操作
+    assert calls == [method] * attempts
+
+
+def test_non_transport_errors_do_not_trip_breaker(monkeypatch):
+    calls = fake_responses(monkeypatch, error=TypeError("unexpected keyword argument"))
+    with retry_settings():
+        workflow = OaWorkFlow()
+        for _ in range(6):
+            with pytest.raises(APIException):
+                workflow._get_oa("/api/workflow/paService/getWorkflowRequest", headers={"token": "token"})
+        assert get_circuit_breaker(workflow.oa_host).state == CircuitBreaker.CLOSED
+    assert len(calls) == 6
+
+
+def test_failed_probe_is_released(monkeypatch):
+    calls = fake_responses(monkeypatch, error=TypeError("unexpected keyword argument"))
+    with retry_settings():
+        workflow = OaWorkFlow()
+        breaker = get_circuit_breaker(workflow.oa_host)
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        breaker._opened_at -= breaker.reset_timeout
+
+        # 探测请求因非网络异常失败, 熔断器不能一直停留在HALF_OPEN
+        for _ in range(2):
+            with pytest.raises(APIException) as excinfo:
+                workflow._get_oa("/api/workflow/paService/getWorkflowRequest", headers={"token": "token"})
+            assert not isinstance(excinfo.value, OaCircuitOpenError)
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert len(calls) == 2
+
+
+def test_expired_deadline_does_not_take_probe(monkeypatch):
+    calls = fake_responses(monkeypatch, status_code=200)
+    with retry_settings():
+        workflow = OaWorkFlow()
+        breaker = get_circuit_breaker(workflow.oa_host)
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        breaker._opened_at -= breaker.reset_timeout
+
+        # 嵌套调用(如刷新Token)继承了已过期的截止时间
+        with deadline_scope(time.monotonic() - 1):
+            with pytest.raises(APIException, match="超时"):
+                workflow._get_oa(
+                    "/api/workflow/paService/getWorkflowRequest", headers={"token": "token"}, need_json=False
+                )
+        workflow._get_oa("/api/workflow/paService/getWorkflowRequest", headers={"token": "token"}, need_json=False)
+        assert breaker.state == CircuitBreaker.CLOSED
+    assert len(calls) == 1
@@ -0,0 +1,84 @@
+"""Tests for `oa_workflow_api.tasks`."""
+
+import pytest
+
+from oa_workflow_api import tasks
+from oa_workflow_api.models import OaUserInfo
+
+pytestmark = pytest.mark.usefixtures("migrated_db")
+
+
+def oa_user(user_id, name, dept_name="研发部"):
+    return {"ID": user_id, "LOGINID": f"A{user_id}", "DEPARTMENTID": 1, "LASTNAME": name, "DEPARTMENTNAME": dept_name}
+
+
+def test_delta_sync(monkeypatch):
+    OaUserInfo.objects.all().delete()
+    oa_users = [oa_user(1, "张三"), oa_user(2, "李四"), oa_user(3, "王五")]
+    monkeypatch.setattr(tasks.FetchOaDbHandler, "iter_all_oa_users", classmethod(lambda cls: iter(oa_users)))
+
+    assert tasks.sync_oa_users() == {"inserted": 3, "updated": 0, "unchanged": 0, "removed": 0}
+    assert tasks.sync_oa_users() == {"inserted": 0, "updated": 0, "unchanged": 3, "removed": 0}
+
+    oa_users[:] = [oa_user(1, "张三", "财务部"), oa_user(2, "李四"), oa_user(4, "赵六")]
+    assert tasks.sync_oa_users() == {"inserted": 1, "updated": 1, "unchanged": 1, "removed": 1}
+    assert OaUserInfo.objects.get(pk=1).dept_name == "财务部"
+    assert not OaUserInfo.objects.get(pk=3).is_active
+    assert tasks.sync_oa_users()["removed"] == 0
+
+    # 重新出现的用户恢复为有效
+    oa_users.append(oa_user(3, "王五"))
+    assert tasks.sync_oa_users()["updated"] == 1
+    assert OaUserInfo.objects.get(pk=3).is_active
+
+    assert tasks.sync_oa_users(full=True)["updated"] == 4
+
+
+def test_batched_pipeline_sync(monkeypatch):
+    from django.conf import settings
+    from django.test import override_settings
+
+    OaUserInfo.objects.all().delete()
+    oa_users = [oa_user(i, f"用户{i}") for i in range(1, 8)]
+    monkeypatch.setattr(tasks.FetchOaDbHandler, "iter_all_oa_users", classmethod(lambda cls: iter(oa_users)))
+    batches = []
+    bulk_create = OaUserInfo.objects.bulk_create
+
+    def record_bulk_create(objs, **kwargs):
+        batches.append(len(objs))
+        return bulk_create(objs, **kwargs)
+
+    monkeypatch.setattr(OaUserInfo.objects, "bulk_create", record_bulk_create)
+    oa_settings = dict(settings.OA_WORKFLOW_API, SYNC_OA_USER_BATCH_SIZE=3, SYNC_OA_USER_PIPELINE=True)
+    with override_settings(OA_WORKFLOW_API=oa_settings):
+        assert tasks.sync_oa_users()["inserted"] == 7
+    assert batches == [3, 3, 1]
+    assert OaUserInfo.objects.count() == 7
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_failed_write_closes_source(monkeypatch, pipeline):
+    from django.conf import settings
+    from django.test import override_settings
+
+    OaUserInfo.objects.all().delete()
+    closed = []
+
+    def iter_all_oa_users(cls):
+        try:
+            for i in range(1, 10):
+                yield oa_user(i, f"用户{i}")
+        finally:
+            closed.append(True)
+
+    def failing_bulk_create(objs, **kwargs):
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(tasks.FetchOaDbHandler, "iter_all_oa_users", classmethod(iter_all_oa_users))
+    monkeypatch.setattr(OaUserInfo.objects, "bulk_create", failing_bulk_create)
+    oa_settings = dict(settings.OA_WORKFLOW_API, SYNC_OA_USER_BATCH_SIZE=3, SYNC_OA_USER_PIPELINE=pipeline)
+    with override_settings(OA_WORKFLOW_API=oa_settings):
+        with pytest.raises(RuntimeError) as excinfo:
+            tasks.sync_oa_users()
+    # 异常(及其引用的栈帧)仍存活时, 读取OA数据库的生成器已关闭
+    assert closed == [True] and excinfo.traceback
@@ -0,0 +1,99 @@
+"""Tests for `oa_workflow_api.tokens`."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.exceptions import APIException
+
+from oa_workflow_api.retry import deadline_scope, get_deadline
+from oa_workflow_api.tokens import OaTokenManager
+
+
+def test_refresh_is_single_flight():
+    cache.clear()
+    manager = OaTokenManager()
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch(expr):
+        time.sleep(0.05)
+        with lock:
+            fetched.append(expr)
+            return f"token-{len(fetched)}"
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        tokens = set(executor.map(lambda _: manager.refresh(fetch, stale_token="expired"), range(20)))
+    assert tokens == {"token-1"}
+    assert len(fetched) == 1
+
+    # 其他进程刷新后, 持有旧Token的调用方直接使用新Token
+    other = OaTokenManager()
+    assert other.refresh(fetch, stale_token="expired") == "token-1"
+    assert len(fetched) == 1
+    assert other.refresh(fetch, stale_token="token-1") == "token-2"
+
+
+def test_store_overwrites_cached_token():
+    cache.clear()
+    manager = OaTokenManager()
+    assert manager.store("token-a") == "token-a"
+    # 申请新Token后旧Token即失效, 刚申请到的Token覆盖缓存
+    assert manager.store("token-b") == "token-b"
+    assert OaTokenManager().get_cached_token() == "token-b"
+
+
+def test_refresh_lock_wait_honours_deadline():
+    cache.clear()
+    manager = OaTokenManager()
+    started = threading.Event()
+
+    def slow_fetch(expr):
+        started.set()
+        time.sleep(0.5)
+        return "token-slow"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(manager.refresh, slow_fetch)
+        started.wait()
+        started_at = time.monotonic()
+        with deadline_scope(time.monotonic() + 0.05):
+            with pytest.raises(APIException):
+                manager.refresh(slow_fetch)
+        assert time.monotonic() - started_at < 0.3
+        assert future.result() == "token-slow"
+
+
+def test_fetch_is_bounded_by_lock_timeout():
+    cache.clear()
+    manager = OaTokenManager()
+    deadlines = []
+
+    def fetch(expr):
+        deadlines.append(get_deadline() - time.monotonic())
+        return "token-a"
+
+    # 申请Token不能超过分布式锁的有效期, 否则其他进程可能在锁过期后申请新Token
+    with override_settings(OA_WORKFLOW_API=dict(settings.OA_WORKFLOW_API, TOKEN_LOCK_TIMEOUT=1)):
+        with deadline_scope(time.monotonic() + 30):
+            assert manager.refresh(fetch) == "token-a"
+    assert 0 < deadlines[0] <= 1
+
+
+def test_background_refresh_logs_errors(caplog):
+    cache.clear()
+    manager = OaTokenManager()
+
+    def fetch(expr):
+        raise ConnectionError("OA down")
+
+    manager._refresh_in_background(fetch, "token-a")
+    for _ in range(100):
+        if not manager._background_refreshing:
+            break
+        time.sleep(0.01)
+    assert "OA Token后台刷新失败" in caplog.text
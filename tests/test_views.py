@@ -0,0 +1,78 @@
+"""Tests for `oa_workflow_api.views`."""
+
+from types import SimpleNamespace
+
+import pytest
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from oa_workflow_api.handler import handle_request
+from oa_workflow_api.models import OaUserInfo
+from oa_workflow_api.resolvers import oa_user_index
+from oa_workflow_api.settings import api_settings
+from oa_workflow_api.views import OaWorkFlowView
+
+pytestmark = pytest.mark.usefixtures("migrated_db")
+
+
+def view_request(django_request, **user_attrs):
+    request = Request(handle_request(django_request), parsers=OaWorkFlowView().get_parsers())
+    request.user = SimpleNamespace(oa_user_id="1", **user_attrs)
+    return request
+
+
+def test_oa_remarks_operator_names(fake_oa):
+    OaUserInfo.objects.all().delete()
+    OaUserInfo.objects.create(user_id=1, name="系统管理员")
+    oa_user_index.invalidate()
+
+    # 本地OA用户表中没有的操作人使用request.user.oa_user_map
+    user_map = {"18781": {"name": "Leslie Chan"}, "1": {"name": "不使用"}}
+    request = view_request(APIRequestFactory().get("/1/oa-remarks"), oa_user_map=user_map)
+    res = OaWorkFlowView().oa_remarks(request, "1").data
+    assert [(i["operator"], i["operatorName"], i["operateType"]) for i in res["results"]] == [
+        ("18781", "Leslie Chan", "退回"),
+        ("1", "系统管理员", "提交"),
+    ]
+
+    request = view_request(APIRequestFactory().get("/1/oa-remarks"))
+    res = OaWorkFlowView().oa_remarks(request, "1").data
+    assert [i["operatorName"] for i in res["results"]] == ["", "系统管理员"]
+
+
+def test_bulk_action(fake_oa):
+    factory = APIRequestFactory()
+    view = OaWorkFlowView()
+
+    request = view_request(factory.post("/bulk-action", {"action": "review", "request_ids": ["11", "12"]}))
+    res = view.bulk_action(request).data
+    assert [(i["requestId"], i["success"]) for i in res] == [("11", True), ("12", True)]
+
+    request = view_request(factory.post("/bulk-action", {"action": "review", "request_ids": ["11"]}, format="json"))
+    assert [i["requestId"] for i in view.bulk_action(request).data] == ["11"]
+
+    # 字符串不能被拆分为多个流程ID
+    request = view_request(factory.post("/bulk-action", {"action": "review", "request_ids": "12345"}))
+    assert [i["requestId"] for i in view.bulk_action(request).data] == ["12345"]
+    submitted = fake_oa.calls["/api/workflow/paService/submitRequest"]
+    request = view_request(factory.post("/bulk-action", {"action": "review", "request_ids": "12345"}, format="json"))
+    with pytest.raises(ValidationError) as excinfo:
+        view.bulk_action(request)
+    assert "request_ids" in excinfo.value.detail
+    assert fake_oa.calls["/api/workflow/paService/submitRequest"] == submitted
+
+    request = view_request(factory.post("/bulk-action", {"action": "transmit", "request_ids": ["11"], "user_id": "2"}))
+    with pytest.raises(ValidationError) as excinfo:
+        view.bulk_action(request)
+    assert set(excinfo.value.detail) == {"trans_type"}
+
+    # 超过BULK_ACTION_MAX_ITEMS为请求参数错误(400)
+    request_ids = [str(i) for i in range(api_settings.BULK_ACTION_MAX_ITEMS + 1)]
+    request = view_request(
+        factory.post("/bulk-action", {"action": "review", "request_ids": request_ids}, format="json")
+    )
+    with pytest.raises(ValidationError) as excinfo:
+        view.bulk_action(request)
+    assert excinfo.value.status_code == 400 and "request_ids" in excinfo.value.detail
+    assert fake_oa.calls["/api/workflow/paService/submitRequest"] == submitted